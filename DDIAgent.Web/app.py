@@ -13,8 +13,9 @@ import threading
 import time
 import sys
 import os
+from collections import OrderedDict
 from datetime import datetime  
-from DDIAgent.infrastructure.database import Database
+from DDIAgent.infrastructure.database import get_database
 from DDIAgent.infrastructure.therapy_repository import TherapyRepository
 from DDIAgent.application.services.feedback_service import FeedbackService
 from jinja2 import Environment
@@ -36,6 +37,23 @@ CENTRAL_DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 DB_PATH = os.path.join(CENTRAL_DATA_DIR, "ddi_agent.db")
 CSV_PATH = os.path.join(CENTRAL_DATA_DIR, "DDI_with_scores.csv")
 
+# Hot reload: DDI_WATCH_DATASET=1 prati CSV i automatski zamjenjuje model kada se promijeni
+WATCH_DATASET = os.environ.get("DDI_WATCH_DATASET", "0") == "1"
+WATCH_INTERVAL_SECONDS = float(os.environ.get("DDI_WATCH_INTERVAL", "5"))
+
+# Više worker procesa: DDI_SHARED_STORE=<ime> priključuje model na segment iz scripts/ddi_shared_store.py
+SHARED_STORE_NAME = os.environ.get("DDI_SHARED_STORE") or None
+
+# Bolnički formular: DDI_FORMULARY=<putanja> (JSON lista ili jedan ID lijeka po redu) za guste matrice rizika
+FORMULARY_PATH = os.environ.get("DDI_FORMULARY") or None
+
+# Early-exit: DDI_EARLY_EXIT=1 eskalira na prvi kritični par, puni izvještaj se računa kada ga UI prikaže
+EARLY_EXIT = os.environ.get("DDI_EARLY_EXIT", "0") == "1"
+
+# Bodovanje u runtime-u: DDI_SCORING_CONFIG=<putanja do scoring_config.json> primjenjuje 'categories'
+# pri učitavanju; izmjena fajla se primjenjuje sa /api/agent/rescore (ili automatski uz DDI_WATCH_DATASET=1)
+SCORING_CONFIG_PATH = os.environ.get("DDI_SCORING_CONFIG") or None
+
 print("="*60)
 print("📁 KONFIGURACIJA PUTANJA")
 print("="*60)
@@ -49,6 +67,8 @@ print("="*60)
 
 
 from DDIAgent.application.runners.risk_assessment_runner import create_risk_assessment_runner
+from DDIAgent.application.services.model_reloader import ModelReloader
+from DDIAgent.ml.formulary_matrix import load_formulary
 
 app = Flask(__name__)
 CORS(app)
@@ -82,14 +102,38 @@ def reverse_filter(seq):
 
 
 runner = None
+model_reloader = None
 agent_thread = None
 stop_agent = False
 tick_history = []
+# Procjene posljednjih tick-ova po terapiji; puni izvještaj early-exit procjene se računa tek na zahtjev
+tick_assessments = OrderedDict()
+TICK_HISTORY_SIZE = 50
+
+
+def record_tick(result):
+    """Snimi tick u historiju (sažetak bez punog izvještaja) i zapamti procjenu za /report"""
+    data = result.to_dict()
+    tick_history.append(data)
+    if len(tick_history) > TICK_HISTORY_SIZE:
+        tick_history.pop(0)
+    
+    if result.assessment is not None:
+        tick_assessments[result.therapy_id] = result.assessment
+        tick_assessments.move_to_end(result.therapy_id)
+        if len(tick_assessments) > TICK_HISTORY_SIZE:
+            tick_assessments.popitem(last=False)
+    return data
+
+
+def current_drug_profiles():
+    """Profili lijekova aktivnog modela (nakon hot reload-a su to profili novog dataseta)"""
+    return runner.therapy_repository.drug_profiles if runner is not None else None
 
 
 def initialize_agent():
     """Inicijalizuj DDI agenta"""
-    global runner
+    global runner, model_reloader
     
     if runner is None:
         try:
@@ -109,7 +153,17 @@ def initialize_agent():
             
             # CSV postoji, pokušaj kreirati runner
             print(f"📁 Učitavam CSV: {CSV_PATH}")
-            runner = create_risk_assessment_runner(CSV_PATH)
+            formulary = None
+            if FORMULARY_PATH:
+                formulary = load_formulary(FORMULARY_PATH)
+                print(f"📋 Formular: {len(formulary)} lijekova ({FORMULARY_PATH})")
+            runner = create_risk_assessment_runner(CSV_PATH, incremental_scoring=True, cache_size=1024,
+                                                   shared_name=SHARED_STORE_NAME, formulary=formulary,
+                                                   early_exit=EARLY_EXIT, scoring_config=SCORING_CONFIG_PATH,
+                                                   db_path=DB_PATH)
+            model_reloader = ModelReloader(runner.scoring_service, CSV_PATH)
+            if WATCH_DATASET:
+                model_reloader.start_watching(WATCH_INTERVAL_SECONDS)
             
             print("✅ DDI Agent uspješno inicijaliziran!")
             print(f"📊 Agent koristi bazu: {DB_PATH}")
@@ -144,13 +198,8 @@ def agent_background_worker():
             result = runner.tick()
             
             if result and result.has_work:
-                # Sačuvaj u historiju
-                result_dict = result.to_dict()
-                tick_history.append(result_dict)
-                
-                # Limitiraj historiju
-                if len(tick_history) > 50:
-                    tick_history.pop(0)
+                # Sačuvaj u historiju (limitiranu na TICK_HISTORY_SIZE)
+                record_tick(result)
                 
                 print(f"[Tick #{tick_counter}] {result.patient_id} → {result.action_taken.value}")
                 
@@ -207,6 +256,10 @@ def agent_status():
     if runner and hasattr(runner, 'adaptive_threshold'):
         adaptive_threshold = runner.adaptive_threshold
     
+    scoring_cache = None
+    if runner and hasattr(runner, 'scoring_service'):
+        scoring_cache = runner.scoring_service.get_cache_stats()
+    
     return jsonify({
         "agent": {
             "initialized": runner is not None,
@@ -216,6 +269,8 @@ def agent_status():
             "database": DB_PATH if os.path.exists(DB_PATH) else "N/A",
             "csv_available": os.path.exists(CSV_PATH)
         },
+        "scoring_cache": scoring_cache,
+        "dataset": model_reloader.status() if model_reloader else None,
         "history": {
             "total_ticks": len(tick_history),
             "recent_ticks": len(tick_history[-10:]),
@@ -241,14 +296,10 @@ def execute_tick():
         result = runner.tick()
         
         if result and result.has_work:
-            tick_history.append(result.to_dict())
-            if len(tick_history) > 50:
-                tick_history.pop(0)
-            
             return jsonify({
                 "tick_executed": True,
                 "agent_cycle": "Sense → Think → Act → Learn",
-                "result": result.to_dict(),
+                "result": record_tick(result),
                 "message": f"Agent je obradio terapiju za pacijenta {result.patient_id}"
             })
         else:
@@ -266,6 +317,91 @@ def execute_tick():
             "message": "Greška pri izvršavanju agent tick-a"
         }), 500
 
+@app.route('/api/agent/reload', methods=['GET', 'POST'])
+def reload_dataset():
+    """Hot reload DDI dataseta: novi model se gradi u pozadini i atomično zamjenjuje stari"""
+    try:
+        initialize_agent()
+        
+        if request.method == 'GET':
+            return jsonify({"status": "ok", "reload": model_reloader.status()})
+        
+        data = request.get_json(silent=True) or {}
+        reload_status = model_reloader.reload(wait=bool(data.get("wait", False)))
+        
+        if reload_status["reloading"]:
+            message = "Reload pokrenut u pozadini"
+        elif reload_status["last_error"]:
+            message = f"Reload odbijen: {reload_status['last_error']}"
+        else:
+            message = "Model zamijenjen"
+        
+        return jsonify({
+            "status": "error" if reload_status["last_error"] and not reload_status["reloading"] else "ok",
+            "message": message,
+            "reload": reload_status
+        })
+        
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Greška pri reload-u dataseta: {e}"
+        }), 500
+
+@app.route('/api/agent/rescore', methods=['POST'])
+def rescore_dataset():
+    """Primijeni izmijenjeni scoring_config.json na učitane interakcije (atomična zamjena modela)"""
+    try:
+        initialize_agent()
+        
+        if not model_reloader.scoring_config:
+            return jsonify({
+                "status": "error",
+                "message": "Bodovanje iz konfiguracije nije uključeno (postavi DDI_SCORING_CONFIG)"
+            }), 400
+        
+        data = request.get_json(silent=True) or {}
+        reload_status = model_reloader.rescore(wait=bool(data.get("wait", True)))
+        
+        if reload_status["reloading"]:
+            message = "Rescore pokrenut u pozadini"
+        elif reload_status["last_error"]:
+            message = f"Rescore odbijen: {reload_status['last_error']}"
+        else:
+            message = "Nova pravila bodovanja primijenjena"
+        
+        return jsonify({
+            "status": "error" if reload_status["last_error"] and not reload_status["reloading"] else "ok",
+            "message": message,
+            "reload": reload_status
+        })
+        
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Greška pri rescore-u: {e}"
+        }), 500
+
+@app.route('/api/agent/reload/watch', methods=['POST'])
+def toggle_dataset_watch():
+    """Uključi/isključi praćenje promjena CSV-a"""
+    try:
+        initialize_agent()
+        
+        data = request.get_json(silent=True) or {}
+        if data.get("enabled", True):
+            model_reloader.start_watching(float(data.get("interval", WATCH_INTERVAL_SECONDS)))
+        else:
+            model_reloader.stop_watching()
+        
+        return jsonify({"status": "ok", "reload": model_reloader.status()})
+        
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Greška pri podešavanju praćenja: {e}"
+        }), 500
+
 @app.route('/api/agent/start', methods=['POST'])
 def start_background_agent():
     """Pokreni agenta u pozadini"""
@@ -312,6 +448,28 @@ def stop_background_agent():
         "was_running": thread_was_running
     })
 
+@app.route('/api/agent/report/<int:therapy_id>', methods=['GET'])
+def get_tick_report(therapy_id):
+    """Puni izvještaj posljednje procjene terapije (early-exit procjena se tek sada računa)"""
+    assessment = tick_assessments.get(therapy_id)
+    if assessment is None:
+        return jsonify({
+            "error": f"Nema procjene za terapiju {therapy_id} u posljednjih {TICK_HISTORY_SIZE} tick-ova"
+        }), 404
+    
+    try:
+        if not assessment.is_report_ready:
+            assessment.load_report()
+        return jsonify({
+            "therapy_id": therapy_id,
+            "assessment": assessment.to_dict()
+        })
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "message": "Greška pri računanju izvještaja"
+        }), 500
+
 @app.route('/api/agent/history', methods=['GET'])
 def get_tick_history():
     """Vrati historiju agent tick-ova"""
@@ -340,12 +498,12 @@ def get_tick_history():
 def get_therapies():
     """Lista terapija iz baze"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         
         print(f"📁 Učitavam terapije iz: {DB_PATH}")
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         therapies = repo.find_all()
         
         return jsonify({
@@ -377,7 +535,7 @@ def get_therapies():
 def add_therapy():
     """Dodaj novu terapiju"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         from DDIAgent.domain.entities import Therapy, Drug
         
@@ -408,8 +566,8 @@ def add_therapy():
         )
         
         # Sačuvaj
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         saved_therapy = repo.save(therapy)
         
         return jsonify({
@@ -430,6 +588,53 @@ def add_therapy():
             "message": str(e)
         }), 500
 
+@app.route('/api/therapy/<int:therapy_id>/alternatives/<drug_id>', methods=['GET'])
+def get_drug_alternatives(therapy_id, drug_id):
+    """Sigurnije zamjene za lijek u terapiji, rangirane po riziku koji dodaju ostatku terapije"""
+    try:
+        initialize_agent()
+        
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
+        therapy = repo.find_by_id(therapy_id)
+        
+        if not therapy:
+            return jsonify({"status": "error", "message": f"Terapija ID {therapy_id} nije pronađena"}), 404
+        
+        if drug_id not in therapy.get_drug_ids():
+            return jsonify({"status": "error", "message": f"Lijek {drug_id} nije u terapiji {therapy_id}"}), 404
+        
+        limit = request.args.get('limit', default=5, type=int)
+        result = runner.scoring_service.suggest_alternatives(therapy, drug_id, limit=limit)
+        
+        return jsonify({"status": "ok", "therapy_id": therapy_id, **result})
+        
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Greška pri traženju alternativa: {e}"
+        }), 500
+
+@app.route('/api/drugs/<drug_id>/profile', methods=['GET'])
+def get_drug_profile(drug_id):
+    """Unaprijed izračunati profil rizika lijeka"""
+    initialize_agent()
+    drug_profiles = current_drug_profiles()
+    
+    if drug_profiles is None:
+        return jsonify({"status": "error", "message": "Profili lijekova nisu dostupni"}), 503
+    
+    profile = drug_profiles.get(drug_id)
+    if profile is None:
+        return jsonify({"status": "error", "message": f"Lijek {drug_id} nema interakcija u datasetu"}), 404
+    
+    return jsonify({
+        "status": "ok",
+        "drug_id": drug_id,
+        "profile": profile,
+        "dataset_version": drug_profiles.dataset_version
+    })
+
 @app.route('/api/test', methods=['GET'])
 def test_endpoint():
     """Test API endpoint"""
@@ -452,12 +657,12 @@ def create_therapy_page():
 def view_therapy_page(therapy_id):
     """Prikaži detalje terapije i agentovu procjenu"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         from DDIAgent.domain.entities import TherapyPercept
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         
         therapy = repo.find_by_id(therapy_id)
         if therapy:
@@ -512,7 +717,8 @@ def view_therapy_page(therapy_id):
                 {
                     "drug_id": drug.drug_id,
                     "name": drug.name,
-                    "dosage": drug.dosage or "Nije navedeno"
+                    "dosage": drug.dosage or "Nije navedeno",
+                    "risk_profile": drug.risk_profile
                 }
                 for drug in therapy.drugs
             ],
@@ -563,8 +769,8 @@ def submit_feedback_to_runner():
         if not therapy_id:
             return jsonify({"status": "error", "message": "therapy_id je obavezan"}), 400
 
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
 
         global runner
         service = FeedbackService(db=db, repo=repo, runner=runner)
@@ -603,8 +809,8 @@ def submit_feedback(warning_id):
         if not therapy_id:
             return jsonify({"status": "error", "message": "therapy_id je obavezan"}), 400
 
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
 
         global runner
         service = FeedbackService(db=db, repo=repo, runner=runner)
@@ -632,11 +838,11 @@ def submit_feedback(warning_id):
 def dashboard_page():
     """Dashboard sa svim terapijama i statistikama"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         therapies = repo.find_all()
         
         # Izračunaj statistike
@@ -726,11 +932,11 @@ def agent_history_page():
 def therapies_page():
     """HTML stranica sa svim terapijama"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         therapies = repo.find_all()
         
         # Pripremi terapije za prikaz
@@ -780,11 +986,11 @@ def debug_runner_state():
             return jsonify({"error": "Runner nije inicijaliziran"}), 404
         
         # Učitaj neku terapiju sa feedback-om
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         
         # Pronađi terapiju sa feedback-om
         therapies = repo.find_all()
@@ -821,11 +1027,11 @@ def feedback_success_page():
     
     # Pronađi terapiju za prikaz detalja
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         therapy = repo.find_by_id(int(therapy_id)) if therapy_id.isdigit() else None
         
         if therapy:
@@ -844,7 +1050,8 @@ def feedback_success_page():
                     {
                         "drug_id": drug.drug_id,
                         "name": drug.name,
-                        "dosage": drug.dosage or "Nije navedeno"
+                        "dosage": drug.dosage or "Nije navedeno",
+                        "risk_profile": drug.risk_profile
                     }
                     for drug in therapy.drugs
                 ],
@@ -899,12 +1106,12 @@ def feedback_success_page():
 def create_sample_therapy():
     """Kreiraj test terapiju za demo i prikaži success stranicu"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         from DDIAgent.domain.entities import Therapy, Drug
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         
         # PRVO: Provjeri da li već postoji TEST terapija
         existing_therapies = repo.find_all()
@@ -1012,11 +1219,11 @@ def agent_status_page():
 def test_repository_feedback(therapy_id):
     """Testiraj repository feedback funkcije"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         
         # Učitaj terapiju
         therapy = repo.find_by_id(therapy_id)
@@ -1050,11 +1257,11 @@ def test_repository_feedback(therapy_id):
 def debug_session_state(therapy_id):
     """Debug SQLAlchemy session state"""
     try:
-        from DDIAgent.infrastructure.database import Database
+        from DDIAgent.infrastructure.database import get_database
         from DDIAgent.infrastructure.therapy_repository import TherapyRepository
         
-        db = Database(DB_PATH)
-        repo = TherapyRepository(db)
+        db = get_database(DB_PATH)
+        repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
         
         # Uzmi dvaput da vidimo caching
         therapy1 = repo.find_by_id(therapy_id)
@@ -1113,13 +1320,13 @@ def execute_tick_page():
             # Ako je specificirana terapija, procesuiraj SAMO tu
             if therapy_id:
                 try:
-                    from DDIAgent.infrastructure.database import Database
+                    from DDIAgent.infrastructure.database import get_database
                     from DDIAgent.infrastructure.therapy_repository import TherapyRepository
                     from DDIAgent.domain.entities import TherapyPercept
                     from DDIAgent.application.runners.risk_assessment_runner import TickResult  
                     therapy_id_int = int(therapy_id)
-                    db = Database(DB_PATH)
-                    repo = TherapyRepository(db)
+                    db = get_database(DB_PATH)
+                    repo = TherapyRepository(db, drug_profiles=current_drug_profiles())
                     therapy = repo.find_by_id(therapy_id_int)
                     
                     if therapy:
@@ -1174,14 +1381,10 @@ def execute_tick_page():
             # Ako ima result (regular tick ili uspješan specificni)
             if result and hasattr(result, 'has_work') and result.has_work:
                 # Snimi u historiju
-                tick_history.append(result.to_dict())
-                if len(tick_history) > 50:
-                    tick_history.pop(0)
-                
                 response_data = {
                     "tick_executed": True,
                     "agent_cycle": "Sense → Think → Act → Learn",
-                    "result": result.to_dict(),
+                    "result": record_tick(result),
                     "message": f"Agent je obradio terapiju za pacijenta {result.patient_id}"
                 }
             elif not therapy_id and result and hasattr(result, 'has_work') and not result.has_work:
@@ -2,16 +2,17 @@
 RUNNER: Risk Assessment Agent (Sense→Think→Act→Learn)
 Prema uputama: mora biti jasno razdvojeno Sense→Think→Act→Learn
 """
-from typing import Optional
+from typing import List, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from DDIAgent.domain.entities import Therapy, TherapyPercept, RiskAssessment, Warning, Drug
 from DDIAgent.domain.enums import ActionType, RiskLevel
 from DDIAgent.application.services.scoring_service import ScoringService
-from DDIAgent.infrastructure.database import Database
+from DDIAgent.infrastructure.database import Database, get_database
 from DDIAgent.infrastructure.therapy_repository import TherapyRepository
 from DDIAgent.ml.scoring_model import ScoringModel
+from DDIAgent.ml.drug_profiles import profiles_for_model
 from DDIAgent.application.services.scoring_service import ScoringService
 
 @dataclass
@@ -26,8 +27,12 @@ class TickResult:
     action_taken: Optional[ActionType] = None
     timestamp: datetime = datetime.now()
     
-    def to_dict(self):
-        """Konvertuj u dictionary za Web layer (prema uputama)"""
+    def to_dict(self, include_report: bool = False):
+        """
+        Konvertuj u dictionary za Web layer (prema uputama).
+        include_report: izračunaj puni izvještaj early-exit procjene; tick endpointi ga ne traže,
+        izvještaj se računa tek u /api/agent/report/<therapy_id>
+        """
         if not self.has_work:
             return {"has_work": False, "timestamp": self.timestamp.isoformat()}
         
@@ -41,6 +46,8 @@ class TickResult:
         }
         
         if self.assessment:
+            if include_report and not self.assessment.is_report_ready:
+                self.assessment.load_report()
             result["assessment"] = self.assessment.to_dict()
         
         if self.warning:
@@ -57,11 +64,14 @@ class RiskAssessmentRunner:
     def __init__(self, 
              database: Database, 
              scoring_service: ScoringService,
-             therapy_repository: TherapyRepository):
+             therapy_repository: TherapyRepository,
+             early_exit: bool = False):
     
      self.db = database
      self.scoring_service = scoring_service
      self.therapy_repository = therapy_repository
+     # Early-exit: kritičan par odmah daje ESCALATE, puni izvještaj se računa tek na zahtjev (UI)
+     self.early_exit = early_exit
     
      # Učitaj prag iz baze
      self.adaptive_threshold = self._load_threshold_from_db()
@@ -428,7 +438,10 @@ class RiskAssessmentRunner:
         - Primjenjuje politiku odlučivanja (adaptivni pragovi)
         """
         # 1. Procjeni rizik (koristi scoring servis)
-        assessment = self.scoring_service.assess_therapy_risk(percept.therapy)
+        if self.early_exit:
+            assessment = self.scoring_service.assess_critical_first(percept.therapy)
+        else:
+            assessment = self.scoring_service.assess_therapy_risk(percept.therapy)
         
         # 2. Primijeni politiku odlučivanja
         action = self._apply_policy(assessment, percept.therapy)
@@ -472,16 +485,28 @@ class RiskAssessmentRunner:
         percept.therapy.risk_history = []
     
      current_time = datetime.now()
-     percept.therapy.risk_history.append({
+     entry = {
         'timestamp': current_time.isoformat(),
-        'total_score': assessment.total_score,
         'risk_level': assessment.risk_level.value,
         'action_taken': warning.action_type.value if warning else "INFORM",
-        'interaction_count': assessment.interaction_count,
-        'critical_count': assessment.critical_count,
-        'high_risk_count': assessment.high_risk_count,
+        'dataset_version': assessment.dataset_version,
         'assessment_time': current_time.isoformat()  
-    })
+    }
+     if assessment.is_report_ready:
+        entry.update({
+            'total_score': assessment.total_score,
+            'interaction_count': assessment.interaction_count,
+            'critical_count': assessment.critical_count,
+            'high_risk_count': assessment.high_risk_count
+        })
+     else:
+        # Early-exit eskalacija: brojači nisu izračunati (i ne upisuju se), bilježi se kritični par
+        # koji je odlučio; view_therapy.html za takav zapis prikazuje oznaku umjesto score-a
+        entry.update({
+            'early_exit': True,
+            'critical_interaction': assessment.critical_interaction
+        })
+     percept.therapy.risk_history.append(entry)
     
     # Sačuvaj ažuriranu terapiju
      self.therapy_repository.save(percept.therapy)
@@ -494,14 +519,16 @@ class RiskAssessmentRunner:
         """
         # DEBUG
         print(f"\n[POLICY] Početni prag: {self.adaptive_threshold}")
-        print(f"[POLICY] Assessment total_score: {assessment.total_score}")
-        print(f"[POLICY] Critical count: {assessment.critical_count}")
         
         # PRVO: Provjeri kritične interakcije - OVO SE NE MIJENJA
+        # (prije čitanja score-a, da early-exit procjena ne pokrene puni izvještaj)
         if assessment.has_critical_interactions:
             print(f"[POLICY] KRITIČNE interakcije detektovane → ESCALATE")
             return ActionType.ESCALATE
         
+        print(f"[POLICY] Assessment total_score: {assessment.total_score}")
+        print(f"[POLICY] Critical count: {assessment.critical_count}")
+        
         # DRUGO: Prilagodi prag na osnovu historije feedbacka
         effective_threshold = self.adaptive_threshold
         
@@ -563,6 +590,12 @@ class RiskAssessmentRunner:
                 "ℹ️ {count} interakcija pronađeno. Preporučuje se redovno praćenje."
         }
         
+        if not assessment.is_report_ready:
+            # Early-exit eskalacija: poruka iz kritičnog para, bez punog izvještaja
+            pair = assessment.critical_interaction
+            return (f"🚨 KRITIČAN RIZIK! Kritična interakcija {pair['drug1_id']} + {pair['drug2_id']} "
+                    f"(score {pair['risk_score']:.1f}). HITNO KONSULTUJTE LJEKARA!")
+        
         template = templates.get(action, templates[ActionType.INFORM])
         
         return template.format(
@@ -587,6 +620,10 @@ class RiskAssessmentRunner:
         """Generiše sugestije na osnovu procjene"""
         suggestions = []
         
+        if not assessment.is_report_ready:
+            # Early-exit: poznato je samo da postoji kritična interakcija
+            return ["Hitno konsultujte ljekara!", "Razmotrite zamjenu kritičnih lijekova"]
+        
         if assessment.critical_count > 0:
             suggestions.append("Hitno konsultujte ljekara!")
             suggestions.append("Razmotrite zamjenu kritičnih lijekova")
@@ -602,6 +639,13 @@ class RiskAssessmentRunner:
         if assessment.total_score > 10:
             suggestions.append("Razmotrite hospitalizaciju za monitoring")
         
+        for finding in assessment.findings:
+            if finding.get('type') == 'CATEGORY_STACKING':
+                suggestions.append(
+                    f"Kumulativni rizik {finding['category']} (lijekova: {finding['drug_count']}) - "
+                    f"razmotrite smanjenje broja lijekova iz ove grupe"
+                )
+        
         return suggestions
     
     def _get_last_assessment_time(self, therapy_id: int) -> Optional[datetime]:
@@ -629,21 +673,50 @@ class RiskAssessmentRunner:
      return None
 
 # Factory funkcija za kreiranje runnera
-def create_risk_assessment_runner(data_path: str = "data/DDI_with_scores.csv"):
-    """Kreira runner sa svim zavisnostima (Dependency Injection)"""
+def create_risk_assessment_runner(data_path: str = "data/DDI_with_scores.csv",
+                                  incremental_scoring: bool = False,
+                                  cache_size: int = 0,
+                                  shared_name: Optional[str] = None,
+                                  formulary: Optional[List[str]] = None,
+                                  early_exit: bool = False,
+                                  scoring_config: Optional[str] = None,
+                                  db_path: str = "data/ddi_agent.db"):
+    """
+    Kreira runner sa svim zavisnostima (Dependency Injection).
+    incremental_scoring: ponovna procjena terapije računa samo parove promijenjenih lijekova (isključeno
+    podrazumijevano; web aplikacija ga uključuje)
+    cache_size: broj skupova lijekova u LRU kešu sažetaka (0 = isključen, podrazumijevano)
+    shared_name: ime shared memory segmenta koji je objavio scripts/ddi_shared_store.py
+    formulary: lijekovi bolničkog formulara za guste matrice rizika (None = samo rijetki indeks)
+    early_exit: kritičan par odmah daje ESCALATE bez punog skeniranja parova (izvještaj na zahtjev)
+    scoring_config: scoring_config.json čije se kategorije primjenjuju pri učitavanju (data_path može
+    biti i očišćeni CSV bez risk kolona)
+    db_path: SQLite baza; instanca se dijeli sa ostatkom procesa (get_database)
+    """
     # Inicijalizuj sve komponente
-    database = Database("data/ddi_agent.db")
-    
-    scoring_model = ScoringModel(data_path)
-    scoring_service = ScoringService(scoring_model)
+    database = get_database(db_path)
+    
+    scoring_model = ScoringModel(data_path, shared_name=shared_name, formulary=formulary,
+                                 scoring_config=scoring_config)
+    scoring_service = ScoringService(
+        scoring_model,
+        incremental=incremental_scoring,
+        cache_size=cache_size
+    )
     
-    therapy_repository = TherapyRepository(database)
+    # Profili rizika po lijeku za Drug.risk_profile pripadaju modelu: ModelReloader gradi nove
+    # prije zamjene, a repository uvijek čita profile aktivnog modela
+    scoring_model.drug_profiles = profiles_for_model(scoring_model)
+    therapy_repository = TherapyRepository(
+        database, profiles_provider=lambda: scoring_service.scoring_model.drug_profiles
+    )
     
     # Kreiraj runner
     runner = RiskAssessmentRunner(
         database=database,
         scoring_service=scoring_service,
-        therapy_repository=therapy_repository
+        therapy_repository=therapy_repository,
+        early_exit=early_exit
     )
     
     return runner
\ No newline at end of file
@@ -3,5 +3,7 @@ APPLICATION services package
 """
 # Uvijek koristite relative imports unutar package-a
 from .scoring_service import ScoringService
+from .assessment_cache import DrugSetCache
+from .model_reloader import ModelReloader
 
-__all__ = ['ScoringService']
\ No newline at end of file
+__all__ = ['ScoringService', 'DrugSetCache', 'ModelReloader']
\ No newline at end of file
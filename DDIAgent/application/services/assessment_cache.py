@@ -0,0 +1,84 @@
+"""
+APPLICATION: LRU keš sažetaka procjene po skupu lijekova
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class DrugSetCache:
+    """
+    Ograničeni LRU keš sažetaka terapija.
+
+    Ključ je (sortirani tuple drug_id-jeva, verzija dataseta), pa pacijenti sa istim režimom
+    (npr. standardna post-MI kombinacija) dijele jedan proračun bez obzira na redoslijed lijekova.
+    Uz sažetak se čuva redoslijed lijekova za koji je izračunat, da bi se `pairs` (i, j)
+    mogli preslikati na redoslijed u terapiji koja pita.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Hashable, Tuple[List[str], Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(drug_ids: List[str], dataset_version: Optional[str]) -> Tuple:
+        """Kanonski ključ: sortirani ID-jevi + verzija dataseta"""
+        return tuple(sorted(drug_ids)), dataset_version
+
+    def get(self, drug_ids: List[str], dataset_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Vrati sažetak za drug_ids (pairs preslikani na njihov redoslijed) ili None"""
+        key = self.make_key(drug_ids, dataset_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        cached_ids, summary = entry
+        summary = dict(summary)
+        if cached_ids != drug_ids:
+            # Isti skup, drugi redoslijed: preslikaj pozicije parova
+            # (categories su sortirane po imenu, pa ne zavise od redoslijeda lijekova)
+            position = {drug_id: i for i, drug_id in enumerate(drug_ids)}
+            summary['pairs'] = sorted(
+                tuple(sorted((position[cached_ids[i]], position[cached_ids[j]])))
+                for i, j in summary['pairs']
+            )
+        return summary
+
+    def put(self, drug_ids: List[str], dataset_version: Optional[str], summary: Dict[str, Any]):
+        """Sačuvaj sažetak i izbaci najdavnije korištene unose iznad max_size"""
+        if self.max_size <= 0:
+            return
+
+        key = self.make_key(drug_ids, dataset_version)
+        with self._lock:
+            self._entries[key] = (list(drug_ids), summary)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Isprazni keš (brojači ostaju)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Brojači za dimenzionisanje keša"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
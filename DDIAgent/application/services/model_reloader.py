@@ -0,0 +1,210 @@
+"""
+APPLICATION: Hot reload DDI dataseta (novi ScoringModel u pozadini + atomična zamjena)
+"""
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from DDIAgent.ml.scoring_model import ScoringModel
+from DDIAgent.ml.drug_profiles import profiles_for_model
+from DDIAgent.ml.risk_categorizer import RiskCategorizer
+from DDIAgent.application.services.scoring_service import ScoringService
+
+
+class ModelReloader:
+    """
+    Gradi novi ScoringModel u pozadinskoj niti, validira ga i tek onda ga atomično
+    postavlja u ScoringService (swap_model). Tick ili request nikad ne vidi napola izgrađen indeks:
+    do zamjene svi koriste stari model, a zamjena je jedna dodjela reference.
+
+    Opciono prati fajlove (mtime/veličina) i pokreće reload kada se promijene.
+    Ako model boduje interakcije iz scoring_config.json, promjena samo konfiguracije pokreće
+    rescore: nova pravila se primjenjuju na već učitane interakcije (bez čitanja CSV-a).
+    """
+
+    def __init__(self,
+                 scoring_service: ScoringService,
+                 data_path: str,
+                 watch_paths: Optional[List[str]] = None,
+                 model_factory: Optional[Callable[[str], ScoringModel]] = None,
+                 scoring_config: Optional[str] = None):
+        self.scoring_service = scoring_service
+        self.data_path = data_path
+        self.scoring_config = scoring_config or scoring_service.scoring_model.scoring_config
+        self.watch_paths = watch_paths or [data_path] + ([self.scoring_config] if self.scoring_config else [])
+        self.model_factory = model_factory or self._default_factory
+
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+
+        self.reload_count = 0
+        self.failed_count = 0
+        self.last_reload_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def _default_factory(self, data_path: str) -> ScoringModel:
+        """Novi model sa istim podešavanjima kao trenutni"""
+        current = self.scoring_service.scoring_model
+        return ScoringModel(
+            data_path,
+            backend=current.backend,
+            use_pack=current.use_pack,
+            pack_path=current.pack_path if current.data_path == data_path else None,
+            algorithm=current.algorithm,
+            shared_name=current.shared_name,
+            use_bitsets=current.use_bitsets,
+            formulary=current.formulary.drug_ids if current.formulary is not None else None,
+            scoring_config=self.scoring_config
+        )
+
+    def _rescored_model(self) -> ScoringModel:
+        """Trenutni model sa pravilima bodovanja iz scoring_config.json"""
+        if not self.scoring_config:
+            raise ValueError("Model nema scoring_config.json za bodovanje")
+        categorizer = RiskCategorizer.from_config(self.scoring_config)
+        return self.scoring_service.scoring_model.rescored(categorizer)
+
+    @staticmethod
+    def validate(model: ScoringModel):
+        """Odbij model koji se nije učitao ili ne može izračunati sažetak"""
+        if model.dataset_version is None or model.interaction_count == 0:
+            raise ValueError("Novi model nema učitanih interakcija")
+
+        if model.store is not None:
+            sample = model.store.drug_ids[:10]
+        else:
+            sample = list(dict.fromkeys(d for key in list(model.interaction_lookup)[:5] for d in key.split('|')))
+        summary = model.calculate_therapy_summary(sample)
+        if summary['drug_count'] != len(sample):
+            raise ValueError("Novi model vraća neispravan sažetak")
+
+    @property
+    def is_reloading(self) -> bool:
+        return self._reload_thread is not None and self._reload_thread.is_alive()
+
+    def reload(self, wait: bool = False) -> Dict[str, Any]:
+        """
+        Pokreni reload u pozadini (ako već nije u toku).
+        wait=True čeka da se reload završi i vraća konačni status.
+        """
+        return self._start(*self._reload_job(), wait)
+
+    def rescore(self, wait: bool = False) -> Dict[str, Any]:
+        """
+        Primijeni scoring_config.json na učitane interakcije i atomično zamijeni model.
+        Dijeli nit sa reload-om, pa se reload i rescore nikad ne preklapaju.
+        """
+        return self._start(*self._rescore_job(), wait)
+
+    def _reload_job(self) -> Tuple[Callable[[], ScoringModel], str]:
+        return lambda: self.model_factory(self.data_path), f"Reload DDI dataseta: {self.data_path}"
+
+    def _rescore_job(self) -> Tuple[Callable[[], ScoringModel], str]:
+        return self._rescored_model, f"Rescore iz {self.scoring_config}"
+
+    def _launch(self, build: Callable[[], ScoringModel], label: str) -> Tuple[threading.Thread, bool]:
+        """Pokreni reload nit ako nijedna nije u toku; vraća (nit koja radi, da li je ovaj poziv pokrenuo novu)"""
+        with self._reload_lock:
+            if self.is_reloading:
+                return self._reload_thread, False
+            self._reload_thread = threading.Thread(target=self._reload_worker, args=(build, label), daemon=True)
+            self._reload_thread.start()
+            return self._reload_thread, True
+
+    def _start(self, build: Callable[[], ScoringModel], label: str, wait: bool) -> Dict[str, Any]:
+        thread, _ = self._launch(build, label)
+        if wait:
+            thread.join()
+        return self.status()
+
+    def _reload_worker(self, build: Callable[[], ScoringModel], label: str):
+        started = datetime.now()
+        print(f"🔄 {label}")
+        try:
+            model = build()
+            self.validate(model)
+            # Profili lijekova se grade prije zamjene, pa se mijenjaju zajedno sa modelom
+            if model.drug_profiles is None:
+                model.drug_profiles = profiles_for_model(model)
+        except Exception as e:
+            self.failed_count += 1
+            self.last_error = str(e)
+            print(f"❌ Reload odbijen, ostaje stari model: {e}")
+            return
+
+        old_model = self.scoring_service.swap_model(model)
+        self.reload_count += 1
+        self.last_error = None
+        self.last_reload_at = datetime.now().isoformat()
+        print(f"✅ Model zamijenjen: {old_model.dataset_version} → {model.dataset_version} "
+              f"({(datetime.now() - started).total_seconds():.2f}s)")
+
+    def _file_signature(self):
+        signature = []
+        for path in self.watch_paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return signature
+
+    def start_watching(self, interval: float = 5.0):
+        """Prati watch_paths i pokreni reload kada se neki fajl promijeni"""
+        # Nit koja još nije primijetila stop_watching nastavlja sa radom
+        self._stop_watching.clear()
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+
+        self._watch_thread = threading.Thread(target=self._watch_worker, args=(interval,), daemon=True)
+        self._watch_thread.start()
+        print(f"👀 Praćenje promjena: {', '.join(self.watch_paths)} (svakih {interval}s)")
+
+    def stop_watching(self):
+        self._stop_watching.set()
+
+    @property
+    def is_watching(self) -> bool:
+        return (self._watch_thread is not None and self._watch_thread.is_alive()
+                and not self._stop_watching.is_set())
+
+    def _watch_worker(self, interval: float):
+        last_signature = self._file_signature()
+        while not self._stop_watching.wait(interval):
+            signature = self._file_signature()
+            if signature == last_signature:
+                continue
+
+            # Sačekaj da se fajl prestane mijenjati (kopiranje velikog CSV-a traje)
+            if self._stop_watching.wait(interval) or self._file_signature() != signature:
+                continue
+
+            # Promijenjena samo konfiguracija bodovanja: dovoljan je rescore učitanih interakcija
+            changed = {path for (path, *old), (_, *new) in zip(last_signature, signature) if old != new}
+            if self.scoring_config and changed == {self.scoring_config}:
+                thread, started = self._launch(*self._rescore_job())
+            else:
+                thread, started = self._launch(*self._reload_job())
+            thread.join()
+
+            # Ako je već bio u toku reload pokrenut iz API-ja, on je možda izgradio model prije ove
+            # promjene: potpis se ne pomjera, pa se promjena primjenjuje u sljedećem krugu
+            if started:
+                last_signature = signature
+
+    def status(self) -> Dict[str, Any]:
+        """Status za API"""
+        return {
+            'dataset_version': self.scoring_service.scoring_model.dataset_version,
+            'reloading': self.is_reloading,
+            'watching': self.is_watching,
+            'watch_paths': self.watch_paths,
+            'scoring_config': self.scoring_config,
+            'reload_count': self.reload_count,
+            'failed_count': self.failed_count,
+            'last_reload_at': self.last_reload_at,
+            'last_error': self.last_error
+        }
@@ -1,46 +1,362 @@
 """
 APPLICATION: Scoring service za procjenu rizika terapija
 """
-from typing import List, Dict, Any
-from DDIAgent.domain.entities import Therapy, RiskAssessment, DrugInteraction
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Optional, Set, Tuple
+import numpy as np
+from DDIAgent.domain.entities import (
+    Therapy, RiskAssessment, DeferredRiskAssessment, DrugInteraction
+)
 from DDIAgent.domain.enums import RiskLevel
 from DDIAgent.ml.scoring_model import ScoringModel
+from DDIAgent.ml.interaction_columns import LazyInteractionColumns
+from DDIAgent.application.services.assessment_cache import DrugSetCache
+from DDIAgent.infrastructure.file_storage import FileDataLoader
+
+class _IncrementalState:
+    """
+    Doprinosi parova iz posljednje procjene jedne terapije.
+    Ključ para je sortiran tuple (drug_id, drug_id), pa ne zavisi od pozicija u terapiji.
+    """
+    
+    def __init__(self, dataset_version: Optional[str]):
+        self.dataset_version = dataset_version
+        self.drug_ids: List[str] = []
+        self.contributions: Dict[Tuple[str, str], Tuple] = {}
+        self.by_drug: Dict[str, Set[Tuple[str, str]]] = {}
+        self.total_risk_score = 0
+        self.interaction_count = 0
+        self.critical_count = 0
+        self.severe_count = 0
+        self.high_risk_count = 0
+        self.max_counts = Counter()        # multiskup maksimuma parova (max nakon uklanjanja)
+        self.category_counts = Counter()   # broj parova po kategoriji
+    
+    def add_pair(self, key: Tuple[str, str], row: Tuple):
+        pair_sum, pair_max, count, critical, severe, high_risk, categories = row
+        self.contributions[key] = row
+        self.by_drug.setdefault(key[0], set()).add(key)
+        self.by_drug.setdefault(key[1], set()).add(key)
+        self.total_risk_score += pair_sum
+        self.interaction_count += count
+        self.critical_count += critical
+        self.severe_count += severe
+        self.high_risk_count += high_risk
+        self.max_counts[pair_max] += 1
+        self.category_counts.update(categories)
+    
+    def remove_drug(self, drug_id: str):
+        for key in self.by_drug.pop(drug_id, ()):
+            pair_sum, pair_max, count, critical, severe, high_risk, categories = self.contributions.pop(key)
+            partner = key[1] if key[0] == drug_id else key[0]
+            self.by_drug.get(partner, set()).discard(key)
+            self.total_risk_score -= pair_sum
+            self.interaction_count -= count
+            self.critical_count -= critical
+            self.severe_count -= severe
+            self.high_risk_count -= high_risk
+            self.max_counts[pair_max] -= 1
+            if not self.max_counts[pair_max]:
+                del self.max_counts[pair_max]
+            self.category_counts.subtract(categories)
+        
+        if not self.interaction_count:
+            self.total_risk_score = 0
+
 
 class ScoringService:
     """Servis za procjenu rizika terapija koristeći scoring model"""
     
-    def __init__(self, scoring_model: ScoringModel):
+    # Udio promijenjenih lijekova iznad kojeg je puni proračun jeftiniji od delte
+    MAX_DELTA_FRACTION = 0.5
+    
+    # Kategorije čiji se efekti sabiraju kroz više lijekova (farmakodinamske)
+    STACKING_CATEGORIES = (
+        'CRITICAL_BLEEDING', 'ANTICOAGULANT', 'CARDIAC_QTc', 'SEROTONERGIC',
+        'NEUROEXCITATORY', 'ORGAN_TOXICITY', 'CARDIAC_OTHER'
+    )
+    
+    def __init__(self, scoring_model: ScoringModel, incremental: bool = False, cache_size: int = 0,
+                 stacking_min_drugs: int = 3, incremental_states_size: int = 1024):
+        """
+        incremental_states_size: najviše terapija sa sačuvanim inkrementalnim stanjem (LRU, kao
+        DrugSetCache); terapija čije je stanje izbačeno dobija puni proračun pri sljedećoj procjeni.
+        """
         self.scoring_model = scoring_model
+        self.incremental = incremental
+        self.stacking_min_drugs = stacking_min_drugs
+        self._drug_lookup: Optional[Dict[str, str]] = None
+        self.cache = DrugSetCache(cache_size) if cache_size > 0 else None
+        self.incremental_states_size = incremental_states_size
+        self._incremental_states: 'OrderedDict[int, _IncrementalState]' = OrderedDict()
+        self._incremental_lock = threading.Lock()
+        self.incremental_stats = {'full': 0, 'delta': 0, 'unchanged': 0, 'evictions': 0}
+        self._swap_lock = threading.Lock()
+    
+    def swap_model(self, scoring_model: ScoringModel) -> ScoringModel:
+        """
+        Atomično zamijeni scoring model (hot reload). Vraća stari model.
+        Procjena koja je u toku završava sa modelom koji je uzela na početku.
+        """
+        with self._swap_lock:
+            old_model = self.scoring_model
+            self.scoring_model = scoring_model
+        
+        # Ključevi keša i inkrementalna stanja nose verziju dataseta - stari unosi samo zauzimaju memoriju
+        if self.cache is not None:
+            self.cache.clear()
+        with self._incremental_lock:
+            self._incremental_states.clear()
+        return old_model
     
     def assess_therapy_risk(self, therapy: Therapy) -> RiskAssessment:
         """Procjeni rizik terapije"""
+        # Jedna referenca na model za cijelu procjenu (swap_model ne utiče na procjenu u toku)
+        return self._assess(self.scoring_model, therapy, therapy.get_drug_ids())
+    
+    def assess_critical_first(self, therapy: Therapy) -> RiskAssessment:
+        """
+        Early-exit procjena za odluku o eskalaciji: ako terapija ima kritičan par, vraća
+        DeferredRiskAssessment čim ga pronađe (puni izvještaj se računa tek na zahtjev);
+        inače je potreban puni sažetak za pragove politike, pa vraća običnu procjenu.
+        """
+        model = self.scoring_model
         drug_ids = therapy.get_drug_ids()
+        critical = model.find_critical_pair(drug_ids) if len(drug_ids) >= 2 else None
+        if critical is None:
+            return self._assess(model, therapy, drug_ids)
         
+        return DeferredRiskAssessment(
+            therapy=therapy,
+            critical_interaction=critical,
+            report_loader=lambda: self._assess(model, therapy, drug_ids),
+            dataset_version=model.dataset_version
+        )
+    
+    def _assess(self, model: ScoringModel, therapy: Therapy, drug_ids: List[str]) -> RiskAssessment:
+        """Puna procjena sa zadatim modelom (lista lijekova se uzima u trenutku poziva procjene)"""
         # Ako ima manje od 2 lijeka, nema interakcija
         if len(drug_ids) < 2:
             return RiskAssessment(
                 therapy=therapy,
                 total_score=0.0,
                 risk_level=RiskLevel.NONE,
-                interactions_found=[]
+                interactions_found=[],
+                dataset_version=model.dataset_version
             )
         
-        # Izračunaj rizik koristeći scoring model
-        risk_report = self.scoring_model.calculate_therapy_risk(drug_ids)
+        # Brzi put: sažetak po parovima, bez kreiranja DrugInteraction objekata
+        summary = self._get_summary(model, therapy, drug_ids)
         
         # Odredi nivo rizika na osnovu maksimalnog score-a
-        risk_level = RiskLevel.from_score(risk_report['max_risk'])
+        risk_level = RiskLevel.from_score(summary['max_risk'])
+        
+        # Kolone interakcija se računaju tek kada ih neko pročita (npr. UI detalji)
+        pairs = summary['pairs']
+        interactions = LazyInteractionColumns(
+            lambda: model.interaction_columns(drug_ids, pairs),
+            count=summary['interaction_count']
+        )
         
         # Kreiraj RiskAssessment
         assessment = RiskAssessment(
             therapy=therapy,
-            total_score=risk_report['total_risk_score'],
+            total_score=summary['total_risk_score'],
             risk_level=risk_level,
-            interactions_found=risk_report['all_interactions']
+            interactions_found=interactions,
+            summary=summary,
+            dataset_version=summary['dataset_version'],
+            findings=self.detect_category_stacking(model, drug_ids)
         )
         
         return assessment
     
+    def detect_category_stacking(self, model: ScoringModel, drug_ids: List[str]) -> List[Dict[str, Any]]:
+        """Nalazi gomilanja kategorija (3+ lijeka iste farmakodinamske kategorije) za RiskAssessment"""
+        stacking = model.detect_category_stacking(
+            drug_ids,
+            min_drugs=self.stacking_min_drugs,
+            categories=self.STACKING_CATEGORIES
+        )
+        return [
+            {
+                'type': 'CATEGORY_STACKING',
+                **finding,
+                'message': (f"Lijekova u {finding['category']} interakcijama: {finding['drug_count']} "
+                            f"- moguć kumulativni efekat")
+            }
+            for finding in stacking
+        ]
+    
+    def _get_summary(self, model: ScoringModel, therapy: Therapy, drug_ids: List[str]) -> Dict[str, Any]:
+        """Sažetak iz keša po skupu lijekova, inkrementalno ili punim proračunom"""
+        version = model.dataset_version
+        # Duplikati lijekova nemaju jednoznačno preslikavanje pozicija - ne keširaju se
+        cacheable = self.cache is not None and len(set(drug_ids)) == len(drug_ids)
+        
+        if cacheable:
+            summary = self.cache.get(drug_ids, version)
+            if summary is not None:
+                return summary
+        
+        if self.incremental and therapy.id is not None:
+            summary = self._incremental_summary(model, therapy.id, drug_ids)
+        else:
+            summary = model.calculate_therapy_summary(drug_ids)
+        
+        if cacheable:
+            self.cache.put(drug_ids, summary['dataset_version'], summary)
+        return summary
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Brojači keša (hits/misses/evictions) za status API"""
+        if self.cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.cache.stats()}
+    
+    def _incremental_summary(self, model: ScoringModel, therapy_id: int, drug_ids: List[str]) -> Dict[str, Any]:
+        """
+        Sažetak terapije uz ponovnu upotrebu doprinosa parova iz prethodne procjene.
+        Pri dodavanju/uklanjanju lijeka računaju se samo O(n) parova sa promijenjenim lijekom;
+        puni proračun se radi kad se promijeni verzija dataseta ili je promjena prevelika.
+        """
+        version = model.dataset_version
+        
+        with self._incremental_lock:
+            state = self._incremental_states.get(therapy_id)
+            
+            # Duplikati lijekova nemaju jednoznačan ključ para - uvijek puni proračun
+            if len(set(drug_ids)) != len(drug_ids):
+                self._incremental_states.pop(therapy_id, None)
+                self.incremental_stats['full'] += 1
+                return model.calculate_therapy_summary(drug_ids)
+            
+            if state is not None and state.dataset_version == version:
+                self._incremental_states.move_to_end(therapy_id)
+                current = set(drug_ids)
+                previous = set(state.drug_ids)
+                added = [drug_id for drug_id in drug_ids if drug_id not in previous]
+                removed = previous - current
+                changed = len(added) + len(removed)
+                
+                if changed <= self.MAX_DELTA_FRACTION * len(drug_ids):
+                    for drug_id in removed:
+                        state.remove_drug(drug_id)
+                    self._add_pairs(model, state, drug_ids, added)
+                    state.drug_ids = list(drug_ids)
+                    self.incremental_stats['delta' if changed else 'unchanged'] += 1
+                    return self._summary_from_state(state, drug_ids)
+            
+            # Puni proračun: svi parovi, stanje se gradi iznova
+            state = _IncrementalState(version)
+            self._add_pairs(model, state, drug_ids, drug_ids)
+            state.drug_ids = list(drug_ids)
+            self._incremental_states[therapy_id] = state
+            self._incremental_states.move_to_end(therapy_id)
+            while len(self._incremental_states) > self.incremental_states_size:
+                self._incremental_states.popitem(last=False)
+                self.incremental_stats['evictions'] += 1
+            self.incremental_stats['full'] += 1
+            return self._summary_from_state(state, drug_ids)
+    
+    def _add_pairs(self, model: ScoringModel, state: _IncrementalState, drug_ids: List[str], added: List[str]):
+        """Izračunaj i dodaj u stanje parove (dodani lijek, bilo koji lijek terapije)"""
+        if not added:
+            return
+        
+        position = {drug_id: i for i, drug_id in enumerate(drug_ids)}
+        added_positions = np.array(sorted(position[drug_id] for drug_id in added), dtype=np.int64)
+        is_added = np.zeros(len(drug_ids), dtype=bool)
+        is_added[added_positions] = True
+        
+        # Par između dva dodana lijeka računa se samo jednom (lijevi < desni)
+        others = np.arange(len(drug_ids), dtype=np.int64)
+        left = np.repeat(added_positions, len(drug_ids))
+        right = np.tile(others, len(added_positions))
+        keep = (left != right) & (~is_added[right] | (left < right))
+        left, right = left[keep], right[keep]
+        
+        for i, j, *row in model.summarize_pairs(drug_ids, left, right):
+            key = tuple(sorted((drug_ids[i], drug_ids[j])))
+            state.add_pair(key, tuple(row))
+    
+    def _summary_from_state(self, state: _IncrementalState, drug_ids: List[str]) -> Dict[str, Any]:
+        """Sažetak u istom obliku kao ScoringModel.calculate_therapy_summary"""
+        position = {drug_id: i for i, drug_id in enumerate(drug_ids)}
+        ordered = sorted(
+            (tuple(sorted((position[key[0]], position[key[1]]))), key)
+            for key in state.contributions
+        )
+        
+        # Kategorije sortirane po imenu (kao u punom proračunu)
+        category_names = sorted(c for c, count in state.category_counts.items() if count > 0)
+        
+        interaction_count = state.interaction_count
+        return {
+            'drug_count': len(drug_ids),
+            'interaction_count': interaction_count,
+            'total_risk_score': state.total_risk_score,
+            'average_risk': state.total_risk_score / interaction_count if interaction_count else 0,
+            'max_risk': max(state.max_counts) if state.max_counts else 0,
+            'critical_count': state.critical_count,
+            'severe_count': state.severe_count,
+            'high_risk_count': state.high_risk_count,
+            'categories': category_names,
+            'pairs': [pair for pair, _ in ordered],
+            'dataset_version': state.dataset_version
+        }
+    
+    def forget_therapy(self, therapy_id: int):
+        """Ukloni sačuvano inkrementalno stanje terapije"""
+        with self._incremental_lock:
+            self._incremental_states.pop(therapy_id, None)
+    
+    def get_drug_lookup(self) -> Dict[str, str]:
+        """drug_lookup.json iz foldera u kojem je CSV modela (učitava se jednom)"""
+        if self._drug_lookup is None:
+            data_dir = os.path.dirname(os.path.abspath(self.scoring_model.data_path))
+            self._drug_lookup = FileDataLoader(data_dir).load_drug_lookup()
+        return self._drug_lookup
+    
+    def suggest_alternatives(self, therapy: Therapy, drug_id: str,
+                             candidates: Optional[List[str]] = None, limit: int = 5) -> Dict[str, Any]:
+        """
+        Rangiraj zamjene za `drug_id` po riziku koji bi dodale ostatku terapije.
+        Kandidati su svi lijekovi iz drug_lookup.json (ili zadana lista, npr. iz iste terapijske grupe);
+        isključeni su lijekovi koji su već u terapiji. Rangiranje: dodani ukupni score, pa maksimalni score.
+        """
+        model = self.scoring_model
+        rest = [other for other in therapy.get_drug_ids() if other != drug_id]
+        drug_names = self.get_drug_lookup()
+        
+        in_therapy = set(rest) | {drug_id}
+        candidate_ids = [c for c in (candidates if candidates is not None else drug_names) if c not in in_therapy]
+        
+        current = model.score_candidates(rest, [drug_id])
+        scores = model.score_candidates(rest, candidate_ids)
+        order = np.lexsort((scores['count'], scores['max'], scores['total']))[:limit]
+        
+        def describe(index: int, result: Dict[str, np.ndarray], candidate: str) -> Dict[str, Any]:
+            return {
+                'drug_id': candidate,
+                'name': drug_names.get(candidate, "Unknown"),
+                'added_score': float(result['total'][index]),
+                'max_score': float(result['max'][index]),
+                'interaction_count': int(result['count'][index]),
+                'critical_count': int(result['critical'][index]),
+                'has_interaction_data': bool(result['known'][index])
+            }
+        
+        return {
+            'drug_id': drug_id,
+            'current': describe(0, current, drug_id),
+            'alternatives': [describe(index, scores, candidate_ids[index]) for index in order.tolist()],
+            'candidates_evaluated': len(candidate_ids),
+            'dataset_version': model.dataset_version
+        }
+    
     def get_detailed_interaction_report(self, therapy: Therapy) -> Dict[str, Any]:
         """Vrati detaljan izvještaj o interakcijama"""
         drug_ids = therapy.get_drug_ids()
@@ -3,10 +3,10 @@ DOMAIN: Entiteti za DDI agenta
 """
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Callable
 from .enums import RiskLevel, ActionType, InteractionStatus
 
-@dataclass
+@dataclass(slots=True)
 class Drug:
     """Lijek u terapiji"""
     drug_id: str
@@ -17,9 +17,9 @@ class Drug:
     def __str__(self):
         return f"{self.name} ({self.drug_id})"
 
-@dataclass
+@dataclass(slots=True)
 class DrugInteraction:
-    """Interakcija između dva lijeka"""
+    """Interakcija između dva lijeka (slots: bez __dict__ po instanci)"""
     drug1_id: str
     drug2_id: str
     interaction_type: str
@@ -115,51 +115,160 @@ class RiskAssessment:
     therapy: Therapy
     total_score: float
     risk_level: RiskLevel
-    interactions_found: List[DrugInteraction]
+    # Lista ili InteractionColumns iz ScoringModel-a (objekti se kreiraju pri čitanju)
+    interactions_found: Sequence[DrugInteraction]
     
     # OPCIONALNI
     timestamp: datetime = field(default_factory=datetime.now)
+    # Sažetak iz ScoringModel.calculate_therapy_summary - brojači bez materijalizacije interakcija
+    summary: Optional[Dict[str, Any]] = None
+    # Verzija DDI dataseta (hash CSV-a) sa kojom je procjena izračunata
+    dataset_version: Optional[str] = None
+    # Dodatni strukturirani nalazi (npr. gomilanje kategorija kroz 3+ lijeka)
+    findings: List[Dict[str, Any]] = field(default_factory=list)
     
     def to_dict(self) -> Dict[str, Any]:
         """Konvertuj u dictionary za serijalizaciju"""
         return {
             'total_score': self.total_score,
+            'dataset_version': self.dataset_version,
             'risk_level': self.risk_level.value,
-            'interaction_count': len(self.interactions_found),
+            'interaction_count': self.interaction_count,
             'timestamp': self.timestamp.isoformat(),
-            'critical_count': len([i for i in self.interactions_found if i.is_critical]),
-            'high_risk_count': len([i for i in self.interactions_found if i.is_high_risk]),
-            'interactions': [
-                {
-                    'drug1_id': inter.drug1_id,
-                    'drug2_id': inter.drug2_id,
-                    'type': inter.interaction_type,
-                    'score': inter.risk_score,
-                    'category': inter.risk_category,
-                    'is_critical': inter.is_critical
-                }
-                for inter in self.interactions_found[:10]  # Prvih 10
-            ]
+            'critical_count': self.critical_count,
+            'high_risk_count': self.high_risk_count,
+            'findings': self.findings,
+            'interactions': self._interaction_records(10)  # Prvih 10
         }
     
+    def _interaction_records(self, limit: int) -> List[Dict[str, Any]]:
+        """Zapisi interakcija; kolonski rezultat ih gradi direktno iz nizova"""
+        if hasattr(self.interactions_found, 'to_records'):
+            return self.interactions_found.to_records(limit)
+        return [
+            {
+                'drug1_id': inter.drug1_id,
+                'drug2_id': inter.drug2_id,
+                'type': inter.interaction_type,
+                'score': inter.risk_score,
+                'category': inter.risk_category,
+                'is_critical': inter.is_critical
+            }
+            for inter in self.interactions_found[:limit]
+        ]
+    
     @property
     def has_critical_interactions(self) -> bool:
+        if self.summary is not None:
+            return self.summary['critical_count'] > 0
         return any(inter.is_critical for inter in self.interactions_found)
     
     @property
     def critical_count(self) -> int:
         """Broj kritičnih interakcija"""
+        if self.summary is not None:
+            return self.summary['critical_count']
         return len([i for i in self.interactions_found if i.is_critical])
     
     @property
     def high_risk_count(self) -> int:
         """Broj visoko rizičnih interakcija"""
+        if self.summary is not None:
+            return self.summary['high_risk_count']
         return len([i for i in self.interactions_found if i.is_high_risk])
     
     @property
     def interaction_count(self) -> int:
         """Ukupan broj interakcija"""
         return len(self.interactions_found)
+    
+    @property
+    def is_report_ready(self) -> bool:
+        """Da li je puni izvještaj (score, brojači, interakcije) izračunat"""
+        return True
+
+class DeferredRiskAssessment(RiskAssessment):
+    """
+    Procjena iz early-exit skeniranja: poznat je samo prvi pronađeni kritični par, što je dovoljno
+    za odluku ESCALATE. Puni izvještaj se računa tek kada se pročita neko od njegovih polja
+    (npr. kada UI prikazuje detalje) i zatim se čuva.
+    """
+    
+    def __init__(self, therapy: Therapy, critical_interaction: Dict[str, Any],
+                 report_loader: Callable[[], RiskAssessment], dataset_version: Optional[str] = None):
+        self.therapy = therapy
+        self.critical_interaction = critical_interaction
+        self.timestamp = datetime.now()
+        self.dataset_version = dataset_version
+        self._report_loader = report_loader
+        self._report: Optional[RiskAssessment] = None
+    
+    def load_report(self) -> RiskAssessment:
+        """Izračunaj (jednom) i vrati puni izvještaj"""
+        if self._report is None:
+            self._report = self._report_loader()
+            self._report_loader = None
+        return self._report
+    
+    @property
+    def is_report_ready(self) -> bool:
+        return self._report is not None
+
+    # __eq__ i __repr__ naslijeđeni iz dataclass-a čitaju sva polja, pa bi pokrenuli puni izvještaj
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DeferredRiskAssessment):
+            return NotImplemented
+        return (self.therapy == other.therapy
+                and self.critical_interaction == other.critical_interaction
+                and self.dataset_version == other.dataset_version
+                and self.timestamp == other.timestamp)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (f"DeferredRiskAssessment(patient_id={self.therapy.patient_id!r}, "
+                f"critical_interaction={self.critical_interaction!r}, "
+                f"dataset_version={self.dataset_version!r}, report_ready={self.is_report_ready})")
+
+    # Kritični par je pronađen, pa su nivo rizika i odluka poznati bez punog izvještaja
+    @property
+    def risk_level(self) -> RiskLevel:
+        return RiskLevel.CRITICAL
+    
+    @property
+    def has_critical_interactions(self) -> bool:
+        return True
+    
+    @property
+    def total_score(self) -> float:
+        return self.load_report().total_score
+    
+    @property
+    def interactions_found(self) -> List[DrugInteraction]:
+        return self.load_report().interactions_found
+    
+    @property
+    def summary(self) -> Optional[Dict[str, Any]]:
+        return self.load_report().summary
+    
+    @property
+    def findings(self) -> List[Dict[str, Any]]:
+        return self.load_report().findings
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Bez punog izvještaja vraća samo odluku i kritični par (ne pokreće proračun)"""
+        if self.is_report_ready:
+            data = self._report.to_dict()
+        else:
+            data = {
+                'dataset_version': self.dataset_version,
+                'risk_level': self.risk_level.value,
+                'timestamp': self.timestamp.isoformat()
+            }
+        data['early_exit'] = True
+        data['report_ready'] = self.is_report_ready
+        data['critical_interaction'] = self.critical_interaction
+        return data
 
 @dataclass
 class Warning:
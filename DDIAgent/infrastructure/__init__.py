@@ -1,7 +1,7 @@
 """
 INFRASTRUKTURA package
 """
-from .database import Database, TherapyDB, WarningDB
+from .database import Database, TherapyDB, WarningDB, get_database
 from .therapy_repository import TherapyRepository  
 
-__all__ = ['Database', 'TherapyDB', 'WarningDB', 'TherapyRepository']
\ No newline at end of file
+__all__ = ['Database', 'TherapyDB', 'WarningDB', 'TherapyRepository', 'get_database']
\ No newline at end of file
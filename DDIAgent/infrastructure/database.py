@@ -1,12 +1,15 @@
 """
 INFRASTRUKTURA: Database setup za DDI agenta
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, Text, Boolean
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Float, DateTime, JSON, Text, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql import func
 import os
+import threading
 from datetime import datetime
+from typing import Any, Dict, Optional
 
 Base = declarative_base()
 
@@ -199,19 +202,41 @@ class AgentLearningDB(Base):
         }
 
 class Database:
-    def __init__(self, db_path: str = "data/ddi_agent.db"):
-        """Inicijalizuj SQLite bazu sa poboljšanim podešavanjima"""
+    # PRAGMA podešavanja svake nove konekcije (agent nit i Flask request niti pišu u isti fajl)
+    DEFAULT_PRAGMAS = {
+        'journal_mode': 'WAL',      # čitaoci ne čekaju pisca (i obrnuto)
+        'synchronous': 'NORMAL',    # u WAL režimu siguran, fsync samo pri checkpoint-u
+        'busy_timeout': 5000,       # ms čekanja na zaključan fajl umjesto "database is locked"
+        'mmap_size': 268435456,     # 256 MB memorijski mapiranog čitanja
+        # cache_size ostaje SQLite podrazumijevani (2 MB): stranice se već čitaju kroz mmap, a veći
+        # page cache po konekciji nije ubrzao čitanja (scripts/benchmark_database.py); može se zadati kroz pragmas
+    }
+    
+    def __init__(self, db_path: str = "data/ddi_agent.db", pragmas: Optional[Dict[str, Any]] = None,
+                 pool_size: int = 5, max_overflow: int = 10):
+        """
+        Inicijalizuj SQLite bazu sa poboljšanim podešavanjima.
+        pragmas: izmjene DEFAULT_PRAGMAS (vrijednost None izostavlja PRAGMA)
+        pool_size/max_overflow: QueuePool - konekcije (i njihov page cache) se ponovo koriste između requesta
+        """
         try:
             # Kreiraj folder ako ne postoji
             os.makedirs(os.path.dirname(db_path), exist_ok=True)
             
+            self.pragmas = {**self.DEFAULT_PRAGMAS, **(pragmas or {})}
+            self.pragmas = {name: value for name, value in self.pragmas.items() if value is not None}
+            
             # Kreiraj engine sa boljim podešavanjima
             self.engine = create_engine(
                 f"sqlite:///{db_path}",
                 echo=False,  # Ne prikazuj SQL u konzoli osim za debugging
                 connect_args={"check_same_thread": False},  # Važno za threading
+                poolclass=QueuePool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
                 pool_pre_ping=True  # Provjeri konekciju prije korištenja
             )
+            event.listen(self.engine, "connect", self._apply_pragmas)
             
             # Kreiraj tabele
             Base.metadata.create_all(self.engine, checkfirst=True)
@@ -234,6 +259,20 @@ class Database:
             print(f"❌ Greška pri inicijalizaciji baze: {e}")
             raise
     
+    def _apply_pragmas(self, dbapi_connection, connection_record):
+        """Postavi PRAGMA-e na novoj sqlite3 konekciji (prije nego je pool preda sesiji)"""
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    
+    def pragma_status(self) -> Dict[str, Any]:
+        """Stvarne vrijednosti podešenih PRAGMA-i na jednoj konekciji iz pool-a"""
+        with self.engine.connect() as connection:
+            return {name: connection.execute(text(f"PRAGMA {name}")).scalar() for name in self.pragmas}
+    
     def _initialize_agent_learning(self):
         """Kreiraj početni agent learning record ako ne postoji"""
         with self.get_session() as session:
@@ -340,4 +379,26 @@ class Database:
             
         except Exception as e:
             print(f"❌ Greška pri backup-u: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+# Registar baza po procesu: jedan engine (pool konekcija), create_all i agent_learning provjera po fajlu
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path: str = "data/ddi_agent.db", **settings) -> Database:
+    """
+    Vrati dijeljenu Database instancu za db_path (kreira se pri prvom pozivu u procesu).
+    Ključ je apsolutna putanja, pa runner i web sloj dijele isti engine i za relativne putanje.
+    settings (pragmas, pool_size, max_overflow) važe samo za prvi poziv koji kreira instancu.
+    """
+    key = os.path.abspath(db_path)
+    database = _databases.get(key)
+    if database is None:
+        with _databases_lock:
+            database = _databases.get(key)
+            if database is None:
+                database = Database(key, **settings)
+                _databases[key] = database
+    return database
@@ -4,13 +4,18 @@ INFRASTRUKTURA: Čitanje podataka iz fajlova
 import pandas as pd
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence
 import os
 
+from DDIAgent.ml.columnar_cache import load_columns
+
 class FileDataLoader:
     """Učitava podatke iz CSV i JSON fajlova"""
     
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, write_columns_cache: bool = False):
+        # Kolonski keš (.ddicols) se pored CSV-a piše samo na zahtjev; postojeći važeći keš se uvijek čita
+        self.write_columns_cache = write_columns_cache
+        
         # Ako nije specificirano, koristi default relativnu putanju
         if data_dir is None:
             # Uzmi base dir projekta
@@ -19,13 +24,17 @@ class FileDataLoader:
         else:
             self.data_dir = Path(data_dir)
         
-    def load_interactions(self) -> pd.DataFrame:
-        """Učitaj interakcije sa score-ovima"""
+    def load_interactions(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Učitaj interakcije sa score-ovima.
+        Čita iz kolonskog keša pored CSV-a ako je važeći (samo tražene kolone, tekst kao `category` dtype),
+        inače iz CSV-a; keš se gradi samo kada je write_columns_cache uključen.
+        """
         file_path = self.data_dir / "DDI_with_scores.csv"
         if not file_path.exists():
             raise FileNotFoundError(f"Interactions file not found: {file_path}")
         
-        df = pd.read_csv(file_path)
+        df, _ = load_columns(str(file_path), columns, write_cache=self.write_columns_cache)
         print(f"✅ Učitano {len(df)} interakcija")
         return df
     
@@ -3,7 +3,7 @@ INFRASTRUKTURA: Repository za Therapy entitete
 """
 import sys
 import os
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
 from sqlalchemy.orm import Session
 from datetime import datetime
 
@@ -24,11 +24,29 @@ except ImportError:
 
 import json
 
+if TYPE_CHECKING:
+    from DDIAgent.ml.drug_profiles import DrugProfiles
+
 class TherapyRepository:
     """Repository za upravljanje Therapy entitetima u bazi"""
     
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, drug_profiles: Optional['DrugProfiles'] = None,
+                 profiles_provider: Optional[Callable[[], Optional['DrugProfiles']]] = None):
+        """
+        drug_profiles: unaprijed izračunati profili rizika; učitani lijekovi dobijaju
+        Drug.risk_profile jednim lookup-om po ID-u (profil se ne čuva u terapiji jer se izvodi iz dataseta)
+        profiles_provider: vraća trenutne profile (npr. profile aktivnog modela nakon hot reload-a);
+        ima prednost nad drug_profiles
+        """
         self.db = database
+        self._drug_profiles = drug_profiles
+        self._profiles_provider = profiles_provider
+    
+    @property
+    def drug_profiles(self) -> Optional['DrugProfiles']:
+        if self._profiles_provider is not None:
+            return self._profiles_provider()
+        return self._drug_profiles
     
     def save(self, therapy: Therapy) -> Therapy:
         """Sačuvaj Therapy u bazu"""
@@ -129,7 +147,7 @@ class TherapyRepository:
                 'drug_id': drug.drug_id,
                 'name': drug.name,
                 'dosage': drug.dosage,
-                'risk_profile': drug.risk_profile
+                'risk_profile': drug.risk_profile if self.drug_profiles is None else None
             }
             for drug in drugs
         ]
@@ -152,7 +170,7 @@ class TherapyRepository:
     
     def _deserialize_drugs(self, drugs_data: List[dict]) -> List[Drug]:
         """Deserializuj JSON u listu Drug entiteta"""
-        return [
+        drugs = [
             Drug(
                 drug_id=drug_dict['drug_id'],
                 name=drug_dict['name'],
@@ -161,6 +179,10 @@ class TherapyRepository:
             )
             for drug_dict in drugs_data
         ]
+        drug_profiles = self.drug_profiles
+        if drug_profiles is not None:
+            drug_profiles.attach(drugs)
+        return drugs
     
     def add_feedback_to_therapy(self, therapy_id: int, feedback_data: dict) -> bool:
         """Dodaj feedback u historiju terapije"""
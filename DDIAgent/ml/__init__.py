@@ -1,3 +1,4 @@
 from .scoring_model import ScoringModel
+from .interaction_store import InteractionStore
 
-__all__ = ['ScoringModel']
\ No newline at end of file
+__all__ = ['ScoringModel', 'InteractionStore']
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+ML: Kolonski keš DDI_with_scores.csv (vlastiti binarni format, lijeno učitavanje kolona)
+
+Struktura fajla:
+    MAGIC (8 bajtova) | dužina headera (uint32, little-endian) | JSON header | blokovi kolona
+Tekstualne kolone se čuvaju kao kategorije: cjelobrojni kodovi (najmanji dovoljan tip) + JSON lista
+kategorija; numeričke kolone kao niz vrijednosti. Čitaju se samo blokovi traženih kolona, a tekstualne
+kolone se vraćaju kao pandas `category` dtype.
+"""
+import json
+import os
+import struct
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .interaction_pack import file_sha256
+from .interaction_store import _smallest_code_dtype
+
+MAGIC = b"DDICOLS\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+COLUMNS_SUFFIX = ".ddicols"
+
+# Kolone koje ScoringModel koristi za izgradnju indeksa (imena lijekova nisu potrebna)
+MODEL_COLUMNS = ('drug1_id', 'drug2_id', 'interaction_type', 'risk_score', 'risk_category')
+
+# Kolone kada se score i kategorija računaju iz scoring_config.json (dovoljan je i očišćeni CSV)
+RAW_COLUMNS = ('drug1_id', 'drug2_id', 'interaction_type')
+
+
+def default_columns_path(csv_path: str) -> str:
+    """Kolonski keš se čuva pored CSV-a (DDI_with_scores.csv -> DDI_with_scores.ddicols)"""
+    return os.path.splitext(csv_path)[0] + COLUMNS_SUFFIX
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _encode_columns(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Pretvori kolone u blokove bajtova (kodovi + kategorije ili numeričke vrijednosti)"""
+    encoded = {}
+    for name in df.columns:
+        column = df[name]
+        if pd.api.types.is_numeric_dtype(column) and not isinstance(column.dtype, pd.CategoricalDtype):
+            encoded[name] = {'kind': 'numeric', 'values': np.ascontiguousarray(column.to_numpy())}
+            continue
+
+        codes, categories = pd.factorize(column, sort=True)
+        encoded[name] = {
+            'kind': 'categorical',
+            'codes': codes.astype(_smallest_code_dtype(len(categories))),
+            'categories': json.dumps([str(c) for c in categories], ensure_ascii=False).encode('utf-8')
+        }
+    return encoded
+
+
+def write_columns(df: pd.DataFrame, columns_path: str, source_sha256: str) -> Dict[str, Any]:
+    """Zapiši DataFrame u kolonski keš (atomično: privremeni fajl + os.replace)"""
+    encoded = _encode_columns(df)
+    header = {
+        'format_version': FORMAT_VERSION,
+        'source_sha256': source_sha256,
+        'row_count': len(df),
+        'columns': {}
+    }
+
+    # Raspored blokova (offseti relativni na početak podatkovnog dijela)
+    blocks = []
+    offset = 0
+    for name, column in encoded.items():
+        spec = {'kind': column['kind']}
+        for part in ('values', 'codes', 'categories'):
+            if part not in column:
+                continue
+            data = column[part]
+            offset = _align(offset)
+            if isinstance(data, bytes):
+                spec[part] = {'offset': offset, 'nbytes': len(data)}
+            else:
+                spec[part] = {'offset': offset, 'nbytes': int(data.nbytes), 'dtype': data.dtype.str}
+                data = data.tobytes()
+            blocks.append((offset, data))
+            offset += len(data)
+        header['columns'][name] = spec
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    tmp_path = f"{columns_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for block_offset, data in blocks:
+            f.seek(data_start + block_offset)
+            f.write(data)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, columns_path)
+
+    return header
+
+
+def read_columns_header(columns_path: str) -> Optional[Dict[str, Any]]:
+    """Pročitaj header kolonskog keša ili vrati None ako fajl ne postoji / nije validan"""
+    try:
+        with open(columns_path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_length,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_length).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if header.get('format_version') != FORMAT_VERSION:
+        return None
+    header['data_start'] = _align(len(MAGIC) + 4 + header_length)
+    return header
+
+
+def read_columns(columns_path: str, columns: Optional[Sequence[str]] = None,
+                 header: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Učitaj samo tražene kolone (tekstualne kao `category` dtype)"""
+    header = header or read_columns_header(columns_path)
+    if header is None:
+        raise ValueError(f"Nevalidan ili zastario kolonski keš: {columns_path}")
+
+    columns = list(columns) if columns is not None else list(header['columns'])
+    missing = [name for name in columns if name not in header['columns']]
+    if missing:
+        raise KeyError(f"Kolone ne postoje u kešu: {', '.join(missing)}")
+
+    data_start = header['data_start']
+    result = {}
+    with open(columns_path, 'rb') as f:
+        def read_block(block) -> bytes:
+            f.seek(data_start + block['offset'])
+            return f.read(block['nbytes'])
+
+        for name in columns:
+            spec = header['columns'][name]
+            if spec['kind'] == 'numeric':
+                block = spec['values']
+                result[name] = np.frombuffer(read_block(block), dtype=np.dtype(block['dtype']))
+                continue
+
+            block = spec['codes']
+            codes = np.frombuffer(read_block(block), dtype=np.dtype(block['dtype']))
+            categories = json.loads(read_block(spec['categories']).decode('utf-8'))
+            result[name] = pd.Categorical.from_codes(codes, categories=categories, validate=False)
+
+    return pd.DataFrame(result, index=pd.RangeIndex(header['row_count']))
+
+
+def _csv_columns(df: pd.DataFrame, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    """Tražene kolone parsiranog CSV-a sa tekstom kao `category` dtype (isti oblik kao iz keša)"""
+    df = df[list(columns)] if columns is not None else df
+    object_columns = df.select_dtypes(include='object').columns
+    return df.astype({name: 'category' for name in object_columns})
+
+
+def load_columns(csv_path: str, columns: Optional[Sequence[str]] = None,
+                 columns_path: Optional[str] = None, write_cache: bool = True) -> Tuple[pd.DataFrame, str]:
+    """
+    Učitaj kolone iz keša ako odgovara hash-u CSV-a, inače parsiraj CSV i ponovo izgradi keš.
+    Sa write_cache=False zastario ili nepostojeći keš se ne piše, nego se kolone čitaju iz CSV-a.
+    Vraća (DataFrame sa traženim kolonama, sha256 izvora).
+    """
+    columns_path = columns_path or default_columns_path(csv_path)
+    header = read_columns_header(columns_path)
+
+    if not os.path.exists(csv_path):
+        if header is None:
+            raise FileNotFoundError(f"Nema ni CSV-a ni kolonskog keša: {csv_path}")
+        print(f"⚠️ CSV ne postoji, koristim postojeći kolonski keš: {columns_path}")
+        return read_columns(columns_path, columns, header), header['source_sha256']
+
+    source_sha256 = file_sha256(csv_path)
+    if header is not None and header.get('source_sha256') == source_sha256:
+        return read_columns(columns_path, columns, header), source_sha256
+
+    if not write_cache:
+        df = pd.read_csv(csv_path, usecols=list(columns) if columns is not None else None)
+        return _csv_columns(df, columns), source_sha256
+
+    print(f"🔄 Kolonski keš zastario ili ne postoji, gradim: {columns_path}")
+    df = pd.read_csv(csv_path)
+    try:
+        write_columns(df, columns_path, source_sha256)
+    except OSError as e:
+        print(f"⚠️ Ne mogu zapisati kolonski keš ({e}), koristim CSV")
+        return _csv_columns(df, columns), source_sha256
+
+    return read_columns(columns_path, columns), source_sha256
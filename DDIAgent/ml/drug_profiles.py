@@ -0,0 +1,175 @@
+"""
+ML: Unaprijed izračunati profili rizika po lijeku (perzistentni artefakt)
+
+Za svaki lijek: broj interakcija, broj partnera (stepen), prosječni i najveći score,
+histogram kategorija i broj partnera sa bar jednom kritičnom interakcijom.
+Računa se vektorizovano iz InteractionStore-a i čuva kao JSON pored CSV-a
+(DDI_with_scores.csv -> DDI_with_scores.profiles.json) sa SHA-256 izvora, pa se ponovo
+gradi samo kada se CSV promijeni. Pretraga profila je jedan dict lookup.
+"""
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .interaction_store import InteractionStore
+from .interaction_pack import file_sha256, load_or_build
+
+FORMAT_VERSION = 1
+PROFILES_SUFFIX = ".profiles.json"
+
+
+def default_profiles_path(csv_path: str) -> str:
+    """Profili se čuvaju pored CSV-a"""
+    return os.path.splitext(csv_path)[0] + PROFILES_SUFFIX
+
+
+def compute_drug_profiles(store: InteractionStore) -> Dict[str, Dict[str, Any]]:
+    """
+    Vektorizovano iz tabele sažetaka parova: svaka interakcija se broji za oba lijeka
+    (np.bincount po kodu lijeka), histogram kategorija je bincount po (lijek, kategorija).
+    """
+    n = store.drug_count
+    if n == 0:
+        return {}
+
+    low = store.pair_low.astype(np.int64)
+    high = store.pair_high.astype(np.int64)
+
+    def per_drug(weights):
+        return np.bincount(low, weights=weights, minlength=n) + np.bincount(high, weights=weights, minlength=n)
+
+    pair_count = store.pair_interaction_count.astype(np.int64)
+    interaction_count = per_drug(pair_count).astype(np.int64)
+    total_score = per_drug(store.pair_sum)
+
+    pair_max = store.score_values[store.pair_max_code] if len(low) else np.zeros(0)
+    max_score = np.zeros(n, dtype=np.float64)
+    np.maximum.at(max_score, low, pair_max)
+    np.maximum.at(max_score, high, pair_max)
+
+    # Partneri su dužina CSR reda (pair_low < pair_high, pa je svaki partner jedan par)
+    partner_count = np.diff(store.indptr.astype(np.int64))
+    critical_partner_count = per_drug(store.pair_critical > 0).astype(np.int64)
+
+    # Histogram kategorija: par svake interakcije -> oba lijeka para
+    category_count = len(store.category_names)
+    interaction_pair = np.repeat(np.arange(len(low), dtype=np.int64), pair_count)
+    category = store.inter_category.astype(np.int64)
+    histogram = (np.bincount(low[interaction_pair] * category_count + category, minlength=n * category_count)
+                 + np.bincount(high[interaction_pair] * category_count + category, minlength=n * category_count))
+    histogram = histogram.reshape(n, category_count)
+
+    mean_score = np.divide(total_score, interaction_count,
+                           out=np.zeros(n, dtype=np.float64), where=interaction_count > 0)
+
+    profiles = {}
+    for code, drug_id in enumerate(store.drug_ids):
+        row = histogram[code]
+        profiles[drug_id] = {
+            'interaction_count': int(interaction_count[code]),
+            'partner_count': int(partner_count[code]),
+            'mean_score': round(float(mean_score[code]), 4),
+            'max_score': float(max_score[code]),
+            'critical_partner_count': int(critical_partner_count[code]),
+            'categories': {
+                store.category_names[bit]: int(row[bit]) for bit in np.flatnonzero(row).tolist()
+            }
+        }
+    return profiles
+
+
+class DrugProfiles:
+    """Profili rizika po ID-u lijeka (O(1) lookup)"""
+
+    def __init__(self, profiles: Dict[str, Dict[str, Any]], source_sha256: Optional[str] = None):
+        self.profiles = profiles
+        self.source_sha256 = source_sha256
+        self.dataset_version = source_sha256[:16] if source_sha256 else None
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def get(self, drug_id: str) -> Optional[Dict[str, Any]]:
+        return self.profiles.get(drug_id)
+
+    def attach(self, drugs: Iterable) -> None:
+        """Postavi Drug.risk_profile za listu Drug entiteta (lijekovi bez interakcija dobijaju None)"""
+        for drug in drugs:
+            drug.risk_profile = self.profiles.get(drug.drug_id)
+
+
+def write_profiles(profiles: Dict[str, Dict[str, Any]], profiles_path: str, source_sha256: str):
+    """Zapiši profile (atomično: privremeni fajl + os.replace)"""
+    document = {
+        'format_version': FORMAT_VERSION,
+        'source_sha256': source_sha256,
+        'drug_count': len(profiles),
+        'profiles': profiles
+    }
+    tmp_path = f"{profiles_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False)
+    os.replace(tmp_path, profiles_path)
+
+
+def read_profiles(profiles_path: str) -> Optional[DrugProfiles]:
+    """Pročitaj profile ili vrati None ako fajl ne postoji / nije validan"""
+    try:
+        with open(profiles_path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if document.get('format_version') != FORMAT_VERSION:
+        return None
+    return DrugProfiles(document.get('profiles', {}), document.get('source_sha256'))
+
+
+def load_or_build_profiles(csv_path: str, profiles_path: Optional[str] = None,
+                           store: Optional[InteractionStore] = None) -> DrugProfiles:
+    """
+    Učitaj profile ako odgovaraju hash-u CSV-a, inače ih izračunaj i zapiši.
+    `store` već učitanog modela izbjegava ponovno otvaranje pack-a.
+    """
+    profiles_path = profiles_path or default_profiles_path(csv_path)
+    profiles = read_profiles(profiles_path)
+
+    if not os.path.exists(csv_path):
+        if profiles is None:
+            raise FileNotFoundError(f"Nema ni CSV-a ni profila lijekova: {csv_path}")
+        print(f"⚠️ CSV ne postoji, koristim postojeće profile: {profiles_path}")
+        return profiles
+
+    source_sha256 = file_sha256(csv_path)
+    if profiles is not None and profiles.source_sha256 == source_sha256:
+        return profiles
+
+    print(f"🔄 Profili lijekova zastarjeli ili ne postoje, gradim: {profiles_path}")
+    if store is None:
+        store, source_sha256, _ = load_or_build(csv_path)
+
+    profiles = DrugProfiles(compute_drug_profiles(store), source_sha256)
+    try:
+        write_profiles(profiles.profiles, profiles_path, source_sha256)
+    except OSError as e:
+        print(f"⚠️ Ne mogu zapisati profile lijekova ({e}), koristim profile iz memorije")
+    return profiles
+
+
+def profiles_for_model(model) -> Optional[DrugProfiles]:
+    """
+    Profili koji odgovaraju učitanom ScoringModel-u (ista verzija dataseta), None ako nisu dostupni.
+    Kada model boduje iz pravila (scoring_config.json), profili na disku (vezani za hash CSV-a) ne važe,
+    pa se računaju iz store-a modela.
+    """
+    try:
+        if model.categorizer is not None and model.store is not None:
+            profiles = DrugProfiles(compute_drug_profiles(model.store))
+            profiles.dataset_version = model.dataset_version
+            return profiles
+        return load_or_build_profiles(model.data_path, store=model.store)
+    except Exception as e:
+        print(f"⚠️ Profili lijekova nisu dostupni: {e}")
+        return None
@@ -0,0 +1,220 @@
+"""
+ML: Gusta matrica rizika za bolnički formular (podskup lijekova koji se drže na stanju)
+
+Za formular od N lijekova čuva se jedna N x N matrica slotova (0 = par ne interaguje, inače
+1 + indeks para) i kompaktni nizovi sažetaka samo za parove koji interaguju (suma score-ova,
+kod najvećeg score-a, broj interakcija, kritične/ozbiljne/visoko rizične, bitmaska kategorija),
+pa se terapija iz formulara ocjenjuje NumPy fancy indeksiranjem (slot[np.ix_(idx, idx)]) bez
+traženja u rijetkom indeksu. Lijekovi van formulara se i dalje traže kroz rijetki indeks.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .interaction_store import InteractionStore, _smallest_code_dtype
+
+
+def _unsigned_dtype(max_value: int):
+    """Najmanji neoznačeni cjelobrojni tip za vrijednosti do `max_value`"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def _mask_dtype(category_count: int):
+    """Najmanji tip bitmaske za `category_count` kategorija"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if category_count <= np.iinfo(dtype).bits:
+            return dtype
+    return np.uint64
+
+
+def load_formulary(path: str) -> List[str]:
+    """
+    Učitaj listu lijekova formulara: JSON lista ID-jeva ili tekstualni fajl sa jednim ID-jem
+    po redu (prazni redovi i redovi koji počinju sa '#' se preskaču).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    if os.path.splitext(path)[1].lower() == '.json':
+        return [str(drug_id) for drug_id in json.loads(content)]
+
+    return [line.strip() for line in content.splitlines()
+            if line.strip() and not line.strip().startswith('#')]
+
+
+class FormularyMatrix:
+    """Gusta N x N matrica slotova i sažeci parova koji interaguju za lijekove formulara"""
+
+    def __init__(self, drug_ids: List[str], category_names: List[str], score_values: np.ndarray,
+                 rows: np.ndarray, cols: np.ndarray, pair_sum: np.ndarray, pair_max_code: np.ndarray,
+                 pair_count: np.ndarray, pair_critical: np.ndarray, pair_severe: np.ndarray,
+                 pair_high_risk: np.ndarray, pair_category_mask: np.ndarray):
+        """
+        rows/cols su pozicije u formularu za parove koji interaguju (svaki neuređeni par jednom),
+        a pair_* nizovi su sažeci tih parova; matrica slotova se popunjava simetrično.
+        """
+        self.drug_ids = list(drug_ids)
+        self.index = {drug_id: position for position, drug_id in enumerate(self.drug_ids)}
+        self.category_names = list(category_names)
+        self.score_values = np.asarray(score_values, dtype=np.float64)
+        self._mask_names: Dict[int, Tuple[str, ...]] = {}
+
+        # Sažeci po paru (samo parovi koji interaguju); suma ostaje float64 da bi ukupni
+        # score bio identičan rijetkom putu
+        count_dtype = _unsigned_dtype(int(pair_count.max()) if len(pair_count) else 0)
+        self.count = np.asarray(pair_count, dtype=count_dtype)
+        self.critical = np.asarray(pair_critical, dtype=count_dtype)
+        self.severe = np.asarray(pair_severe, dtype=count_dtype)
+        self.high_risk = np.asarray(pair_high_risk, dtype=count_dtype)
+        self.max_code = np.asarray(pair_max_code, dtype=_smallest_code_dtype(len(self.score_values)))
+        self.category_mask = np.asarray(pair_category_mask, dtype=_mask_dtype(len(self.category_names)))
+        self.total = np.asarray(pair_sum, dtype=np.float64)
+
+        n = len(self.drug_ids)
+        self.slot = np.zeros((n, n), dtype=_unsigned_dtype(len(self.count)))
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        slots = np.arange(1, len(self.count) + 1)
+        self.slot[rows, cols] = slots
+        self.slot[cols, rows] = slots
+
+    @staticmethod
+    def _unique_formulary(formulary: List[str]) -> List[str]:
+        return list(dict.fromkeys(str(drug_id) for drug_id in formulary))
+
+    @classmethod
+    def from_store(cls, store: InteractionStore, formulary: List[str]) -> 'FormularyMatrix':
+        """Matrice iz tabele sažetaka parova InteractionStore-a (bez prolaska kroz interakcije)"""
+        drug_ids = cls._unique_formulary(formulary)
+
+        # Pozicija u formularu po kodu store-a (-1 za lijekove van formulara)
+        position_of_code = np.full(store.drug_count, -1, dtype=np.int64)
+        codes = store.codes_of(drug_ids)
+        known = codes >= 0
+        position_of_code[codes[known]] = np.flatnonzero(known)
+
+        rows = position_of_code[store.pair_low] if store.pair_count else np.zeros(0, dtype=np.int64)
+        cols = position_of_code[store.pair_high] if store.pair_count else np.zeros(0, dtype=np.int64)
+        pairs = np.flatnonzero((rows >= 0) & (cols >= 0))
+
+        return cls(
+            drug_ids, store.category_names, store.score_values,
+            rows[pairs], cols[pairs],
+            pair_sum=store.pair_sum[pairs],
+            pair_max_code=store.pair_max_code[pairs],
+            pair_count=store.pair_interaction_count[pairs],
+            pair_critical=store.pair_critical[pairs],
+            pair_severe=store.pair_severe[pairs],
+            pair_high_risk=store.pair_high_risk[pairs],
+            pair_category_mask=store.pair_category_mask[pairs]
+        )
+
+    @classmethod
+    def from_lookup(cls, interaction_lookup: Dict[str, list], formulary: List[str]) -> 'FormularyMatrix':
+        """Matrice iz dict lookup-a (samo parovi čija su oba lijeka u formularu)"""
+        drug_ids = cls._unique_formulary(formulary)
+        index = {drug_id: position for position, drug_id in enumerate(drug_ids)}
+
+        selected: List[Tuple[int, int, list]] = []
+        for key, records in interaction_lookup.items():
+            drug1_id, drug2_id = key.split('|')
+            if drug1_id in index and drug2_id in index:
+                selected.append((index[drug1_id], index[drug2_id], records))
+
+        category_names = sorted({record['category'] for _, _, records in selected for record in records})
+        bit_of = {name: bit for bit, name in enumerate(category_names)}
+        score_values = np.array(sorted({record['score'] for _, _, records in selected for record in records}),
+                                dtype=np.float64)
+
+        summaries = []
+        for _, _, records in selected:
+            scores = [record['score'] for record in records]
+            mask = 0
+            for record in records:
+                mask |= 1 << bit_of[record['category']]
+            summaries.append((
+                sum(scores),
+                int(np.searchsorted(score_values, max(scores))),
+                len(scores),
+                sum(1 for score in scores if score >= InteractionStore.CRITICAL_SCORE),
+                sum(1 for score in scores if score >= InteractionStore.SEVERE_SCORE),
+                sum(1 for score in scores if score >= InteractionStore.HIGH_RISK_SCORE),
+                mask
+            ))
+
+        columns = list(zip(*summaries)) if summaries else [()] * 7
+        return cls(
+            drug_ids, category_names, score_values,
+            np.array([row for row, _, _ in selected], dtype=np.int64),
+            np.array([col for _, col, _ in selected], dtype=np.int64),
+            pair_sum=np.array(columns[0], dtype=np.float64),
+            pair_max_code=np.array(columns[1], dtype=np.int64),
+            pair_count=np.array(columns[2], dtype=np.int64),
+            pair_critical=np.array(columns[3], dtype=np.int64),
+            pair_severe=np.array(columns[4], dtype=np.int64),
+            pair_high_risk=np.array(columns[5], dtype=np.int64),
+            pair_category_mask=np.array(columns[6], dtype=np.uint64)
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.drug_ids)
+
+    def positions_of(self, drug_ids: List[str]) -> np.ndarray:
+        """Pozicije lijekova u formularu (-1 za lijekove van formulara)"""
+        return np.array([self.index.get(drug_id, -1) for drug_id in drug_ids], dtype=np.int64)
+
+    def pair_mask(self, positions: np.ndarray) -> np.ndarray:
+        """n x n bool matrica parova koji interaguju (sve pozicije moraju biti u formularu)"""
+        return self.slot[np.ix_(positions, positions)] > 0
+
+    def category_names_from_mask(self, mask: int) -> List[str]:
+        """Dekodiraj bitmasku kategorija u imena kategorija (različitih maski je malo, pa se keširaju)"""
+        names = self._mask_names.get(mask)
+        if names is None:
+            names = tuple(name for bit, name in enumerate(self.category_names) if mask >> bit & 1)
+            self._mask_names[mask] = names
+        return list(names)
+
+    def summarize(self, rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, List[tuple]]:
+        """
+        Sažeci parova formulara (rows[k], cols[k]).
+        Vraća (indeksi k parova koji interaguju, redovi (suma, max, broj, kritične, ozbiljne,
+        visoko rizične, kategorije)) u redoslijedu ulaza.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        slots = self.slot[rows, cols]
+        hits = np.flatnonzero(slots)
+        pairs = slots[hits].astype(np.int64) - 1
+
+        summaries = list(zip(
+            self.total[pairs].tolist(),
+            self.score_values[self.max_code[pairs]].tolist() if len(hits) else [],
+            self.count[pairs].tolist(),
+            self.critical[pairs].tolist(),
+            self.severe[pairs].tolist(),
+            self.high_risk[pairs].tolist(),
+            [self.category_names_from_mask(mask) for mask in self.category_mask[pairs].tolist()]
+        ))
+        return hits, summaries
+
+    def therapy_rows(self, positions: np.ndarray) -> List[tuple]:
+        """
+        Redovi sažetaka za sve parove terapije čiji su svi lijekovi u formularu, iz jednog bloka
+        matrice (np.ix_): (i, j, suma, max, broj, kritične, ozbiljne, visoko rizične, kategorije).
+        """
+        left, right = np.nonzero(np.triu(self.pair_mask(positions), k=1))
+        _, summaries = self.summarize(positions[left], positions[right])
+        return [(i, j) + summary for i, j, summary in zip(left.tolist(), right.tolist(), summaries)]
+
+    def memory_bytes(self) -> int:
+        return int(sum(array.nbytes for array in (
+            self.slot, self.count, self.critical, self.severe, self.high_risk,
+            self.max_code, self.category_mask, self.total
+        )))
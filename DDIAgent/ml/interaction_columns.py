@@ -0,0 +1,172 @@
+"""
+ML: Kolonski rezultat interakcija terapije
+
+Umjesto liste DrugInteraction objekata model vraća paralelne nizove (pozicije lijekova u terapiji,
+kod tipa, score, kod kategorije) i tabele imena. Objekti se kreiraju tek kada se element pročita,
+a filtrirani pogledi (kritične, visoko rizične, po kategoriji) dijele iste nizove preko niza
+indeksa redova - nema dupliranih lista objekata.
+"""
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class InteractionColumns(Sequence):
+    """Interakcije kao kolone; element je DrugInteraction (slotted) kreiran na zahtjev"""
+
+    __slots__ = ('drug_ids', 'left', 'right', 'type_codes', 'scores', 'category_codes',
+                 'type_names', 'category_names', 'view_type', '_rows')
+
+    def __init__(self, drug_ids, left: np.ndarray, right: np.ndarray, type_codes: np.ndarray,
+                 scores: np.ndarray, category_codes: np.ndarray, type_names: List[str],
+                 category_names: List[str], view_type: Callable[..., Any],
+                 rows: Optional[np.ndarray] = None):
+        """
+        left/right su pozicije u drug_ids za svaku interakciju; view_type je klasa objekta
+        koji se kreira za element (DrugInteraction). rows bira redove pogleda (None = svi).
+        """
+        self.drug_ids = np.asarray(drug_ids, dtype=object)
+        self.left = left
+        self.right = right
+        self.type_codes = type_codes
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.category_codes = category_codes
+        self.type_names = type_names
+        self.category_names = category_names
+        self.view_type = view_type
+        self._rows = rows
+
+    @classmethod
+    def empty(cls, drug_ids, view_type: Callable[..., Any]) -> 'InteractionColumns':
+        none = np.zeros(0, dtype=np.int64)
+        return cls(drug_ids, none, none, none, np.zeros(0), none, [], [], view_type)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Indeksi redova ovog pogleda u dijeljenim nizovima"""
+        if self._rows is None:
+            return np.arange(len(self.scores), dtype=np.int64)
+        return self._rows
+
+    def select(self, rows: np.ndarray) -> 'InteractionColumns':
+        return InteractionColumns(
+            self.drug_ids, self.left, self.right, self.type_codes, self.scores, self.category_codes,
+            self.type_names, self.category_names, self.view_type, rows=rows
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores) if self._rows is None else len(self._rows)
+
+    def _view(self, row: int):
+        return self.view_type(
+            drug1_id=self.drug_ids[self.left[row]],
+            drug2_id=self.drug_ids[self.right[row]],
+            interaction_type=self.type_names[self.type_codes[row]],
+            risk_score=float(self.scores[row]),
+            risk_category=self.category_names[self.category_codes[row]]
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(row) for row in self.rows[index].tolist()]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Indeks interakcije van opsega")
+        return self._view(index if self._rows is None else int(self._rows[index]))
+
+    def __iter__(self):
+        for row in self.rows.tolist():
+            yield self._view(row)
+
+    def __eq__(self, other) -> bool:
+        # Poređenje po sadržaju (kao lista DrugInteraction objekata), npr. pri poređenju izvještaja
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"InteractionColumns(count={len(self)})"
+
+    def score_values(self) -> np.ndarray:
+        """Score-ovi interakcija pogleda"""
+        return self.scores if self._rows is None else self.scores[self._rows]
+
+    def at_least(self, min_score: float) -> 'InteractionColumns':
+        """Pogled na interakcije sa score >= min_score"""
+        rows = self.rows
+        return self.select(rows[self.scores[rows] >= min_score])
+
+    def by_category(self) -> Dict[str, 'InteractionColumns']:
+        """Pogledi po kategoriji, sortirani po imenu kategorije (kao 'categories' u sažetku terapije)"""
+        rows = self.rows
+        codes = np.asarray(self.category_codes)[rows]
+        return {
+            name: self.select(rows[codes == code])
+            for name, code in sorted((self.category_names[code], code) for code in np.unique(codes).tolist())
+        }
+
+    def to_records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Dict zapisi za serijalizaciju (bez kreiranja view objekata)"""
+        rows = self.rows[:limit]
+        scores = self.scores[rows].tolist()
+        return [
+            {
+                'drug1_id': self.drug_ids[left],
+                'drug2_id': self.drug_ids[right],
+                'type': self.type_names[type_code],
+                'score': score,
+                'category': self.category_names[category_code],
+                'is_critical': score >= 4.5
+            }
+            for left, right, type_code, score, category_code in zip(
+                np.asarray(self.left)[rows].tolist(),
+                np.asarray(self.right)[rows].tolist(),
+                np.asarray(self.type_codes)[rows].tolist(),
+                scores,
+                np.asarray(self.category_codes)[rows].tolist()
+            )
+        ]
+
+
+class LazyInteractionColumns(Sequence):
+    """
+    InteractionColumns koji se računaju tek pri prvom čitanju.
+    Dužina je poznata unaprijed (iz sažetka), pa len() ne pokreće proračun.
+    """
+
+    def __init__(self, loader: Callable[[], InteractionColumns], count: int):
+        self._loader = loader
+        self._columns: Optional[InteractionColumns] = None
+        self._count = count
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._columns is not None
+
+    def load(self) -> InteractionColumns:
+        if self._columns is None:
+            self._columns = self._loader()
+            self._loader = None
+        return self._columns
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        return self.load()[index]
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __getattr__(self, name):
+        # at_least, by_category, to_records, score_values... idu na učitane kolone
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        return f"LazyInteractionColumns(count={self._count}, materialized={self.is_materialized})"
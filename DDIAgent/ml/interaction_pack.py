@@ -0,0 +1,224 @@
+"""
+ML: Binarni "pack" format za InteractionStore (np.memmap warm-start)
+
+Struktura fajla:
+    MAGIC (8 bajtova) | dužina headera (uint32, little-endian) | JSON header | nizovi
+Svaki niz počinje na offsetu poravnatom na ALIGNMENT bajtova. Header sadrži verziju formata,
+SHA-256 izvornog CSV-a, tabele kodova (lijekovi, tipovi, kategorije, score-ovi) i opis nizova.
+Pored osnovnih nizova (ARRAY_FIELDS) pack nosi i izvedene sažetke (SUMMARY_FIELDS) i bitset
+partnera (partner_bits), pa se pri otvaranju samo mapira fajl.
+"""
+import hashlib
+import json
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .interaction_store import InteractionStore
+from .partner_bitsets import PartnerBitsets
+
+MAGIC = b"DDIPACK\0"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+PACK_SUFFIX = ".ddipack"
+
+
+def default_pack_path(csv_path: str) -> str:
+    """Pack fajl se čuva pored CSV-a (DDI_with_scores.csv -> DDI_with_scores.ddipack)"""
+    return os.path.splitext(csv_path)[0] + PACK_SUFFIX
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 sadržaja fajla (čita se u blokovima)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def pack_layout(store: InteractionStore, source_sha256: str,
+                source_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Raspored pack-a bez pisanja: header, nizovi, početak podataka i ukupna veličina.
+    Isti raspored koriste pack fajl i shared memory segment.
+    """
+    fields = InteractionStore.ARRAY_FIELDS + InteractionStore.SUMMARY_FIELDS
+    arrays = {name: np.ascontiguousarray(getattr(store, name)) for name in fields}
+    arrays['partner_bits'] = PartnerBitsets.from_store(store).bits
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'source_sha256': source_sha256,
+        'source_file': os.path.basename(source_path) if source_path else None,
+        'created_at': datetime.now().isoformat(),
+        'drug_ids': store.drug_ids,
+        'type_names': store.type_names,
+        'category_names': store.category_names,
+        'score_values': store.score_values.tolist(),
+        'arrays': {}
+    }
+
+    # Offseti su relativni na početak podatkovnog dijela (poslije headera)
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        header['arrays'][name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset
+        }
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    return {
+        'header': header,
+        'header_bytes': header_bytes,
+        'arrays': arrays,
+        'data_start': data_start,
+        'size': data_start + offset
+    }
+
+
+def write_pack_into(buffer, layout: Dict[str, Any]):
+    """Zapiši pack u bafer koji podržava buffer protokol (npr. SharedMemory.buf)"""
+    target = np.frombuffer(buffer, dtype=np.uint8, count=layout['size'])
+    prefix = MAGIC + struct.pack('<I', len(layout['header_bytes'])) + layout['header_bytes']
+    target[:len(prefix)] = np.frombuffer(prefix, dtype=np.uint8)
+    for name, array in layout['arrays'].items():
+        start = layout['data_start'] + layout['header']['arrays'][name]['offset']
+        target[start:start + array.nbytes] = array.reshape(-1).view(np.uint8)
+
+
+def write_pack(store: InteractionStore, pack_path: str, source_sha256: str,
+               source_path: Optional[str] = None) -> Dict[str, Any]:
+    """Zapiši store u pack fajl (atomično: privremeni fajl + os.replace)"""
+    layout = pack_layout(store, source_sha256, source_path)
+    header = layout['header']
+
+    tmp_path = f"{pack_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(layout['header_bytes'])))
+        f.write(layout['header_bytes'])
+        for name, array in layout['arrays'].items():
+            f.seek(layout['data_start'] + header['arrays'][name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(layout['size'])
+    os.replace(tmp_path, pack_path)
+
+    return header
+
+
+def read_pack_header(pack_path: str) -> Optional[Dict[str, Any]]:
+    """Pročitaj header pack fajla ili vrati None ako fajl ne postoji / nije validan"""
+    try:
+        with open(pack_path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_length,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_length).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+
+    header['data_start'] = _align(len(MAGIC) + 4 + header_length)
+    return header
+
+
+def header_from_buffer(buffer) -> Optional[Dict[str, Any]]:
+    """Pročitaj header iz bafera u memoriji (isti format kao pack fajl)"""
+    data = memoryview(buffer)
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        return None
+    try:
+        (header_length,) = struct.unpack('<I', bytes(data[len(MAGIC):len(MAGIC) + 4]))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(data[start:start + header_length]).decode('utf-8'))
+    except (ValueError, struct.error):
+        return None
+
+    header['data_start'] = _align(len(MAGIC) + 4 + header_length)
+    return header
+
+
+def store_from_buffer(buffer: np.ndarray, header: Dict[str, Any]) -> InteractionStore:
+    """InteractionStore čiji su nizovi pogledi (bez kopiranja) u uint8 bafer pack-a"""
+    if header is None or header.get('format_version') != FORMAT_VERSION:
+        raise ValueError("Nevalidan ili zastario pack format")
+
+    data_start = header['data_start']
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        start = data_start + spec['offset']
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    return InteractionStore(
+        drug_ids=header['drug_ids'],
+        type_names=header['type_names'],
+        category_names=header['category_names'],
+        score_values=header['score_values'],
+        arrays=arrays
+    )
+
+
+def open_pack(pack_path: str, header: Optional[Dict[str, Any]] = None) -> InteractionStore:
+    """Otvori pack kao InteractionStore čiji su nizovi read-only np.memmap pogledi"""
+    header = header or read_pack_header(pack_path)
+    if header is None or header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Nevalidan ili zastario pack fajl: {pack_path}")
+
+    # Jedan mmap za cijeli fajl; OS page cache dijeli stranice između procesa
+    buffer = np.memmap(pack_path, dtype=np.uint8, mode='r')
+    return store_from_buffer(buffer, header)
+
+
+def build_pack(csv_path: str, pack_path: Optional[str] = None,
+               source_sha256: Optional[str] = None) -> Dict[str, Any]:
+    """Pročitaj CSV, izgradi store i zapiši pack. Vraća header zapisanog pack-a."""
+    pack_path = pack_path or default_pack_path(csv_path)
+    source_sha256 = source_sha256 or file_sha256(csv_path)
+    store = InteractionStore.from_dataframe(pd.read_csv(csv_path))
+    return write_pack(store, pack_path, source_sha256, source_path=csv_path)
+
+
+def load_or_build(csv_path: str, pack_path: Optional[str] = None) -> Tuple[InteractionStore, str, bool]:
+    """
+    Warm-start: otvori pack ako odgovara hash-u CSV-a, inače ga ponovo izgradi.
+    Vraća (store, sha256 izvora, da li je pack ponovo izgrađen).
+    """
+    pack_path = pack_path or default_pack_path(csv_path)
+    header = read_pack_header(pack_path)
+
+    if not os.path.exists(csv_path):
+        if header is None:
+            raise FileNotFoundError(f"Nema ni CSV-a ni pack fajla: {csv_path}")
+        print(f"⚠️ CSV ne postoji, koristim postojeći pack: {pack_path}")
+        return open_pack(pack_path, header), header['source_sha256'], False
+
+    source_sha256 = file_sha256(csv_path)
+    if (header is not None
+            and header.get('format_version') == FORMAT_VERSION
+            and header.get('source_sha256') == source_sha256):
+        return open_pack(pack_path, header), source_sha256, False
+
+    print(f"🔄 Pack zastario ili ne postoji, gradim: {pack_path}")
+    store = InteractionStore.from_dataframe(pd.read_csv(csv_path))
+    try:
+        header = write_pack(store, pack_path, source_sha256, source_path=csv_path)
+    except OSError as e:
+        print(f"⚠️ Ne mogu zapisati pack ({e}), koristim store iz memorije")
+        return store, source_sha256, True
+
+    return open_pack(pack_path, read_pack_header(pack_path)), source_sha256, True
@@ -0,0 +1,358 @@
+"""
+ML: Kompaktna pohrana DDI interakcija (cjelobrojni kodovi + CSR susjedstvo)
+"""
+import sys
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+import pandas as pd
+
+
+def _smallest_code_dtype(count: int):
+    """Najmanji cjelobrojni tip dovoljan za `count` različitih vrijednosti"""
+    if count <= np.iinfo(np.int8).max:
+        return np.int8
+    if count <= np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+def _is_mapped(array: np.ndarray) -> bool:
+    """Da li je niz pogled u spoljni bafer (np.memmap fajla, mmap shared memory segmenta)"""
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array.base is not None
+
+
+def estimate_lookup_bytes(lookup: Dict[str, List[Dict[str, Any]]]) -> int:
+    """Procjena memorije dict lookup tabele (dict + ključevi + liste + zapisi + vrijednosti)"""
+    seen = set()
+
+    def sizeof(obj) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        return sys.getsizeof(obj)
+
+    total = sizeof(lookup)
+    for key, records in lookup.items():
+        total += sizeof(key) + sizeof(records)
+        for record in records:
+            total += sizeof(record)
+            for value in record.values():
+                total += sizeof(value)
+    return total
+
+
+class InteractionStore:
+    """
+    Kompaktna pohrana interakcija.
+
+    - DrugBank ID-jevi su internirani u int32 kodove (kod = indeks u sortiranom `drug_ids`)
+    - interaction_type, risk_category i risk_score su internirani u male enum kodove
+    - interakcije su sortirane po (manji kod, veći kod, redoslijed u CSV-u)
+    - jedinstveni parovi (pair_low < pair_high) pokazuju na svoje interakcije kroz `pair_indptr`
+    - CSR susjedstvo po lijeku: partneri lijeka d su `neighbors[indptr[d]:indptr[d + 1]]` (sortirani),
+      a `neighbor_pair` daje indeks para za svakog partnera
+    - tabela sažetaka po paru (suma, max, broj, brojači po pragovima, bitmaska kategorija)
+      gradi se pri učitavanju i omogućava O(1) sažetak para bez kreiranja objekata
+    - bitmaska kategorija po lijeku: bit k je postavljen ako lijek učestvuje u bar jednoj
+      interakciji kategorije k (osnova za detekciju gomilanja kategorija u terapiji)
+    """
+
+    # Pragovi (usklađeni sa DrugInteraction.is_critical / is_high_risk i calculate_therapy_risk)
+    CRITICAL_SCORE = 4.5
+    SEVERE_SCORE = 4.0
+    HIGH_RISK_SCORE = 3.0
+
+    # Kategorija interakcija iz CSV-a bez risk kolona (DDI_data_cleaned.csv) dok se ne primijene pravila
+    UNSCORED_CATEGORY = 'UNSCORED'
+
+    # Imena numpy nizova koji čine store (redoslijed je bitan za serijalizaciju)
+    ARRAY_FIELDS = (
+        'inter_type', 'inter_category', 'inter_score_code',
+        'pair_low', 'pair_high', 'pair_indptr',
+        'indptr', 'neighbors', 'neighbor_pair'
+    )
+
+    # Nizovi izvedeni iz ARRAY_FIELDS; pack i shared memory ih nose, pa ih otvaranje ne računa ponovo
+    SUMMARY_FIELDS = (
+        'pair_keys', 'pair_sum', 'pair_max_code', 'pair_interaction_count',
+        'pair_critical', 'pair_severe', 'pair_high_risk', 'pair_category_mask',
+        'drug_category_mask', 'category_max_score'
+    )
+
+    # Opcioni izvedeni nizovi koje pack/shared memory nose ako postoje (bitset partnera, PartnerBitsets)
+    OPTIONAL_FIELDS = ('partner_bits',)
+
+    def __init__(self,
+                 drug_ids: List[str],
+                 type_names: List[str],
+                 category_names: List[str],
+                 score_values: List[float],
+                 arrays: Dict[str, np.ndarray]):
+        """
+        arrays: ARRAY_FIELDS, opciono i SUMMARY_FIELDS i OPTIONAL_FIELDS (iz pack-a ili shared
+        memory-ja); sažeci se računaju samo ako nisu svi prisutni.
+        """
+        self.drug_ids = list(drug_ids)
+        self.type_names = list(type_names)
+        self.category_names = list(category_names)
+        self.score_values = np.asarray(score_values, dtype=np.float64)
+
+        for name in self.ARRAY_FIELDS:
+            setattr(self, name, arrays[name])
+
+        self.partner_bits: Optional[np.ndarray] = arrays.get('partner_bits')
+        self._code_index: Optional[Dict[str, int]] = None
+        if all(name in arrays for name in self.SUMMARY_FIELDS):
+            for name in self.SUMMARY_FIELDS:
+                setattr(self, name, arrays[name])
+        else:
+            self._build_pair_summary()
+            self._build_drug_categories()
+
+    @property
+    def code_index(self) -> Dict[str, int]:
+        """DrugBank ID -> kod (gradi se pri prvom upitu, ne pri otvaranju store-a)"""
+        if self._code_index is None:
+            self._code_index = {drug_id: code for code, drug_id in enumerate(self.drug_ids)}
+        return self._code_index
+
+    def _build_pair_summary(self):
+        """Izgradi tabelu sažetaka po paru (np.*.reduceat preko interakcija sortiranih po paru)"""
+        if len(self.category_names) > 64:
+            raise ValueError("Bitmaska kategorija podržava najviše 64 kategorije")
+
+        n_pairs = len(self.pair_low)
+        self.pair_keys = self.pair_low.astype(np.int64) * max(self.drug_count, 1) + self.pair_high
+
+        counts = np.diff(self.pair_indptr)
+        count_dtype = _smallest_code_dtype(int(counts.max()) if n_pairs else 0)
+        mask_dtype = np.uint64 if len(self.category_names) > 32 else (
+            np.uint32 if len(self.category_names) > 16 else np.uint16)
+
+        if n_pairs == 0:
+            self.pair_sum = np.zeros(0, dtype=np.float64)
+            self.pair_max_code = np.zeros(0, dtype=self.inter_score_code.dtype)
+            self.pair_interaction_count = np.zeros(0, dtype=count_dtype)
+            self.pair_critical = np.zeros(0, dtype=count_dtype)
+            self.pair_severe = np.zeros(0, dtype=count_dtype)
+            self.pair_high_risk = np.zeros(0, dtype=count_dtype)
+            self.pair_category_mask = np.zeros(0, dtype=mask_dtype)
+            return
+
+        starts = self.pair_indptr[:-1]
+        scores = self.score_values[self.inter_score_code]
+
+        self.pair_sum = np.add.reduceat(scores, starts)
+        # score_values su sortirani, pa je najveći kod ujedno i najveći score
+        self.pair_max_code = np.maximum.reduceat(self.inter_score_code, starts)
+        self.pair_interaction_count = counts.astype(count_dtype)
+        self.pair_critical = np.add.reduceat(scores >= self.CRITICAL_SCORE, starts, dtype=np.int64).astype(count_dtype)
+        self.pair_severe = np.add.reduceat(scores >= self.SEVERE_SCORE, starts, dtype=np.int64).astype(count_dtype)
+        self.pair_high_risk = np.add.reduceat(scores >= self.HIGH_RISK_SCORE, starts, dtype=np.int64).astype(count_dtype)
+        category_bits = np.left_shift(np.uint64(1), self.inter_category.astype(np.uint64))
+        self.pair_category_mask = np.bitwise_or.reduceat(category_bits, starts).astype(mask_dtype)
+
+    def _build_drug_categories(self):
+        """Bitmaska kategorija po lijeku (OR maski svih parova lijeka) i najveći score po kategoriji"""
+        # CSR red lijeka daje indekse njegovih parova, pa je maska lijeka OR-reduceat po redovima
+        degrees = np.diff(self.indptr)
+        drug_mask = np.zeros(self.drug_count, dtype=self.pair_category_mask.dtype)
+        if len(self.neighbor_pair):
+            edge_masks = self.pair_category_mask[self.neighbor_pair]
+            has_edges = degrees > 0
+            drug_mask[has_edges] = np.bitwise_or.reduceat(edge_masks, self.indptr[:-1][has_edges])
+        self.drug_category_mask = drug_mask
+
+        # Koji (kategorija, score) kodovi postoje; najveći score kod po kategoriji
+        n_categories, n_scores = len(self.category_names), len(self.score_values)
+        category_max_score = np.zeros(n_categories, dtype=np.float64)
+        if self.interaction_count:
+            combined = self.inter_category.astype(np.int64) * n_scores + self.inter_score_code
+            present = np.bincount(combined, minlength=n_categories * n_scores).reshape(n_categories, n_scores) > 0
+            has_any = present.any(axis=1)
+            last_code = n_scores - 1 - np.argmax(present[:, ::-1], axis=1)
+            category_max_score[has_any] = self.score_values[last_code[has_any]]
+        self.category_max_score = category_max_score
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> 'InteractionStore':
+        """
+        Izgradi store iz DataFrame-a sa kolonama iz DDI_with_scores.csv.
+        Bez kolona risk_category/risk_score (očišćeni CSV) sve interakcije su UNSCORED sa score 0,
+        a stvarni score-ovi se dodjeljuju sa rescored().
+        """
+        drug1 = df['drug1_id'].to_numpy(dtype=object)
+        drug2 = df['drug2_id'].to_numpy(dtype=object)
+
+        # Interniranje ID-jeva: hash factorize, pa preslikavanje na redoslijed sortiranih ID-jeva
+        # (isti kodovi kao np.unique + searchsorted, bez sortiranja svih redova)
+        codes, uniques = pd.factorize(np.concatenate([drug1, drug2]))
+        uniques = np.asarray(uniques, dtype=object)
+        sorted_order = np.argsort(uniques, kind='stable')
+        rank = np.empty(len(uniques), dtype=np.int32)
+        rank[sorted_order] = np.arange(len(uniques), dtype=np.int32)
+        drug_ids = uniques[sorted_order]
+        n_drugs = len(drug_ids)
+
+        code1 = rank[codes[:len(df)]]
+        code2 = rank[codes[len(df):]]
+
+        # Interniranje enum kolona
+        type_codes, type_names = pd.factorize(df['interaction_type'], sort=True)
+        if 'risk_category' in df and 'risk_score' in df:
+            category_codes, category_names = pd.factorize(df['risk_category'], sort=True)
+            score_codes, score_values = pd.factorize(df['risk_score'].astype(np.float64), sort=True)
+        else:
+            category_codes = score_codes = np.zeros(len(df), dtype=np.int8)
+            category_names, score_values = [cls.UNSCORED_CATEGORY], [0.0]
+
+        low = np.minimum(code1, code2)
+        high = np.maximum(code1, code2)
+
+        # Stabilno sortiranje: unutar para ostaje redoslijed iz CSV-a
+        order = np.lexsort((high, low))
+        low, high = low[order], high[order]
+
+        # Jedinstveni parovi i njihovi rasponi interakcija
+        pair_keys = low.astype(np.int64) * max(n_drugs, 1) + high
+        is_first = np.ones(len(pair_keys), dtype=bool)
+        is_first[1:] = pair_keys[1:] != pair_keys[:-1]
+        pair_starts = np.flatnonzero(is_first)
+        pair_low = low[pair_starts].astype(np.int32)
+        pair_high = high[pair_starts].astype(np.int32)
+        pair_indptr = np.append(pair_starts, len(pair_keys)).astype(np.int32)
+
+        # CSR susjedstvo (oba smjera, bez dupliranja para lijeka sa samim sobom)
+        pair_ids = np.arange(len(pair_low), dtype=np.int32)
+        reverse = pair_low != pair_high
+        src = np.concatenate([pair_low, pair_high[reverse]])
+        dst = np.concatenate([pair_high, pair_low[reverse]])
+        edge_pair = np.concatenate([pair_ids, pair_ids[reverse]])
+        edge_order = np.lexsort((dst, src))
+        indptr = np.zeros(n_drugs + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=n_drugs), out=indptr[1:])
+
+        arrays = {
+            'inter_type': type_codes[order].astype(_smallest_code_dtype(len(type_names))),
+            'inter_category': category_codes[order].astype(_smallest_code_dtype(len(category_names))),
+            'inter_score_code': score_codes[order].astype(_smallest_code_dtype(len(score_values))),
+            'pair_low': pair_low,
+            'pair_high': pair_high,
+            'pair_indptr': pair_indptr,
+            'indptr': indptr,
+            'neighbors': dst[edge_order].astype(np.int32),
+            'neighbor_pair': edge_pair[edge_order].astype(np.int32),
+        }
+
+        return cls(
+            drug_ids=drug_ids.tolist(),
+            type_names=list(type_names),
+            category_names=list(category_names),
+            score_values=list(score_values),
+            arrays=arrays
+        )
+
+    def rescored(self, categorizer) -> 'InteractionStore':
+        """
+        Novi store sa kategorijama i score-ovima iz pravila (RiskCategorizer).
+        Pravila se primjenjuju jednom po tipu interakcije, a kodovi interakcija se dobijaju
+        indeksiranjem po inter_type; parovi i CSR susjedstvo se dijele sa ovim store-om.
+        """
+        type_scores, type_categories = categorizer.categorize_types(self.type_names)
+        category_codes, category_names = pd.factorize(np.asarray(type_categories, dtype=object), sort=True)
+        score_codes, score_values = pd.factorize(type_scores, sort=True)
+
+        # Parovi se ne mijenjaju, pa ni bitset partnera
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS + self.OPTIONAL_FIELDS
+                  if getattr(self, name) is not None}
+        arrays['inter_category'] = category_codes.astype(_smallest_code_dtype(len(category_names)))[self.inter_type]
+        arrays['inter_score_code'] = score_codes.astype(_smallest_code_dtype(len(score_values)))[self.inter_type]
+
+        return InteractionStore(
+            drug_ids=self.drug_ids,
+            type_names=self.type_names,
+            category_names=list(category_names),
+            score_values=list(score_values),
+            arrays=arrays
+        )
+
+    @property
+    def drug_count(self) -> int:
+        return len(self.drug_ids)
+
+    @property
+    def pair_count(self) -> int:
+        return len(self.pair_low)
+
+    @property
+    def interaction_count(self) -> int:
+        return len(self.inter_type)
+
+    def code_of(self, drug_id: str) -> Optional[int]:
+        """Vrati cjelobrojni kod lijeka ili None ako lijek nema interakcija"""
+        return self.code_index.get(drug_id)
+
+    def codes_of(self, drug_ids: List[str]) -> np.ndarray:
+        """Kodovi za listu lijekova (-1 za lijekove bez interakcija)"""
+        code_index = self.code_index
+        return np.array([code_index.get(drug_id, -1) for drug_id in drug_ids], dtype=np.int64)
+
+    def find_pair(self, code1: int, code2: int) -> int:
+        """Vrati indeks para za dva koda lijeka ili -1 ako par ne interaguje"""
+        start, end = self.indptr[code1], self.indptr[code1 + 1]
+        row = self.neighbors[start:end]
+        position = int(np.searchsorted(row, code2))
+        if position < len(row) and row[position] == code2:
+            return int(self.neighbor_pair[start + position])
+        return -1
+
+    def find_pairs(self, codes1: np.ndarray, codes2: np.ndarray) -> np.ndarray:
+        """Vektorizovano: indeksi parova za nizove kodova (-1 gdje par ne interaguje ili je kod -1)"""
+        codes1 = np.asarray(codes1, dtype=np.int64)
+        codes2 = np.asarray(codes2, dtype=np.int64)
+        keys = np.minimum(codes1, codes2) * max(self.drug_count, 1) + np.maximum(codes1, codes2)
+
+        positions = np.searchsorted(self.pair_keys, keys)
+        positions[positions >= len(self.pair_keys)] = 0
+        found = (codes1 >= 0) & (codes2 >= 0) & (len(self.pair_keys) > 0)
+        if len(self.pair_keys):
+            found &= self.pair_keys[positions] == keys
+        return np.where(found, positions, -1)
+
+    def category_names_from_mask(self, mask: int) -> List[str]:
+        """Dekodiraj bitmasku kategorija u imena kategorija"""
+        return [name for bit, name in enumerate(self.category_names) if mask >> bit & 1]
+
+    def pair_interactions(self, pair: int) -> range:
+        """Raspon indeksa interakcija koje pripadaju paru"""
+        return range(int(self.pair_indptr[pair]), int(self.pair_indptr[pair + 1]))
+
+    def interaction_record(self, index: int) -> Dict[str, Any]:
+        """Dekodiraj jednu interakciju u isti oblik kao zapis iz dict lookup-a"""
+        return {
+            'type': self.type_names[self.inter_type[index]],
+            'score': float(self.score_values[self.inter_score_code[index]]),
+            'category': self.category_names[self.inter_category[index]]
+        }
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """
+        Memorija store-a po komponentama (bajtovi). `mapped` su nizovi mapirani iz pack fajla ili
+        shared memory segmenta (dijele se između procesa), `private` je memorija samo ovog procesa.
+        """
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS + self.SUMMARY_FIELDS}
+        footprint = {name: int(array.nbytes) for name, array in arrays.items()}
+        mapped = sum(int(array.nbytes) for array in arrays.values() if _is_mapped(array))
+        footprint['score_values'] = int(self.score_values.nbytes)
+        footprint['drug_ids'] = sys.getsizeof(self.drug_ids) + sum(sys.getsizeof(d) for d in self.drug_ids)
+        footprint['code_index'] = sys.getsizeof(self._code_index) if self._code_index is not None else 0
+        footprint['enum_tables'] = sum(
+            sys.getsizeof(name) for name in self.type_names + self.category_names
+        )
+        footprint['total'] = sum(footprint.values())
+        footprint['mapped'] = mapped
+        footprint['private'] = footprint['total'] - mapped
+        return footprint
@@ -0,0 +1,80 @@
+"""
+ML: Bitset partnera po lijeku za brze negativne provjere parova
+
+Red d je bitset (n_drugs bita) lijekova sa kojima lijek d ima bar jednu interakciju.
+Skup je tačan (bez lažno pozitivnih kao kod Bloom filtera), pa jedan test bita
+odlučuje da li par uopšte treba tražiti u indeksu. Matrica se može i mapirati iz pack-a
+ili shared memory segmenta (InteractionStore.partner_bits) umjesto da se gradi.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+
+class PartnerBitsets:
+    """Matrica bitova n_drugs x n_drugs (uint8, little-endian bitovi po redu)"""
+
+    def __init__(self, bits: np.ndarray, code_index: Dict[str, int]):
+        """bits: (n_drugs, ceil(n_drugs / 8)) uint8 matrica; može biti read-only pogled u mapiran bafer"""
+        self.bits = bits
+        self.drug_count = bits.shape[0]
+        self.row_bytes = bits.shape[1]
+        self.code_index = code_index
+
+        # memoryview za skalarne testove (indeksiranje je brže od numpy skalara, bez kopije matrice)
+        self._view = memoryview(bits) if self.drug_count else None
+
+    @staticmethod
+    def build_bits(drug_count: int, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Matrica bitova iz jedinstvenih parova (low, high)"""
+        bits = np.zeros((drug_count, (drug_count + 7) // 8), dtype=np.uint8)
+        low = np.asarray(low, dtype=np.int64)
+        high = np.asarray(high, dtype=np.int64)
+        rows = np.concatenate([low, high])
+        cols = np.concatenate([high, low])
+        np.bitwise_or.at(bits, (rows, cols >> 3), np.left_shift(1, cols & 7).astype(np.uint8))
+        return bits
+
+    @classmethod
+    def from_store(cls, store) -> 'PartnerBitsets':
+        """Bitsetovi InteractionStore-a (mapirani iz pack-a / shared memory-ja ili izgrađeni iz parova)"""
+        bits = store.partner_bits
+        if bits is None:
+            bits = cls.build_bits(store.drug_count, store.pair_low, store.pair_high)
+        return cls(bits, store.code_index)
+
+    @classmethod
+    def from_lookup(cls, interaction_lookup: Dict[str, list]) -> 'PartnerBitsets':
+        """Bitsetovi iz ključeva dict lookup-a ("a|b"); lijekovi se kodiraju po sortiranom ID-ju"""
+        pairs = [key.split('|') for key in interaction_lookup]
+        drug_ids = sorted({drug_id for pair in pairs for drug_id in pair})
+        code_index = {drug_id: code for code, drug_id in enumerate(drug_ids)}
+        low = np.fromiter((code_index[a] for a, _ in pairs), dtype=np.int64, count=len(pairs))
+        high = np.fromiter((code_index[b] for _, b in pairs), dtype=np.int64, count=len(pairs))
+        return cls(cls.build_bits(len(drug_ids), low, high), code_index)
+
+    def codes_of(self, drug_ids: List[str]) -> np.ndarray:
+        """Kodovi lijekova (-1 za lijekove bez interakcija)"""
+        return np.array([self.code_index.get(drug_id, -1) for drug_id in drug_ids], dtype=np.int64)
+
+    def may_interact(self, drug1_id: str, drug2_id: str) -> bool:
+        """Jedan test bita: da li par ima bar jednu interakciju"""
+        code1 = self.code_index.get(drug1_id)
+        code2 = self.code_index.get(drug2_id)
+        if code1 is None or code2 is None:
+            return False
+
+        return (self._view[code1, code2 >> 3] >> (code2 & 7)) & 1 == 1
+
+    def pair_mask(self, codes: np.ndarray) -> np.ndarray:
+        """n x n bool matrica: mask[i, j] je True ako lijekovi na pozicijama i i j interaguju"""
+        codes = np.asarray(codes, dtype=np.int64)
+        if self.drug_count == 0:
+            return np.zeros((len(codes), len(codes)), dtype=bool)
+        known = codes >= 0
+        safe = np.where(known, codes, 0)
+        mask = (self.bits[safe[:, None], safe[None, :] >> 3] >> (safe[None, :] & 7)) & 1
+        return mask.astype(bool) & known[:, None] & known[None, :]
+
+    def memory_bytes(self) -> int:
+        return int(self.bits.nbytes)
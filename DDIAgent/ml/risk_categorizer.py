@@ -0,0 +1,125 @@
+"""
+ML: Kategorizacija tipova interakcija po pravilima iz scoring_config.json
+
+Kategorija se određuje ključnim riječima (prva kategorija čija se neka ključna riječ pojavljuje
+u tekstu tipa), a score je score te kategorije. Različitih tipova interakcija je malo (~100 na
+~220k interakcija), pa se pravila primjenjuju jednom po tipu i rezultat se proširuje na
+interakcije preko kodova tipa - nova politika bodovanja ne zahtijeva ponovno generisanje CSV-a.
+"""
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CATEGORY = 'OTHER'
+DEFAULT_SCORE = 1.0
+
+
+def build_category_matcher(categories: Dict[str, Dict[str, Any]]):
+    """
+    Jedan kompajlirani regex za sve kategorije. Svaka kategorija je lookahead alternativa
+    (?=.*(kw1|kw2)) u redoslijedu rječnika, pa regex, kao i petlja po kategorijama, vraća
+    prvu kategoriju čija se neka ključna riječ pojavljuje bilo gdje u tekstu.
+    Bez ijedne kategorije sa ključnim riječima vraća (None, []): prazan regex bi poklopio svaki tekst.
+    """
+    names = [name for name, info in categories.items() if info.get('keywords')]
+    if not names:
+        return None, names
+    alternatives = [
+        '(?=.*?(?:' + '|'.join(re.escape(keyword.lower()) for keyword in categories[name]['keywords']) + '))'
+        for name in names
+    ]
+    pattern = re.compile('|'.join(f'{alternative}(?P<c{i}>)' for i, alternative in enumerate(alternatives)),
+                         re.DOTALL)
+    return pattern, names
+
+
+def match_category(matcher, names: List[str], text: str) -> Optional[str]:
+    """Prva kategorija čija se ključna riječ pojavljuje u tekstu (malim slovima), inače None"""
+    if matcher is None:
+        return None
+    match = matcher.match(text)
+    if match is None or match.lastgroup is None:
+        return None
+    return names[int(match.lastgroup[1:])]
+
+
+def validate_categories(categories: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Provjeri kategorije iz konfiguracije: neprazan rječnik, numerički score, lista ključnih riječi
+    i bar jedna kategorija sa ključnim riječima (inače bi svaki tip bio OTHER). ValueError ako ne valja;
+    kategorija bez ključnih riječi (osim OTHER) se nikad ne poklapa, pa se samo upozorava.
+    """
+    if not isinstance(categories, dict) or not categories:
+        raise ValueError("Konfiguracija bodovanja nema kategorija")
+
+    for name, info in categories.items():
+        if not isinstance(info, dict):
+            raise ValueError(f"Kategorija {name}: definicija mora biti objekat")
+        score = info.get('score')
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            raise ValueError(f"Kategorija {name}: nedostaje numerički score")
+        keywords = info.get('keywords', [])
+        if not isinstance(keywords, list) or not all(isinstance(k, str) and k.strip() for k in keywords):
+            raise ValueError(f"Kategorija {name}: keywords mora biti lista nepraznih stringova")
+        if not keywords and name != DEFAULT_CATEGORY:
+            print(f"⚠️ Kategorija {name} nema ključnih riječi i nikad se neće dodijeliti")
+
+    if not any(info.get('keywords') for info in categories.values()):
+        raise ValueError("Nijedna kategorija nema ključnih riječi - svi tipovi bi bili OTHER")
+    return categories
+
+
+class RiskCategorizer:
+    """Pravila bodovanja: tip interakcije -> (risk_score, risk_category)"""
+
+    def __init__(self, categories: Dict[str, Dict[str, Any]]):
+        if not categories:
+            raise ValueError("Konfiguracija bodovanja nema kategorija")
+        self.categories = categories
+        self.matcher, self.matcher_categories = build_category_matcher(categories)
+
+        default = categories.get(DEFAULT_CATEGORY, {})
+        self.default_score = float(default.get('score', DEFAULT_SCORE))
+
+        # Redoslijed kategorija je dio pravila (pobjeđuje prva), pa se ključevi ne sortiraju
+        canonical = json.dumps(
+            [[name, info.get('score'), info.get('keywords', [])] for name, info in categories.items()],
+            ensure_ascii=False
+        )
+        self.version = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:8]
+
+    @classmethod
+    def from_config(cls, config_path: str) -> 'RiskCategorizer':
+        """Učitaj i provjeri kategorije iz scoring_config.json (ključ 'categories'); ValueError ako nisu ispravne"""
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError(f"Nevalidan scoring config: {config_path}")
+        return cls(validate_categories(config.get('categories')))
+
+    def categorize(self, interaction_type: str) -> Tuple[float, str]:
+        """Score i kategorija jednog tipa interakcije"""
+        category = match_category(self.matcher, self.matcher_categories, str(interaction_type).lower())
+        if category is not None:
+            return float(self.categories[category]['score']), category
+        return self.default_score, DEFAULT_CATEGORY
+
+    def categorize_types(self, type_names: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """Score-ovi (niz) i kategorije za listu tipova, jedan regex po tipu"""
+        results = [self.categorize(interaction_type) for interaction_type in type_names]
+        scores = np.array([score for score, _ in results], dtype=np.float64)
+        return scores, [category for _, category in results]
+
+    def score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Dodaj kolone risk_score i risk_category (tipovi se kategorizuju jednom, pa se proširuju kodovima)"""
+        types = df['interaction_type'].astype('category')
+        scores, categories = self.categorize_types(list(types.cat.categories))
+        codes = types.cat.codes.to_numpy()
+        return df.assign(
+            risk_score=scores[codes],
+            risk_category=np.asarray(categories, dtype=object)[codes]
+        )
@@ -1,8 +1,10 @@
 """
 ML: Scoring model za DDI interakcije
 """
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional, Iterator
+import copy
 import sys
 import os
 
@@ -26,43 +28,314 @@ except ImportError as e:
             self.risk_score = risk_score
             self.risk_category = risk_category
 
+from .interaction_store import InteractionStore, _is_mapped, estimate_lookup_bytes
+from .interaction_pack import default_pack_path, file_sha256, load_or_build
+from .shared_store import attach_store
+from .columnar_cache import MODEL_COLUMNS, RAW_COLUMNS, load_columns
+from .partner_bitsets import PartnerBitsets
+from .formulary_matrix import FormularyMatrix
+from .interaction_columns import InteractionColumns
+from .risk_categorizer import RiskCategorizer
+
 
 class ScoringModel:
     """Model za procjenu rizika interakcija"""
     
-    def __init__(self, data_path: str = "data/DDI_with_scores.csv"):
-        """Inicijalizuj model sa putanjom do podataka"""
+    # 'dict'    - originalni Python dict lookup ("a|b" -> lista dict-ova)
+    # 'compact' - InteractionStore sa cjelobrojnim kodovima i CSR susjedstvom
+    BACKENDS = ('dict', 'compact')
+    
+    # Algoritmi za pronalaženje parova terapije koji interaguju:
+    # 'pairwise'  - provjera svih n(n-1)/2 parova (sa bitsetovima jedan vektorizovan test, podrazumijevano)
+    # 'neighbors' - presjek liste susjeda svakog lijeka sa skupom terapije (sa manje strane);
+    #               zadržan radi poređenja (scripts/benchmark_scoring.py algorithms)
+    ALGORITHMS = ('pairwise', 'neighbors')
+    
+    def __init__(self, data_path: str = "data/DDI_with_scores.csv", backend: str = "compact",
+                 use_pack: bool = True, pack_path: Optional[str] = None, algorithm: str = "pairwise",
+                 shared_name: Optional[str] = None, use_bitsets: bool = True,
+                 formulary: Optional[List[str]] = None, scoring_config: Optional[str] = None):
+        """
+        Inicijalizuj model sa putanjom do podataka.
+        Compact backend sa use_pack=True otvara binarni pack (np.memmap) umjesto parsiranja CSV-a;
+        pack se automatski ponovo gradi kada se promijeni hash CSV-a.
+        shared_name: priključi se (read-only) na store koji je drugi proces objavio u shared memory;
+        ako segment ne postoji ili je za drugi dataset, model se učitava na uobičajen način.
+        algorithm: 'pairwise' ili 'neighbors' (vidi ALGORITHMS); rezultati su isti, razlikuje se samo brzina.
+        use_bitsets: bitset partnera po lijeku preskače parove koji ne interaguju jednim testom bita.
+        formulary: lista lijekova bolničkog formulara; za njih se gradi gusta N x N matrica slotova parova,
+        a parovi sa lijekovima van formulara se traže u rijetkom indeksu.
+        scoring_config: putanja do scoring_config.json; score i kategorija se tada računaju iz
+        'categories' pri učitavanju (jednom po tipu interakcije), pa data_path može biti i očišćeni
+        CSV bez risk kolona. Verzija dataseta uključuje hash pravila.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Nepoznat backend '{backend}', dozvoljeni: {', '.join(self.BACKENDS)}")
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Nepoznat algoritam '{algorithm}', dozvoljeni: {', '.join(self.ALGORITHMS)}")
+        
+        self.data_path = data_path
+        self.backend = backend
+        self.algorithm = algorithm
+        self._neighbor_sets: Optional[Dict[str, set]] = None
+        self.use_pack = use_pack and backend == 'compact'
+        self.pack_path = pack_path or default_pack_path(data_path)
+        self.shared_name = shared_name if backend == 'compact' else None
+        self.use_bitsets = use_bitsets
+        self.bitsets: Optional[PartnerBitsets] = None
+        self._category_cache = None
+        self._drug_max_scores: Optional[Dict[str, float]] = None
+        self.formulary: Optional[FormularyMatrix] = None
+        self.scoring_config = scoring_config
+        self.categorizer: Optional[RiskCategorizer] = None
+        # Profili rizika po lijeku za ovaj dataset (postavlja ih runner / ModelReloader, mijenjaju se sa modelom)
+        self.drug_profiles = None
+        self.source_version: Optional[str] = None
+        self.dataset_version: Optional[str] = None
+        self.interaction_lookup = {}
+        self.store: Optional[InteractionStore] = None
+        
         try:
-            self.df = pd.read_csv(data_path)
-            self._build_lookup()
-            print(f"✅ Scoring model učitano {len(self.df)} interakcija")
+            if scoring_config:
+                self.categorizer = RiskCategorizer.from_config(scoring_config)
+            
+            if self.shared_name and self._attach_shared():
+                self.df = pd.DataFrame()
+                source_sha256 = self._shared_sha256
+                source = f"shared memory '{self.shared_name}'"
+                self._apply_categorizer()
+            elif self.use_pack:
+                self.df = pd.DataFrame()
+                self.store, source_sha256, rebuilt = load_or_build(data_path, self.pack_path)
+                source = "novi pack" if rebuilt else "pack (memmap)"
+                self._apply_categorizer()
+            else:
+                # Samo kolone potrebne indeksu (kategorije), DataFrame se odbacuje nakon izgradnje
+                self.df, source_sha256 = load_columns(data_path, RAW_COLUMNS if self.categorizer else MODEL_COLUMNS)
+                if self.categorizer is not None:
+                    self.df = self.categorizer.score_frame(self.df)
+                self._build_index()
+                self.df = pd.DataFrame()
+                source = "kolonski keš"
+            
+            self.source_version = source_sha256[:16]
+            self.dataset_version = self._version_for(self.categorizer)
+            if self.use_bitsets:
+                self._build_bitsets()
+            if formulary:
+                self.set_formulary(formulary)
+            print(f"✅ Scoring model učitano {self.interaction_count} interakcija "
+                  f"(backend: {self.backend}, izvor: {source}, verzija: {self.dataset_version})")
         except Exception as e:
             print(f"❌ Greška pri učitavanju scoring modela: {e}")
             self.df = pd.DataFrame()
             self.interaction_lookup = {}
+            self.store = None
+            self.bitsets = None
+            self.formulary = None
+            self.dataset_version = None
+    
+    def _apply_categorizer(self):
+        """Store iz pack-a ili shared memory-ja: pravila bodovanja se primjenjuju po tipu interakcije"""
+        if self.categorizer is not None:
+            self.store = self.store.rescored(self.categorizer)
+    
+    def _version_for(self, categorizer: Optional[RiskCategorizer]) -> str:
+        """Verzija = hash izvora (+ hash pravila bodovanja), ključ keševa procjena"""
+        if categorizer is None:
+            return self.source_version
+        return f"{self.source_version}-{categorizer.version}"
+    
+    def rescored(self, categorizer: RiskCategorizer) -> 'ScoringModel':
+        """
+        Novi model sa istim interakcijama i novim pravilima bodovanja, bez ponovnog čitanja CSV-a.
+        Kodovi tipova i struktura parova se dijele sa ovim modelom; mijenjaju se samo score-ovi i
+        kategorije (jednom po tipu), pa se politika bodovanja zamjenjuje (swap_model) za djelić sekunde.
+        """
+        if self.dataset_version is None:
+            raise ValueError("Model nema učitanih interakcija")
+        
+        model = copy.copy(self)
+        model.categorizer = categorizer
+        if self.store is not None:
+            model.store = self.store.rescored(categorizer)
+        else:
+            model.interaction_lookup = self._rescore_lookup(self.interaction_lookup, categorizer)
+        model.dataset_version = model._version_for(categorizer)
+        
+        # Partneri lijekova se ne mijenjaju (bitsets, skupovi susjeda), a keševi score-ova da
+        model._category_cache = None
+        model._drug_max_scores = None
+        model.drug_profiles = None
+        if self.formulary is not None:
+            model.set_formulary(self.formulary.drug_ids)
+        return model
+    
+    @staticmethod
+    def _rescore_lookup(lookup: Dict[str, List[Dict[str, Any]]],
+                        categorizer: RiskCategorizer) -> Dict[str, List[Dict[str, Any]]]:
+        """Dict lookup sa score-ovima i kategorijama iz pravila (jednom po tipu interakcije)"""
+        type_names = list(dict.fromkeys(record['type'] for records in lookup.values() for record in records))
+        scores, categories = categorizer.categorize_types(type_names)
+        scored = dict(zip(type_names, zip(scores.tolist(), categories)))
+        return {
+            key: [
+                {'type': record['type'], 'score': scored[record['type']][0], 'category': scored[record['type']][1]}
+                for record in records
+            ]
+            for key, records in lookup.items()
+        }
+    
+    def _build_bitsets(self):
+        """Izgradi bitset partnera po lijeku iz aktivnog indeksa"""
+        if self.store is not None:
+            self.bitsets = PartnerBitsets.from_store(self.store)
+        else:
+            self.bitsets = PartnerBitsets.from_lookup(self.interaction_lookup)
+    
+    def set_formulary(self, formulary: Optional[List[str]]):
+        """Izgradi gustu matricu za listu lijekova formulara (None ili prazna lista je uklanja)"""
+        if not formulary:
+            self.formulary = None
+            return
+        
+        if self.store is not None:
+            matrix = FormularyMatrix.from_store(self.store, formulary)
+        else:
+            matrix = FormularyMatrix.from_lookup(self.interaction_lookup, formulary)
+        self.formulary = matrix
+        print(f"✅ Formular: {matrix.size} lijekova, gusta matrica {matrix.memory_bytes() / 1024:.0f} KB")
+    
+    def _attach_shared(self) -> bool:
+        """Priključi se na shared memory store; False ako nije dostupan za ovaj dataset"""
+        expected_sha256 = file_sha256(self.data_path) if os.path.exists(self.data_path) else None
+        try:
+            self.store, self._shared_sha256 = attach_store(self.shared_name, expected_sha256)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"⚠️ Shared memory store nije dostupan ({e}), učitavam lokalno")
+            return False
+        return True
+    
+    @property
+    def interaction_count(self) -> int:
+        """Broj interakcija u indeksu"""
+        if self.store is not None:
+            return self.store.interaction_count
+        return sum(len(records) for records in self.interaction_lookup.values())
+    
+    def _build_index(self):
+        """Izgradi indeks interakcija za odabrani backend"""
+        if self.backend == 'compact':
+            self.store = InteractionStore.from_dataframe(self.df)
+        else:
+            self._build_lookup()
     
     def _build_lookup(self):
-        """Kreira lookup tabelu za brzo pronalaženje"""
-        self.interaction_lookup = {}
+        """Kreira lookup tabelu za brzo pronalaženje (vektorizovano)"""
+        self.interaction_lookup = self._build_lookup_vectorized(self.df)
+    
+    @staticmethod
+    def _build_lookup_vectorized(df: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Vektorizovana izgradnja lookup tabele.
+        Normalizuje parove sa np.minimum/np.maximum, grupiše redove po paru
+        i vraća isti rječnik kao _build_lookup_iterrows (isti ključevi i redoslijed).
+        """
+        if df.empty:
+            return {}
+        
+        drug1 = df['drug1_id'].to_numpy(dtype=object)
+        drug2 = df['drug2_id'].to_numpy(dtype=object)
+        low = pd.Series(np.minimum(drug1, drug2), dtype=object)
+        high = pd.Series(np.maximum(drug1, drug2), dtype=object)
+        keys = (low + '|' + high).to_numpy()
         
-        for _, row in self.df.iterrows():
-            key = self._create_key(row['drug1_id'], row['drug2_id'])
-            if key not in self.interaction_lookup:
-                self.interaction_lookup[key] = []
+        # Grupisanje: stabilno sortiranje po kodu para čuva redoslijed redova iz CSV-a
+        pair_codes, unique_keys = pd.factorize(keys)
+        order = np.argsort(pair_codes, kind='stable')
+        counts = np.bincount(pair_codes, minlength=len(unique_keys))
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        
+        records = [
+            {'type': inter_type, 'score': score, 'category': category}
+            for inter_type, score, category in zip(
+                df['interaction_type'].to_numpy()[order].tolist(),
+                df['risk_score'].to_numpy()[order].tolist(),
+                df['risk_category'].to_numpy()[order].tolist()
+            )
+        ]
+        
+        return {
+            key: records[start:end]
+            for key, start, end in zip(unique_keys, starts.tolist(), ends.tolist())
+        }
+    
+    @classmethod
+    def _build_lookup_iterrows(cls, df: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
+        """Originalna (sporija) izgradnja lookup tabele red po red - zadržana radi poređenja"""
+        interaction_lookup = {}
+        
+        for _, row in df.iterrows():
+            key = cls._create_key(row['drug1_id'], row['drug2_id'])
+            if key not in interaction_lookup:
+                interaction_lookup[key] = []
             
-            self.interaction_lookup[key].append({
+            interaction_lookup[key].append({
                 'type': row['interaction_type'],
                 'score': row['risk_score'],
                 'category': row['risk_category']
             })
+        
+        return interaction_lookup
     
-    def _create_key(self, drug1_id: str, drug2_id: str) -> str:
+    @staticmethod
+    def _create_key(drug1_id: str, drug2_id: str) -> str:
         """Kreira normalizovani ključ za par lijekova"""
         sorted_ids = sorted([drug1_id, drug2_id])
         return f"{sorted_ids[0]}|{sorted_ids[1]}"
     
+    def memory_footprint(self) -> Dict[str, Any]:
+        """Vrati procjenu memorije indeksa interakcija za aktivni backend"""
+        if self.backend == 'compact':
+            details = self.store.memory_footprint() if self.store is not None else {'total': 0}
+            total = details['total']
+        else:
+            total = estimate_lookup_bytes(self.interaction_lookup)
+            details = {'total': total}
+        
+        if self.bitsets is not None:
+            details['partner_bitsets'] = self.bitsets.memory_bytes()
+            total += details['partner_bitsets']
+            details['total'] = total
+            if 'private' in details and not _is_mapped(self.bitsets.bits):
+                details['private'] += details['partner_bitsets']
+            elif 'mapped' in details:
+                details['mapped'] += details['partner_bitsets']
+        
+        if self.formulary is not None:
+            details['formulary_matrix'] = self.formulary.memory_bytes()
+            total += details['formulary_matrix']
+            details['total'] = total
+            if 'private' in details:
+                details['private'] += details['formulary_matrix']
+        
+        return {
+            'backend': self.backend,
+            'bytes': total,
+            'megabytes': round(total / 1024 / 1024, 2),
+            'details': details
+        }
+    
     def find_interactions(self, drug1_id: str, drug2_id: str) -> List[DrugInteraction]:
         """Pronađi interakcije između dva lijeka"""
+        # Brza negativna provjera: par bez interakcija ne gradi ključ niti pretražuje indeks
+        if self.bitsets is not None and not self.bitsets.may_interact(drug1_id, drug2_id):
+            return []
+        
+        if self.backend == 'compact':
+            return self._find_interactions_compact(drug1_id, drug2_id)
+        
         key = self._create_key(drug1_id, drug2_id)
         
         if key not in self.interaction_lookup:
@@ -80,37 +353,632 @@ class ScoringModel:
         
         return interactions
     
+    def _find_interactions_compact(self, drug1_id: str, drug2_id: str) -> List[DrugInteraction]:
+        """Pronađi interakcije kroz kompaktni InteractionStore"""
+        store = self.store
+        if store is None:
+            return []
+        
+        code1 = store.code_of(drug1_id)
+        code2 = store.code_of(drug2_id)
+        if code1 is None or code2 is None:
+            return []
+        
+        pair = store.find_pair(code1, code2)
+        if pair < 0:
+            return []
+        
+        interactions = []
+        for index in store.pair_interactions(pair):
+            inter_data = store.interaction_record(index)
+            interactions.append(DrugInteraction(
+                drug1_id=drug1_id,
+                drug2_id=drug2_id,
+                interaction_type=inter_data['type'],
+                risk_score=inter_data['score'],
+                risk_category=inter_data['category']
+            ))
+        
+        return interactions
+    
+    def therapy_pairs(self, drug_ids: List[str], algorithm: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parovi pozicija (i < j) koje treba provjeriti, leksikografski sortirani.
+        'pairwise' vraća sve parove; 'neighbors' samo parove koji stvarno interaguju.
+        """
+        algorithm = algorithm or self.algorithm
+        if algorithm == 'pairwise':
+            positions = self._formulary_positions(drug_ids)
+            if positions is not None:
+                # Cijela terapija je u formularu: jedan blok guste matrice slotova (np.ix_)
+                return np.nonzero(np.triu(self.formulary.pair_mask(positions), k=1))
+            if self.bitsets is not None:
+                # Svi parovi u jednom testu bitova; np.nonzero vraća (i, j) u redoslijedu petlje
+                mask = np.triu(self.bitsets.pair_mask(self.bitsets.codes_of(drug_ids)), k=1)
+                return np.nonzero(mask)
+            return np.triu_indices(len(drug_ids), k=1)
+        
+        if self.backend == 'compact':
+            pairs = self._neighbor_pairs_compact(drug_ids)
+        else:
+            pairs = self._neighbor_pairs_dict(drug_ids)
+        
+        pairs.sort()
+        if not pairs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        left, right = np.array(pairs, dtype=np.int64).T
+        return left, right
+    
+    def _formulary_positions(self, drug_ids: List[str]) -> Optional[np.ndarray]:
+        """Pozicije lijekova u formularu ili None ako formular nije postavljen ili neki lijek nije u njemu"""
+        if self.formulary is None:
+            return None
+        positions = self.formulary.positions_of(drug_ids)
+        return positions if (positions >= 0).all() else None
+    
+    @staticmethod
+    def _expand_positions(positions: Dict[Any, List[int]], drug, partner, pairs: List[Tuple[int, int]]):
+        """Dodaj sve parove pozicija za par lijekova (duplikati lijekova daju više parova)"""
+        for i in positions[drug]:
+            for j in positions[partner]:
+                if i < j or (i > j and drug != partner):
+                    pairs.append((min(i, j), max(i, j)))
+    
+    def _neighbor_pairs_compact(self, drug_ids: List[str]) -> List[Tuple[int, int]]:
+        """Presjek CSR reda svakog lijeka sa sortiranim kodovima terapije"""
+        store = self.store
+        if store is None:
+            return []
+        
+        codes = store.codes_of(drug_ids)
+        positions: Dict[int, List[int]] = {}
+        for position, code in enumerate(codes.tolist()):
+            if code >= 0:
+                positions.setdefault(code, []).append(position)
+        
+        therapy_codes = np.array(sorted(positions), dtype=np.int64)
+        pairs = []
+        for code in therapy_codes.tolist():
+            row = store.neighbors[store.indptr[code]:store.indptr[code + 1]]
+            
+            # Iteriraj sa manje strane: susjedi u terapiji ili lijekovi terapije u susjedima
+            if len(row) <= len(therapy_codes):
+                candidates = row[row >= code]
+                found = therapy_codes[np.minimum(np.searchsorted(therapy_codes, candidates), len(therapy_codes) - 1)]
+                hits = candidates[found == candidates]
+            else:
+                candidates = therapy_codes[therapy_codes >= code]
+                found = row[np.minimum(np.searchsorted(row, candidates), len(row) - 1)]
+                hits = candidates[found == candidates]
+            
+            # Svaki neuređeni par jednom: partner >= code
+            for partner in hits.tolist():
+                self._expand_positions(positions, code, partner, pairs)
+        
+        return pairs
+    
+    def _get_neighbor_sets(self) -> Dict[str, set]:
+        """Skupovi partnera po lijeku za dict backend (lijeno, iz ključeva lookup-a)"""
+        if self._neighbor_sets is None:
+            neighbor_sets: Dict[str, set] = {}
+            for key in self.interaction_lookup:
+                drug1_id, drug2_id = key.split('|')
+                neighbor_sets.setdefault(drug1_id, set()).add(drug2_id)
+                neighbor_sets.setdefault(drug2_id, set()).add(drug1_id)
+            self._neighbor_sets = neighbor_sets
+        return self._neighbor_sets
+    
+    def _neighbor_pairs_dict(self, drug_ids: List[str]) -> List[Tuple[int, int]]:
+        """Presjek skupa susjeda (izgrađenog iz ključeva lookup-a) sa skupom terapije"""
+        self._get_neighbor_sets()
+        
+        positions: Dict[str, List[int]] = {}
+        for position, drug_id in enumerate(drug_ids):
+            positions.setdefault(drug_id, []).append(position)
+        therapy_set = set(positions)
+        
+        pairs = []
+        for drug_id in therapy_set:
+            # set.intersection iterira kroz manji od dva skupa
+            for partner in therapy_set.intersection(self._neighbor_sets.get(drug_id, ())):
+                if partner >= drug_id:
+                    self._expand_positions(positions, drug_id, partner, pairs)
+        
+        return pairs
+    
+    def interaction_columns(self, drug_ids: List[str],
+                            pairs: Optional[List[Tuple[int, int]]] = None) -> InteractionColumns:
+        """
+        Sve interakcije terapije kao kolone (pozicije lijekova, kod tipa, score, kod kategorije),
+        redoslijedom parova iz therapy_pairs i interakcija unutar para - isti redoslijed kao
+        find_interactions u dvostrukoj petlji. `pairs` su (i, j) indeksi iz calculate_therapy_summary.
+        """
+        if pairs is None:
+            left, right = self.therapy_pairs(drug_ids)
+        elif pairs:
+            left, right = np.array(pairs, dtype=np.int64).T
+        else:
+            left = right = np.zeros(0, dtype=np.int64)
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        
+        if self.backend == 'compact':
+            return self._interaction_columns_compact(drug_ids, left, right)
+        return self._interaction_columns_dict(drug_ids, left, right)
+    
+    def _interaction_columns_compact(self, drug_ids: List[str], left: np.ndarray,
+                                     right: np.ndarray) -> InteractionColumns:
+        """Vektorizovano: parovi -> searchsorted nad indeksom -> raspon interakcija svakog para"""
+        store = self.store
+        if store is None or len(left) == 0:
+            return InteractionColumns.empty(drug_ids, DrugInteraction)
+        
+        codes = store.codes_of(list(drug_ids))
+        pair_index = store.find_pairs(codes[left], codes[right])
+        hits = np.flatnonzero(pair_index >= 0)
+        pair_index, left, right = pair_index[hits], left[hits], right[hits]
+        
+        pair_starts = store.pair_indptr[pair_index].astype(np.int64)
+        pair_lengths = store.pair_indptr[pair_index + 1].astype(np.int64) - pair_starts
+        interaction_index = (np.repeat(pair_starts - (np.cumsum(pair_lengths) - pair_lengths), pair_lengths)
+                             + np.arange(int(pair_lengths.sum()), dtype=np.int64))
+        
+        return InteractionColumns(
+            drug_ids,
+            np.repeat(left, pair_lengths),
+            np.repeat(right, pair_lengths),
+            store.inter_type[interaction_index],
+            store.score_values[store.inter_score_code[interaction_index]],
+            store.inter_category[interaction_index],
+            store.type_names, store.category_names, DrugInteraction
+        )
+    
+    def _interaction_columns_dict(self, drug_ids: List[str], left: np.ndarray,
+                                  right: np.ndarray) -> InteractionColumns:
+        """Kolone iz dict lookup-a; tipovi i kategorije se kodiraju lokalnim tabelama"""
+        type_codes: Dict[str, int] = {}
+        category_codes: Dict[str, int] = {}
+        rows = []
+        for i, j in zip(left.tolist(), right.tolist()):
+            if self.bitsets is not None and not self.bitsets.may_interact(drug_ids[i], drug_ids[j]):
+                continue
+            for record in self.interaction_lookup.get(self._create_key(drug_ids[i], drug_ids[j]), ()):
+                rows.append((
+                    i, j,
+                    type_codes.setdefault(record['type'], len(type_codes)),
+                    record['score'],
+                    category_codes.setdefault(record['category'], len(category_codes))
+                ))
+        
+        if not rows:
+            return InteractionColumns.empty(drug_ids, DrugInteraction)
+        
+        lefts, rights, types, scores, categories = zip(*rows)
+        return InteractionColumns(
+            drug_ids,
+            np.array(lefts, dtype=np.int64),
+            np.array(rights, dtype=np.int64),
+            np.array(types, dtype=np.int64),
+            np.array(scores, dtype=np.float64),
+            np.array(categories, dtype=np.int64),
+            list(type_codes), list(category_codes), DrugInteraction
+        )
+    
+    @staticmethod
+    def _risk_report(drug_count: int, interactions: InteractionColumns) -> Dict[str, Any]:
+        """Izvještaj rizika iz kolona; kritične/visoke/kategorije su pogledi nad istim nizovima"""
+        count = len(interactions)
+        scores = interactions.score_values()
+        total_risk_score = float(scores.sum()) if count else 0
+        
+        return {
+            'drug_count': drug_count,
+            'interaction_count': count,
+            'total_risk_score': total_risk_score,
+            'average_risk': total_risk_score / count if count else 0,
+            'max_risk': float(scores.max()) if count else 0,
+            'critical_interactions': interactions.at_least(4),
+            'high_risk_interactions': interactions.at_least(3),
+            'categories': interactions.by_category(),
+            'all_interactions': interactions
+        }
+    
     def calculate_therapy_risk(self, drug_ids: List[str]) -> Dict[str, Any]:
-        """Izračunaj ukupni rizik terapije sa više lijekova"""
-        all_interactions = []
-        total_risk_score = 0
+        """
+        Izračunaj ukupni rizik terapije sa više lijekova.
+        Liste interakcija su InteractionColumns (DrugInteraction objekti se kreiraju pri čitanju).
+        """
+        return self._risk_report(len(drug_ids), self.interaction_columns(drug_ids))
+    
+    def calculate_therapy_risk_many(self, drug_id_lists: List[List[str]]) -> List[Dict[str, Any]]:
+        """
+        Batch procjena rizika za više terapija odjednom (npr. noćno re-scoring aktivnih terapija).
+        Svi parovi svih terapija se skupe u jedan niz i razriješe jednim vektorizovanim searchsorted-om
+        nad cjelobrojnim indeksom; interakcije svih terapija su jedne kolone, a izvještaj svake
+        terapije je pogled na njen segment.
+        Vraća iste dict-ove kao calculate_therapy_risk za svaku terapiju.
+        """
+        if self.backend != 'compact' or self.store is None:
+            return [self.calculate_therapy_risk(drug_ids) for drug_ids in drug_id_lists]
+        
+        therapy_count = len(drug_id_lists)
+        if therapy_count == 0:
+            return []
+        
+        # 1. Svi lijekovi u jednom nizu + globalni indeksi parova (i < j unutar iste terapije)
+        sizes = np.array([len(drug_ids) for drug_ids in drug_id_lists], dtype=np.int64)
+        offsets = np.cumsum(sizes) - sizes
+        flat_ids = [drug_id for drug_ids in drug_id_lists for drug_id in drug_ids]
         
-        # Pronađi sve interakcije između svih parova lijekova
-        for i in range(len(drug_ids)):
-            for j in range(i + 1, len(drug_ids)):
-                interactions = self.find_interactions(drug_ids[i], drug_ids[j])
-                all_interactions.extend(interactions)
-                total_risk_score += sum(inter.risk_score for inter in interactions)
+        left_parts, right_parts = [], []
+        triu_cache = {}
+        for therapy, size in enumerate(sizes.tolist()):
+            if size < 2:
+                continue
+            if size not in triu_cache:
+                triu_cache[size] = np.triu_indices(size, k=1)
+            left, right = triu_cache[size]
+            left_parts.append(left + offsets[therapy])
+            right_parts.append(right + offsets[therapy])
         
-        # Izračunaj maksimalni i prosječni rizik
-        max_risk = max((inter.risk_score for inter in all_interactions), default=0)
-        avg_risk = total_risk_score / len(all_interactions) if all_interactions else 0
+        if left_parts:
+            left = np.concatenate(left_parts)
+            right = np.concatenate(right_parts)
+        else:
+            left = right = np.zeros(0, dtype=np.int64)
         
-        # Grupiši interakcije po kategorijama
-        categories = {}
-        for inter in all_interactions:
-            if inter.risk_category not in categories:
-                categories[inter.risk_category] = []
-            categories[inter.risk_category].append(inter)
+        # 2. Interakcije svih terapija odjednom (redoslijed: terapija, par, interakcija unutar para)
+        interactions = self._interaction_columns_compact(flat_ids, left, right)
+        
+        # 3. Segment svake terapije (pozicija lijeka određuje vlasnika interakcije)
+        owner = np.searchsorted(offsets, interactions.left, side='right') - 1
+        counts = np.bincount(owner, minlength=therapy_count)
+        starts = np.cumsum(counts) - counts
+        
+        return [
+            self._risk_report(int(sizes[therapy]), interactions.select(
+                np.arange(starts[therapy], starts[therapy] + counts[therapy], dtype=np.int64)))
+            for therapy in range(therapy_count)
+        ]
+    
+    def calculate_therapy_summary(self, drug_ids: List[str]) -> Dict[str, Any]:
+        """
+        Brzi sažetak rizika terapije bez kreiranja DrugInteraction objekata.
+        Koristi tabelu sažetaka po paru (compact backend) ili zapise iz dict lookup-a.
+        `pairs` su (i, j) indeksi u drug_ids (redoslijed kao u calculate_therapy_risk) za parove
+        koji interaguju - koriste se za kasniju materijalizaciju kroz interaction_columns.
+        """
+        positions = self._formulary_positions(drug_ids) if self.algorithm == 'pairwise' else None
+        if positions is not None:
+            # Cijela terapija je u formularu: parovi i sažeci iz jednog bloka matrice slotova
+            pair_rows = self.formulary.therapy_rows(positions)
+        else:
+            left, right = self.therapy_pairs(drug_ids)
+            pair_rows = self.summarize_pairs(drug_ids, left, right)
+        
+        pairs = []
+        total_risk_score = 0
+        max_risk = 0
+        interaction_count = critical_count = severe_count = high_risk_count = 0
+        category_names = set()
+        
+        for i, j, pair_sum, pair_max, count, critical, severe, high_risk, categories in pair_rows:
+            pairs.append((i, j))
+            total_risk_score += pair_sum
+            max_risk = max(max_risk, pair_max)
+            interaction_count += count
+            critical_count += critical
+            severe_count += severe
+            high_risk_count += high_risk
+            category_names.update(categories)
         
         return {
             'drug_count': len(drug_ids),
-            'interaction_count': len(all_interactions),
+            'interaction_count': interaction_count,
             'total_risk_score': total_risk_score,
-            'average_risk': avg_risk,
+            'average_risk': total_risk_score / interaction_count if interaction_count else 0,
             'max_risk': max_risk,
-            'critical_interactions': [inter for inter in all_interactions if inter.risk_score >= 4],
-            'high_risk_interactions': [inter for inter in all_interactions if inter.risk_score >= 3],
-            'categories': categories,
-            'all_interactions': all_interactions
-        }
\ No newline at end of file
+            'critical_count': critical_count,      # score >= 4.5 (DrugInteraction.is_critical)
+            'severe_count': severe_count,          # score >= 4 (critical_interactions u calculate_therapy_risk)
+            'high_risk_count': high_risk_count,    # score >= 3
+            'categories': sorted(category_names),   # isti redoslijed kao by_category() punog izvještaja
+            'pairs': pairs,
+            'dataset_version': self.dataset_version
+        }
+    
+    def summarize_pairs(self, drug_ids: List[str], left, right) -> Iterator[Tuple]:
+        """
+        Sažeci za zadane parove (drug_ids[left[k]], drug_ids[right[k]]), samo za parove koji interaguju.
+        Svaki red: (i, j, suma, max, broj, kritične, ozbiljne, visoko rizične, kategorije).
+        """
+        if self.formulary is not None:
+            return self._summarize_pairs_formulary(drug_ids, left, right)
+        return self._summarize_pairs_sparse(drug_ids, left, right)
+    
+    def _summarize_pairs_sparse(self, drug_ids: List[str], left, right):
+        """Sažeci parova iz rijetkog indeksa aktivnog backend-a"""
+        if self.backend == 'compact':
+            return self._summarize_pairs_compact(drug_ids, left, right)
+        return self._summarize_pairs_dict(drug_ids, left, right)
+    
+    def _summarize_pairs_formulary(self, drug_ids: List[str], left, right):
+        """
+        Parovi čija su oba lijeka u formularu čitaju se preko matrice slotova, ostali iz rijetkog indeksa.
+        Redovi se spajaju tako da redoslijed ostane isti kao u ulazu.
+        """
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        if len(left) == 0:
+            return iter(())
+        
+        positions = self.formulary.positions_of(drug_ids)
+        dense = (positions[left] >= 0) & (positions[right] >= 0)
+        dense_index = np.flatnonzero(dense)
+        hits, summaries = self.formulary.summarize(positions[left[dense_index]], positions[right[dense_index]])
+        rows = [
+            (k, (int(left[k]), int(right[k])) + summary)
+            for k, summary in zip(dense_index[hits].tolist(), summaries)
+        ]
+        
+        sparse_index = np.flatnonzero(~dense)
+        if len(sparse_index):
+            # Rijetki redovi dolaze redoslijedom ulaza, pa se njihov k nalazi jednim prolazom
+            sparse_pairs = list(zip(left[sparse_index].tolist(), right[sparse_index].tolist()))
+            cursor = 0
+            for row in self._summarize_pairs_sparse(drug_ids, left[sparse_index], right[sparse_index]):
+                while sparse_pairs[cursor] != (row[0], row[1]):
+                    cursor += 1
+                rows.append((int(sparse_index[cursor]), row))
+                cursor += 1
+            rows.sort(key=lambda item: item[0])
+        
+        return (row for _, row in rows)
+    
+    def _summarize_pairs_compact(self, drug_ids: List[str], left, right):
+        """Sažeci parova iz InteractionStore-a (vektorizovano traženje svih parova)"""
+        store = self.store
+        if store is None or len(left) == 0:
+            return iter(())
+        
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        codes = store.codes_of(drug_ids)
+        pair_index = store.find_pairs(codes[left], codes[right])
+        hits = np.flatnonzero(pair_index >= 0)
+        pair_index = pair_index[hits]
+        
+        return zip(
+            left[hits].tolist(),
+            right[hits].tolist(),
+            store.pair_sum[pair_index].tolist(),
+            store.score_values[store.pair_max_code[pair_index]].tolist(),
+            store.pair_interaction_count[pair_index].tolist(),
+            store.pair_critical[pair_index].tolist(),
+            store.pair_severe[pair_index].tolist(),
+            store.pair_high_risk[pair_index].tolist(),
+            [store.category_names_from_mask(int(mask)) for mask in store.pair_category_mask[pair_index]]
+        )
+    
+    def _summarize_pairs_dict(self, drug_ids: List[str], left, right):
+        """Sažeci parova iz dict lookup-a (bez kreiranja DrugInteraction objekata)"""
+        for i, j in zip(list(left), list(right)):
+            records = self.interaction_lookup.get(self._create_key(drug_ids[i], drug_ids[j]))
+            if not records:
+                continue
+            
+            scores = [record['score'] for record in records]
+            categories = []
+            for record in records:
+                if record['category'] not in categories:
+                    categories.append(record['category'])
+            
+            yield (
+                int(i), int(j), sum(scores), max(scores), len(scores),
+                sum(1 for score in scores if score >= InteractionStore.CRITICAL_SCORE),
+                sum(1 for score in scores if score >= InteractionStore.SEVERE_SCORE),
+                sum(1 for score in scores if score >= InteractionStore.HIGH_RISK_SCORE),
+                categories
+            )
+    
+    def iter_interactions(self, drug_ids: List[str], pairs: List[Tuple[int, int]]) -> Iterator[DrugInteraction]:
+        """Lijeno materijalizuj DrugInteraction objekte za parove iz calculate_therapy_summary"""
+        for i, j in pairs:
+            yield from self.find_interactions(drug_ids[i], drug_ids[j])
+    
+    def _get_drug_max_scores(self) -> Dict[str, float]:
+        """Najveći score interakcije po lijeku (lijeno, jednom po modelu)"""
+        if self._drug_max_scores is None:
+            if self.store is not None:
+                store = self.store
+                pair_max = store.score_values[store.pair_max_code] if store.pair_count else np.zeros(0)
+                max_scores = np.zeros(store.drug_count, dtype=np.float64)
+                np.maximum.at(max_scores, store.pair_low.astype(np.int64), pair_max)
+                np.maximum.at(max_scores, store.pair_high.astype(np.int64), pair_max)
+                self._drug_max_scores = dict(zip(store.drug_ids, max_scores.tolist()))
+            else:
+                max_scores: Dict[str, float] = {}
+                for key, records in self.interaction_lookup.items():
+                    pair_max = max(record['score'] for record in records)
+                    for drug_id in key.split('|'):
+                        max_scores[drug_id] = max(max_scores.get(drug_id, 0.0), pair_max)
+                self._drug_max_scores = max_scores
+        return self._drug_max_scores
+    
+    def _pair_max_score(self, drug1_id: str, drug2_id: str) -> float:
+        """Najveći score interakcija para (0 ako par ne interaguje)"""
+        if self.bitsets is not None and not self.bitsets.may_interact(drug1_id, drug2_id):
+            return 0.0
+        
+        if self.store is not None:
+            code1, code2 = self.store.code_of(drug1_id), self.store.code_of(drug2_id)
+            if code1 is None or code2 is None:
+                return 0.0
+            pair = self.store.find_pair(code1, code2)
+            return float(self.store.score_values[self.store.pair_max_code[pair]]) if pair >= 0 else 0.0
+        
+        records = self.interaction_lookup.get(self._create_key(drug1_id, drug2_id))
+        return max(record['score'] for record in records) if records else 0.0
+    
+    def find_critical_pair(self, drug_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Early-exit skeniranje: prvi par sa kritičnom interakcijom (score >= 4.5) ili None.
+        Par ne može biti kritičan ako bilo koji od lijekova nema kritičnu interakciju, pa se
+        provjeravaju samo takvi lijekovi, redom po opadajućem najvećem score-u, i staje se
+        na prvom kritičnom paru - bez punog prolaza kroz sve parove.
+        """
+        max_scores = self._get_drug_max_scores()
+        candidates = [
+            drug_id for drug_id in dict.fromkeys(drug_ids)
+            if max_scores.get(drug_id, 0.0) >= InteractionStore.CRITICAL_SCORE
+        ]
+        candidates.sort(key=lambda drug_id: max_scores[drug_id], reverse=True)
+        
+        for position, drug1_id in enumerate(candidates):
+            for drug2_id in candidates[position + 1:]:
+                score = self._pair_max_score(drug1_id, drug2_id)
+                if score >= InteractionStore.CRITICAL_SCORE:
+                    return {'drug1_id': drug1_id, 'drug2_id': drug2_id, 'risk_score': score}
+        return None
+    
+    def _category_table(self) -> Tuple[List[str], Dict[str, int], np.ndarray]:
+        """
+        (imena kategorija, bitmaska kategorija po lijeku, najveći score po kategoriji).
+        Compact backend ih ima iz store-a; za dict backend se grade lijeno iz lookup-a.
+        """
+        if self.store is not None:
+            return self.store.category_names, None, self.store.category_max_score
+        
+        if self._category_cache is None:
+            category_names = sorted({
+                record['category'] for records in self.interaction_lookup.values() for record in records
+            })
+            bit_of = {name: bit for bit, name in enumerate(category_names)}
+            max_score = np.zeros(len(category_names), dtype=np.float64)
+            drug_masks: Dict[str, int] = {}
+            for key, records in self.interaction_lookup.items():
+                mask = 0
+                for record in records:
+                    bit = bit_of[record['category']]
+                    mask |= 1 << bit
+                    max_score[bit] = max(max_score[bit], record['score'])
+                for drug_id in key.split('|'):
+                    drug_masks[drug_id] = drug_masks.get(drug_id, 0) | mask
+            self._category_cache = (category_names, drug_masks, max_score)
+        return self._category_cache
+    
+    def drug_category_masks(self, drug_ids: List[str]) -> np.ndarray:
+        """Bitmaske kategorija za listu lijekova (0 za lijekove bez interakcija)"""
+        if self.store is not None:
+            codes = self.store.codes_of(drug_ids)
+            masks = np.zeros(len(drug_ids), dtype=np.uint64)
+            known = codes >= 0
+            masks[known] = self.store.drug_category_mask[codes[known]]
+            return masks
+        
+        _, drug_masks, _ = self._category_table()
+        return np.array([drug_masks.get(drug_id, 0) for drug_id in drug_ids], dtype=np.uint64)
+    
+    def detect_category_stacking(self, drug_ids: List[str], min_drugs: int = 3,
+                                 categories: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Gomilanje kategorija: kategorije u čijim interakcijama učestvuje bar `min_drugs` različitih
+        lijekova terapije (npr. tri lijeka koji produžavaju QTc). O(n): bitmaske lijekova se
+        razlože u bitove i saberu po kategoriji (popcount po koloni).
+        """
+        unique_ids = list(dict.fromkeys(drug_ids))
+        category_names, _, max_score = self._category_table()
+        if len(unique_ids) < min_drugs or not category_names:
+            return []
+        
+        masks = self.drug_category_masks(unique_ids)
+        bits = (masks[:, None] >> np.arange(len(category_names), dtype=np.uint64)) & np.uint64(1)
+        counts = bits.sum(axis=0)
+        
+        findings = []
+        for bit in np.flatnonzero(counts >= min_drugs).tolist():
+            name = category_names[bit]
+            if categories is not None and name not in categories:
+                continue
+            findings.append({
+                'category': name,
+                'drug_count': int(counts[bit]),
+                'drug_ids': [drug_id for drug_id, has in zip(unique_ids, bits[:, bit].tolist()) if has],
+                'category_score': float(max_score[bit])
+            })
+        
+        # Najopasnije kategorije prve
+        findings.sort(key=lambda finding: (-finding['category_score'], -finding['drug_count']))
+        return findings
+    
+    def score_candidates(self, partner_ids: List[str], candidate_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Za svakog kandidata: interakcije koje bi dodao uz lijekove `partner_ids`.
+        Ne poziva find_interactions po kandidatu - prolazi kroz susjede partnera (CSR redovi)
+        i akumulira sažetke parova u nizove po kodu lijeka, pa je cijena O(zbir stepena partnera).
+        Vraća nizove poravnate sa candidate_ids: total, max, count, critical (score >= 4.5), known.
+        """
+        partner_ids = list(dict.fromkeys(partner_ids))
+        if self.store is not None:
+            return self._score_candidates_compact(partner_ids, candidate_ids)
+        return self._score_candidates_dict(partner_ids, candidate_ids)
+    
+    def _score_candidates_compact(self, partner_ids: List[str], candidate_ids: List[str]) -> Dict[str, np.ndarray]:
+        store = self.store
+        n = store.drug_count
+        codes = store.codes_of(partner_ids)
+        codes = codes[codes >= 0]
+        
+        # Indeksi svih ivica partnera (spojeni CSR redovi)
+        starts = store.indptr[codes].astype(np.int64)
+        lengths = store.indptr[codes + 1].astype(np.int64) - starts
+        edge_count = int(lengths.sum())
+        row_offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        edges = row_offsets + np.arange(edge_count, dtype=np.int64)
+        
+        partners = store.neighbors[edges]
+        pairs = store.neighbor_pair[edges]
+        total = np.bincount(partners, weights=store.pair_sum[pairs], minlength=n)
+        count = np.bincount(partners, weights=store.pair_interaction_count[pairs], minlength=n)
+        critical = np.bincount(partners, weights=store.pair_critical[pairs], minlength=n)
+        maximum = np.zeros(n, dtype=np.float64)
+        np.maximum.at(maximum, partners, store.score_values[store.pair_max_code[pairs]])
+        
+        candidate_codes = store.codes_of(candidate_ids)
+        known = candidate_codes >= 0
+        safe = np.where(known, candidate_codes, 0)
+        
+        def gather(values, dtype):
+            result = np.zeros(len(candidate_ids), dtype=dtype)
+            if n:
+                result[known] = values[safe[known]]
+            return result
+        
+        return {
+            'total': gather(total, np.float64),
+            'max': gather(maximum, np.float64),
+            'count': gather(count, np.int64),
+            'critical': gather(critical, np.int64),
+            'known': known
+        }
+    
+    def _score_candidates_dict(self, partner_ids: List[str], candidate_ids: List[str]) -> Dict[str, np.ndarray]:
+        neighbor_sets = self._get_neighbor_sets()
+        accumulated: Dict[str, List[float]] = {}
+        for partner in partner_ids:
+            for drug_id in neighbor_sets.get(partner, ()):
+                scores = [record['score'] for record in self.interaction_lookup[self._create_key(partner, drug_id)]]
+                entry = accumulated.setdefault(drug_id, [0.0, 0.0, 0, 0])
+                entry[0] += sum(scores)
+                entry[1] = max(entry[1], max(scores))
+                entry[2] += len(scores)
+                entry[3] += sum(1 for score in scores if score >= InteractionStore.CRITICAL_SCORE)
+        
+        empty = (0.0, 0.0, 0, 0)
+        rows = [accumulated.get(drug_id, empty) for drug_id in candidate_ids]
+        return {
+            'total': np.array([row[0] for row in rows], dtype=np.float64),
+            'max': np.array([row[1] for row in rows], dtype=np.float64),
+            'count': np.array([row[2] for row in rows], dtype=np.int64),
+            'critical': np.array([row[3] for row in rows], dtype=np.int64),
+            'known': np.array([drug_id in neighbor_sets for drug_id in candidate_ids], dtype=bool)
+        }
@@ -0,0 +1,103 @@
+"""
+ML: Dijeljenje InteractionStore-a između procesa kroz multiprocessing.shared_memory
+
+Jedan loader proces objavljuje kompaktne nizove u imenovani segment (isti raspored kao pack fajl),
+a ScoringModel u web worker procesima se na njega priključuje bez kopiranja.
+Segment nosi i izvedene sažetke i bitset partnera, pa priključeni procesi ništa ne preračunavaju.
+Priključeni procesi mapiraju segment samo za čitanje.
+"""
+import mmap
+import os
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .interaction_store import InteractionStore
+from .interaction_pack import header_from_buffer, pack_layout, store_from_buffer, write_pack_into
+
+DEFAULT_SHARED_NAME = "ddi_interactions"
+
+# Linux izlaže POSIX shared memory segmente kao fajlove
+SHM_DIR = "/dev/shm"
+
+
+def _attach_segment(name: str):
+    """
+    Mapiraj postojeći segment samo za čitanje.
+    Ne koristi SharedMemory jer bi je resource tracker worker procesa obrisao kada worker
+    završi (Python < 3.13), a mapiranje bi bilo i za pisanje.
+
+    - Linux: POSIX segment je fajl u /dev/shm, pa je dovoljan os.open + mmap ACCESS_READ
+    - ostali POSIX sistemi (macOS): shm_open iz CPython-ovog internog modula _posixshmem
+      (isti koji koristi multiprocessing.shared_memory); ako ga nema, ValueError i model se učitava lokalno
+    - Windows: veličina iz privremenog handle-a, zatim read-only mapiranje preko tagname
+    """
+    if os.name != 'posix':
+        probe = shared_memory.SharedMemory(name=name, create=False)
+        size = probe.size
+        probe.close()
+        return mmap.mmap(-1, size, tagname=name, access=mmap.ACCESS_READ)
+
+    shm_path = os.path.join(SHM_DIR, name)
+    if os.path.isdir(SHM_DIR):
+        fd = os.open(shm_path, os.O_RDONLY)
+    else:
+        try:
+            import _posixshmem
+        except ImportError:
+            raise ValueError("Read-only priključivanje na shared memory nije podržano na ovoj platformi")
+        fd = _posixshmem.shm_open("/" + name, os.O_RDONLY, mode=0o600)
+    try:
+        return mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+
+def publish_store(store: InteractionStore, source_sha256: str, name: str = DEFAULT_SHARED_NAME,
+                  source_path: Optional[str] = None) -> shared_memory.SharedMemory:
+    """
+    Objavi store u imenovani shared memory segment.
+    Postojeći segment istog imena se zamjenjuje (procesi koji su već priključeni zadržavaju stari).
+    Pozivalac je vlasnik segmenta: mora ga zadržati živim i na kraju pozvati unlink_store.
+    """
+    layout = pack_layout(store, source_sha256, source_path)
+    try:
+        segment = shared_memory.SharedMemory(name=name, create=True, size=layout['size'])
+    except FileExistsError:
+        unlink_store(name)
+        segment = shared_memory.SharedMemory(name=name, create=True, size=layout['size'])
+
+    write_pack_into(segment.buf, layout)
+    return segment
+
+
+def attach_store(name: str = DEFAULT_SHARED_NAME,
+                 expected_sha256: Optional[str] = None) -> Tuple[InteractionStore, str]:
+    """
+    Priključi se na objavljeni store (read-only). Vraća (store, sha256 izvora).
+    Nizovi store-a drže referencu na mapiranje, pa ono živi dok se store koristi.
+    FileNotFoundError ako segment ne postoji, ValueError ako je nevalidan ili za drugi CSV.
+    """
+    segment = _attach_segment(name)
+    header = header_from_buffer(segment)
+    if header is None:
+        raise ValueError(f"Shared memory segment '{name}' nema validan header")
+
+    if expected_sha256 is not None and header['source_sha256'] != expected_sha256:
+        raise ValueError(f"Shared memory segment '{name}' je objavljen za drugi dataset")
+
+    buffer = np.frombuffer(segment, dtype=np.uint8)
+    buffer.flags.writeable = False
+    return store_from_buffer(buffer, header), header['source_sha256']
+
+
+def unlink_store(name: str = DEFAULT_SHARED_NAME) -> bool:
+    """Obriši imenovani segment (ako postoji)"""
+    try:
+        segment = shared_memory.SharedMemory(name=name, create=False)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    segment.unlink()
+    return True
@@ -0,0 +1,201 @@
+"""
+BENCHMARK: Latencija čitanja SQLite baze dok agent piše
+
+Jedna nit glumi agent_background_worker (ažurira risk_history terapije i dodaje upozorenja,
+commit po tick-u), a više niti glumi Flask requeste (/api/therapies, /therapy/<id>).
+Poredi stara podešavanja (rollback journal, synchronous=FULL) sa Database.DEFAULT_PRAGMAS (WAL).
+Svaka konfiguracija radi na novoj privremenoj bazi. Pisac podrazumijevano piše u fiksnom ritmu
+(--write-interval), pa se čitanja porede pod istim opterećenjem; 0 = pisac bez pauze.
+
+Pokretanje (iz root foldera projekta):
+    python scripts/benchmark_database.py
+    python scripts/benchmark_database.py --readers 8 --duration 10 --therapies 2000
+    python scripts/benchmark_database.py --write-interval 0 --rounds 5
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.exc import OperationalError
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from DDIAgent.infrastructure.database import Database, TherapyDB, WarningDB
+
+# Podešavanja prije WAL-a (SQLite podrazumijevano; busy timeout ostaje onaj iz sqlite3 drivera)
+LEGACY_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'busy_timeout': None,
+    'mmap_size': None,
+    'cache_size': None,
+}
+
+CONFIGURATIONS = {
+    'legacy': LEGACY_PRAGMAS,
+    'tuned': {},
+}
+
+
+def seed_therapies(db: Database, count: int):
+    """Kreiraj `count` aktivnih terapija sa po 5 lijekova"""
+    with db.get_session() as session:
+        session.add_all([
+            TherapyDB(
+                patient_id=f"BENCH_{i:05d}",
+                drugs=[{'drug_id': f"DB{random.randint(1, 9999):05d}"} for _ in range(5)],
+                risk_history=[]
+            )
+            for i in range(count)
+        ])
+        session.commit()
+
+
+def agent_writer(db: Database, therapy_count: int, stop: threading.Event, stats: dict,
+                 write_interval: float = 0.0):
+    """
+    Tick agenta: procjena jedne terapije -> risk_history + upozorenje, jedan commit.
+    write_interval > 0 drži isti ritam pisanja u svim konfiguracijama (brži pisac bi inače
+    uzimao CPU čitaocima, pa se čitanja ne bi poredila pod istim opterećenjem).
+    """
+    while not stop.wait(write_interval):
+        therapy_id = random.randint(1, therapy_count)
+        start = time.perf_counter()
+        try:
+            with db.get_session() as session:
+                therapy = session.get(TherapyDB, therapy_id)
+                therapy.risk_history = (therapy.risk_history or [])[-20:] + [
+                    {'score': round(random.uniform(0, 5), 2), 'at': time.time()}
+                ]
+                session.add(WarningDB(
+                    therapy_id=therapy_id,
+                    patient_id=therapy.patient_id,
+                    action_type='WARN',
+                    message='Benchmark upozorenje',
+                    assessment_data={'total_score': random.uniform(0, 5)}
+                ))
+                session.commit()
+            stats['write_latencies'].append(time.perf_counter() - start)
+        except OperationalError:
+            stats['write_errors'] += 1
+
+
+def web_reader(db: Database, therapy_count: int, stop: threading.Event, latencies: list, errors: list):
+    """Request: lista aktivnih terapija ili jedna terapija sa upozorenjima"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with db.get_session() as session:
+                if random.random() < 0.5:
+                    session.query(TherapyDB).filter_by(status='ACTIVE').limit(50).all()
+                else:
+                    therapy_id = random.randint(1, therapy_count)
+                    session.get(TherapyDB, therapy_id)
+                    session.query(WarningDB).filter_by(therapy_id=therapy_id).all()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors.append(1)
+
+
+def run_configuration(name: str, pragmas: dict, readers: int, duration: float, therapies: int,
+                      write_interval: float = 0.0) -> dict:
+    """Pokreni pisca i čitaoce nad novom bazom i vrati statistike"""
+    work_dir = tempfile.mkdtemp(prefix=f"ddi_db_{name}_")
+    try:
+        db = Database(os.path.join(work_dir, "ddi_agent.db"), pragmas=pragmas,
+                      pool_size=readers + 1, max_overflow=0)
+        seed_therapies(db, therapies)
+
+        stop = threading.Event()
+        writer_stats = {'write_latencies': [], 'write_errors': 0}
+        read_latencies = [[] for _ in range(readers)]
+        read_errors = []
+
+        threads = [threading.Thread(target=agent_writer, args=(db, therapies, stop, writer_stats, write_interval))]
+        threads += [
+            threading.Thread(target=web_reader, args=(db, therapies, stop, read_latencies[i], read_errors))
+            for i in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        reads = np.array([latency for latencies in read_latencies for latency in latencies]) * 1000
+        writes = np.array(writer_stats['write_latencies']) * 1000
+        pragma_status = db.pragma_status()
+        db.engine.dispose()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'name': name,
+        'journal_mode': pragma_status.get('journal_mode'),
+        'reads_per_second': len(reads) / duration,
+        'writes_per_second': len(writes) / duration,
+        'read_p50': float(np.percentile(reads, 50)) if len(reads) else float('nan'),
+        'read_p99': float(np.percentile(reads, 99)) if len(reads) else float('nan'),
+        'read_max': float(reads.max()) if len(reads) else float('nan'),
+        'write_p50': float(np.percentile(writes, 50)) if len(writes) else float('nan'),
+        'errors': len(read_errors) + writer_stats['write_errors'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite podešavanja (agent piše, web čita)")
+    parser.add_argument("--readers", type=int, default=4, help="Broj niti koje glume Flask requeste")
+    parser.add_argument("--duration", type=float, default=5.0, help="Trajanje po konfiguraciji (s)")
+    parser.add_argument("--therapies", type=int, default=1000, help="Broj terapija u bazi")
+    parser.add_argument("--write-interval", type=float, default=0.02,
+                        help="Pauza pisca između commit-ova (s); 0 = bez pauze")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Broj krugova (konfiguracije se smjenjuju, prikazuje se medijan po čitanjima/s)")
+    parser.add_argument("--config", choices=["legacy", "tuned", "both"], default="both")
+    args = parser.parse_args()
+
+    names = list(CONFIGURATIONS) if args.config == "both" else [args.config]
+
+    print("=" * 60)
+    print(f"⏱️  SQLITE: {args.readers} čitalaca + 1 pisac (agent, pauza {args.write_interval * 1000:.0f} ms), "
+          f"{args.duration:.0f}s po konfiguraciji")
+    print("=" * 60)
+
+    # Krugovi sa smjenjivanjem redoslijeda, da konfiguracija koja ide prva nema prednost (ili nedostatak)
+    runs = {name: [] for name in names}
+    for round_index in range(args.rounds):
+        for name in (names if round_index % 2 == 0 else names[::-1]):
+            random.seed(42)
+            runs[name].append(run_configuration(name, CONFIGURATIONS[name], args.readers, args.duration,
+                                                args.therapies, args.write_interval))
+
+    results = []
+    for name in names:
+        result = sorted(runs[name], key=lambda run: run['reads_per_second'])[len(runs[name]) // 2]
+        results.append(result)
+        print(f"  {name:7s} ({result['journal_mode']}): "
+              f"čitanja {result['reads_per_second']:7.0f}/s, p50 {result['read_p50']:6.2f} ms, "
+              f"p99 {result['read_p99']:7.2f} ms, max {result['read_max']:7.1f} ms | "
+              f"pisanja {result['writes_per_second']:5.0f}/s, p50 {result['write_p50']:6.2f} ms | "
+              f"greške: {result['errors']}")
+
+    if len(results) == 2:
+        legacy, tuned = results
+        print(f"\n✅ čitanja/s: {legacy['reads_per_second']:.0f} → {tuned['reads_per_second']:.0f}, "
+              f"p99 čitanja: {legacy['read_p99']:.2f} → {tuned['read_p99']:.2f} ms, "
+              f"pisanja/s: {legacy['writes_per_second']:.0f} → {tuned['writes_per_second']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
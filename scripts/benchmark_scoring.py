@@ -0,0 +1,347 @@
+"""
+BENCHMARK: Mjerenja performansi ScoringModel-a
+
+Pokretanje (iz root foldera projekta):
+    python scripts/benchmark_scoring.py startup
+    python scripts/benchmark_scoring.py startup --csv data/DDI_with_scores.csv
+    python scripts/benchmark_scoring.py memory
+    python scripts/benchmark_scoring.py warmstart
+    python scripts/benchmark_scoring.py batch
+    python scripts/benchmark_scoring.py algorithms
+    python scripts/benchmark_scoring.py columns
+    python scripts/benchmark_scoring.py bitsets
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from DDIAgent.ml.scoring_model import ScoringModel
+from DDIAgent.ml.interaction_store import InteractionStore
+from DDIAgent.ml.columnar_cache import MODEL_COLUMNS, load_columns
+
+DEFAULT_CSV = os.path.join(root_dir, "data", "DDI_with_scores.csv")
+
+
+def _timed(func, *args, **kwargs):
+    """Izvrši funkciju i vrati (rezultat, trajanje u sekundama)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def benchmark_startup(csv_path: str):
+    """Poredi originalni (iterrows) i vektorizovani builder lookup tabele"""
+    print("=" * 60)
+    print("⏱️  STARTUP: izgradnja lookup tabele")
+    print("=" * 60)
+
+    df, read_time = _timed(pd.read_csv, csv_path)
+    print(f"📁 CSV: {csv_path} ({len(df)} redova), read_csv: {read_time:.2f}s")
+
+    lookup_old, old_time = _timed(ScoringModel._build_lookup_iterrows, df)
+    print(f"  iterrows builder:      {old_time:8.3f}s ({len(lookup_old)} parova)")
+
+    lookup_new, new_time = _timed(ScoringModel._build_lookup_vectorized, df)
+    print(f"  vektorizovani builder: {new_time:8.3f}s ({len(lookup_new)} parova)")
+
+    identical = lookup_old == lookup_new and list(lookup_old) == list(lookup_new)
+    print(f"  Ubrzanje: {old_time / new_time:.1f}x, identičan lookup: {'✅' if identical else '❌'}")
+    return identical
+
+
+def _sample_therapies(model: ScoringModel, count: int, size: int, seed: int = 42):
+    """Nasumične terapije od `size` lijekova iz skupa lijekova koji imaju interakcije"""
+    if model.store is not None:
+        drug_ids = list(model.store.drug_ids)
+    else:
+        drug_ids = sorted({drug_id for key in model.interaction_lookup for drug_id in key.split('|')})
+    rng = random.Random(seed)
+    return [rng.sample(drug_ids, size) for _ in range(count)]
+
+
+def benchmark_memory(csv_path: str):
+    """Poredi memoriju dict i compact backend-a i provjerava iste rezultate"""
+    print("=" * 60)
+    print("💾 MEMORIJA: dict vs compact backend")
+    print("=" * 60)
+
+    models = {}
+    for backend in ScoringModel.BACKENDS:
+        model, elapsed = _timed(ScoringModel, csv_path, backend=backend, use_pack=False)
+        footprint = model.memory_footprint()
+        models[backend] = model
+        print(f"  {backend:8} build: {elapsed:6.2f}s, indeks: {footprint['megabytes']:8.2f} MB")
+
+    dict_bytes = models['dict'].memory_footprint()['bytes']
+    compact_bytes = models['compact'].memory_footprint()['bytes']
+    print(f"  Ušteda: {dict_bytes / max(compact_bytes, 1):.1f}x manje memorije")
+
+    print("\n  Compact komponente:")
+    for name, size in models['compact'].memory_footprint()['details'].items():
+        print(f"    {name:18} {size / 1024:10.1f} KB")
+
+    therapies = _sample_therapies(models['dict'], count=200, size=10)
+    reports = {}
+    for backend, model in models.items():
+        reports[backend], elapsed = _timed(lambda: [model.calculate_therapy_risk(t) for t in therapies])
+        print(f"  {backend:8} calculate_therapy_risk x{len(therapies)}: {elapsed * 1000:8.1f} ms")
+
+    identical = reports['dict'] == reports['compact']
+    print(f"  Isti rezultati: {'✅' if identical else '❌'}")
+    return identical
+
+
+def benchmark_warmstart(csv_path: str):
+    """Poredi start modela iz CSV-a i iz memory-mapped pack fajla"""
+    print("=" * 60)
+    print("🚀 WARM-START: CSV vs pack (np.memmap)")
+    print("=" * 60)
+
+    csv_model, csv_time = _timed(ScoringModel, csv_path, use_pack=False)
+    print(f"  CSV parsiranje + indeks: {csv_time:8.3f}s")
+
+    # Prvi start gradi pack ako ne postoji ili je zastario
+    _, first_time = _timed(ScoringModel, csv_path)
+    print(f"  Prvi start sa pack-om:   {first_time:8.3f}s")
+
+    pack_model, pack_time = _timed(ScoringModel, csv_path)
+    print(f"  Warm-start iz pack-a:    {pack_time:8.3f}s (ubrzanje {csv_time / pack_time:.1f}x)")
+
+    therapies = _sample_therapies(csv_model, count=100, size=10)
+    identical = all(
+        csv_model.calculate_therapy_risk(t) == pack_model.calculate_therapy_risk(t) for t in therapies
+    )
+    print(f"  Isti rezultati: {'✅' if identical else '❌'}")
+    return identical
+
+
+def benchmark_batch(csv_path: str, therapy_count: int = 2000):
+    """Poredi pojedinačne calculate_therapy_risk pozive i calculate_therapy_risk_many"""
+    print("=" * 60)
+    print(f"📚 BATCH: {therapy_count} terapija")
+    print("=" * 60)
+
+    model = ScoringModel(csv_path)
+    rng = random.Random(7)
+    therapies = [
+        drug_ids[:rng.randint(0, len(drug_ids))]
+        for drug_ids in _sample_therapies(model, count=therapy_count, size=25, seed=7)
+    ]
+    print(f"  Prosječno lijekova po terapiji: {sum(map(len, therapies)) / len(therapies):.1f}")
+
+    single, single_time = _timed(lambda: [model.calculate_therapy_risk(t) for t in therapies])
+    print(f"  Pojedinačno: {single_time * 1000:8.1f} ms")
+
+    batch, batch_time = _timed(model.calculate_therapy_risk_many, therapies)
+    print(f"  Batch:       {batch_time * 1000:8.1f} ms (ubrzanje {single_time / batch_time:.1f}x)")
+
+    identical = single == batch
+    print(f"  Isti rezultati: {'✅' if identical else '❌'}")
+    return identical
+
+
+def benchmark_algorithms(csv_path: str, sizes=(5, 20, 50, 100), therapy_count: int = 50):
+    """
+    Poredi 'pairwise' i 'neighbors' algoritam za režime od 5, 20, 50 i 100 lijekova,
+    sa bitsetovima partnera (podrazumijevano) i bez njih (use_bitsets=False)
+    """
+    print("=" * 60)
+    print("🔀 ALGORITMI: pairwise vs neighbors")
+    print("=" * 60)
+
+    model = ScoringModel(csv_path)
+    bitsets = model.bitsets
+    identical = True
+    for use_bitsets in (True, False):
+        model.bitsets = bitsets if use_bitsets else None
+        print(f"  Bitsetovi partnera: {'da' if use_bitsets else 'ne'}")
+        for size in sizes:
+            therapies = _sample_therapies(model, count=therapy_count, size=size, seed=size)
+            timings = {}
+            results = {}
+            for algorithm in ScoringModel.ALGORITHMS:
+                model.algorithm = algorithm
+                results[algorithm], timings[algorithm] = _timed(
+                    lambda: [model.calculate_therapy_risk(t) for t in therapies]
+                )
+                summaries, timings[f"{algorithm}_summary"] = _timed(
+                    lambda: [model.calculate_therapy_summary(t) for t in therapies]
+                )
+                results[f"{algorithm}_summary"] = summaries
+            model.algorithm = 'pairwise'
+
+            same = (results['pairwise'] == results['neighbors']
+                    and results['pairwise_summary'] == results['neighbors_summary'])
+            identical &= same
+            print(f"  {size:3} lijekova: risk pairwise {timings['pairwise'] * 1000 / therapy_count:7.2f} ms, "
+                  f"neighbors {timings['neighbors'] * 1000 / therapy_count:7.2f} ms | "
+                  f"summary pairwise {timings['pairwise_summary'] * 1000 / therapy_count:6.2f} ms, "
+                  f"neighbors {timings['neighbors_summary'] * 1000 / therapy_count:6.2f} ms "
+                  f"{'✅' if same else '❌'}")
+    model.bitsets = bitsets
+
+    print(f"  Isti rezultati: {'✅' if identical else '❌'}")
+    return identical
+
+
+def _rss_mb() -> float:
+    """Trenutna rezidentna memorija procesa (MB); na sistemima bez /proc vršna vrijednost"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _columns_variant(variant: str, backend: str, csv_path: str, queue):
+    """Jedna varijanta učitavanja u svježem procesu: (trajanje, RSS nakon učitavanja)"""
+    start = time.perf_counter()
+    if variant == 'csv':
+        # Prije: cijeli CSV (sve kolone, object dtype) ostaje u self.df nakon indeksiranja
+        df = pd.read_csv(csv_path)
+        if backend == 'compact':
+            index = InteractionStore.from_dataframe(df)
+        else:
+            index = ScoringModel._build_lookup_vectorized(df)
+        kept = (df, index)
+    elif variant == 'model':
+        kept = ScoringModel(csv_path, backend=backend, use_pack=False)
+    elif variant == 'loader_csv':
+        kept = pd.read_csv(csv_path)
+    elif variant == 'loader_columns':
+        kept, _ = load_columns(csv_path)
+    else:
+        kept = None
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _rss_mb()))
+
+
+def benchmark_columns(csv_path: str):
+    """Vrijeme učitavanja i RSS: pd.read_csv + zadržan DataFrame vs kolonski keš"""
+    print("=" * 60)
+    print("🗂️  KOLONSKI KEŠ: vrijeme učitavanja i rezidentna memorija")
+    print("=" * 60)
+
+    # Keš se gradi unaprijed, mjeri se warm start
+    load_columns(csv_path, MODEL_COLUMNS)
+
+    context = multiprocessing.get_context('spawn')
+
+    def run(variant: str, backend: str = ''):
+        queue = context.Queue()
+        process = context.Process(target=_columns_variant, args=(variant, backend, csv_path, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        return result
+
+    baseline = run('baseline')
+    print(f"  Prazan proces (import-i): {baseline[1]:8.1f} MB RSS")
+
+    for backend in ScoringModel.BACKENDS:
+        before_time, before_rss = run('csv', backend)
+        after_time, after_rss = run('model', backend)
+        print(f"  ScoringModel[{backend:7}] prije: {before_time:6.2f}s {before_rss:8.1f} MB | "
+              f"poslije: {after_time:6.2f}s {after_rss:8.1f} MB")
+
+    before_time, before_rss = run('loader_csv')
+    after_time, after_rss = run('loader_columns')
+    print(f"  FileDataLoader (sve kolone) prije: {before_time:6.2f}s {before_rss:8.1f} MB | "
+          f"poslije: {after_time:6.2f}s {after_rss:8.1f} MB")
+
+
+def _pairs_with_hit_rate(model: ScoringModel, count: int, hit_rate: float, seed: int = 11):
+    """Parovi lijekova gdje otprilike `hit_rate` udio stvarno interaguje"""
+    rng = random.Random(seed)
+    interacting = [key.split('|') for key in model.interaction_lookup] if model.store is None else [
+        (model.store.drug_ids[low], model.store.drug_ids[high])
+        for low, high in zip(model.store.pair_low.tolist(), model.store.pair_high.tolist())
+    ]
+    drug_ids = sorted(model.bitsets.code_index)
+
+    pairs = []
+    while len(pairs) < count:
+        if rng.random() < hit_rate:
+            pairs.append(tuple(rng.choice(interacting)))
+        else:
+            pair = (rng.choice(drug_ids), rng.choice(drug_ids))
+            if not model.bitsets.may_interact(*pair):
+                pairs.append(pair)
+    return pairs
+
+
+def benchmark_bitsets(csv_path: str, pair_count: int = 20000):
+    """Mikrobenchmark: find_interactions i calculate_therapy_risk sa i bez bitseta partnera"""
+    print("=" * 60)
+    print("🧮 BITSETI PARTNERA: brze negativne provjere")
+    print("=" * 60)
+
+    identical = True
+    for backend in ScoringModel.BACKENDS:
+        model = ScoringModel(csv_path, backend=backend)
+        bitsets = model.bitsets
+        print(f"  [{backend}] bitseti: {bitsets.memory_bytes() / 1024:.0f} KB")
+
+        for hit_rate in (0.01, 0.05, 0.2):
+            pairs = _pairs_with_hit_rate(model, pair_count, hit_rate)
+            model.bitsets = None
+            without, without_time = _timed(lambda: [model.find_interactions(a, b) for a, b in pairs])
+            model.bitsets = bitsets
+            with_bits, with_time = _timed(lambda: [model.find_interactions(a, b) for a, b in pairs])
+            identical &= without == with_bits
+            print(f"    find_interactions, pogoci {hit_rate:4.0%}: bez {without_time * 1e9 / pair_count:6.0f} ns/par, "
+                  f"sa {with_time * 1e9 / pair_count:6.0f} ns/par ({without_time / with_time:.1f}x)")
+
+        for size in (10, 25):
+            therapies = _sample_therapies(model, count=200, size=size, seed=size)
+            model.bitsets = None
+            without, without_time = _timed(lambda: [model.calculate_therapy_risk(t) for t in therapies])
+            model.bitsets = bitsets
+            with_bits, with_time = _timed(lambda: [model.calculate_therapy_risk(t) for t in therapies])
+            identical &= without == with_bits
+            print(f"    calculate_therapy_risk, {size} lijekova: bez {without_time * 1000 / len(therapies):6.2f} ms, "
+                  f"sa {with_time * 1000 / len(therapies):6.2f} ms ({without_time / with_time:.1f}x)")
+
+    print(f"  Isti rezultati: {'✅' if identical else '❌'}")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ScoringModel-a")
+    parser.add_argument("benchmark", choices=["startup", "memory", "warmstart", "batch", "algorithms", "columns", "bitsets"], help="Koji benchmark pokrenuti")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Putanja do DDI_with_scores.csv")
+    args = parser.parse_args()
+
+    if args.benchmark == "startup":
+        benchmark_startup(args.csv)
+    elif args.benchmark == "memory":
+        benchmark_memory(args.csv)
+    elif args.benchmark == "warmstart":
+        benchmark_warmstart(args.csv)
+    elif args.benchmark == "batch":
+        benchmark_batch(args.csv)
+    elif args.benchmark == "algorithms":
+        benchmark_algorithms(args.csv)
+    elif args.benchmark == "columns":
+        benchmark_columns(args.csv)
+    elif args.benchmark == "bitsets":
+        benchmark_bitsets(args.csv)
+
+
+if __name__ == "__main__":
+    main()
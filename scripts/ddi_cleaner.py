@@ -1,19 +1,54 @@
+"""
+DDI CLEANER: Čisti sirovi DDI_data.csv (duplikati, simetrični duplikati, nazivi lijekova)
+
+Izlazi: data/DDI_data_cleaned.csv, data/drug_lookup.json i data/ddi_stats.json.
+Koristi se samostalno ili kao 'clean' faza u scripts/ddi_pipeline.py.
+
+Pokretanje (iz bilo kojeg foldera):
+    python scripts/ddi_cleaner.py
+
+Streaming režim (run_cleaning_streaming / ddi_pipeline.py --stream) čita izvor u komadima, pa
+vršna memorija zavisi od veličine komada, a ne od veličine fajla.
+"""
+import json
+import math
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
 import pandas as pd
 import numpy as np
 
-# Učitavanje podataka
-df = pd.read_csv('data/DDI_data.csv')
-print(f"Ukupno redova: {len(df)}")
-print(f"Kolone: {df.columns.tolist()}")
-print("\nPrvih 5 redova:")
-print(df.head())
+# Podrazumijevane putanje su relativne na root folder projekta, ne na trenutni folder
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+DATA_DIR = os.path.join(root_dir, 'data')
 
-# Provjera duplikata
-print(f"\nBroj duplikata: {df.duplicated().sum()}")
+# Streaming režim: redova po komadu
+DEFAULT_CHUNK_SIZE = 500_000
+
+def interleaved_drugs(df):
+    """ID-jevi i nazivi oba lijeka svake interakcije, redom drug1, drug2 po redu CSV-a"""
+    ids = np.column_stack([df['drug1_id'].to_numpy(dtype=object), df['drug2_id'].to_numpy(dtype=object)]).ravel()
+    names = np.column_stack([df['drug1_name'].to_numpy(dtype=object), df['drug2_name'].to_numpy(dtype=object)]).ravel()
+    return ids, names
+
+def count_drug_interactions(df):
+    """
+    Broj interakcija po lijeku kao lista (drug_id, broj) sortirana opadajuće.
+    value_counts nad spojenim kolonama; jednaki brojevi ostaju redom prvog pojavljivanja lijeka.
+    """
+    ids, _ = interleaved_drugs(df)
+    counts = pd.Series(ids).value_counts().reindex(pd.unique(ids))
+    counts = counts.sort_values(ascending=False, kind='stable')
+    return list(zip(counts.index.tolist(), counts.astype(int).tolist()))
 
-# Provjera različitih interakcija
-print(f"\nBroj jedinstvenih interakcija: {len(df[['drug1_id', 'drug2_id']].drop_duplicates())}")
-print(f"Broj jedinstvenih lijekova: {len(set(df['drug1_id'].tolist() + df['drug2_id'].tolist()))}")
+def standardize_name(names):
+    """Standardizacija naziva (.str metode; NaN ostaje NaN): prvo veliko slovo, ostala mala"""
+    names = names.str.strip()
+    return names.str[:1].str.upper() + names.str[1:].str.lower()
 
 def clean_ddi_data(df):
     """
@@ -29,29 +64,25 @@ def clean_ddi_data(df):
     print(f"Poslije uklanjanja potpunih duplikata: {len(df_clean)} redova")
     
     # 2. Provjeri da li ima simetričnih duplikata
-    # Kreiraj normalizovanu kolonu za provjeru
-    def create_symmetric_key(row):
-        ids = sorted([row['drug1_id'], row['drug2_id']])
-        return f"{ids[0]}|{ids[1]}|{row['interaction_type']}"
-    
-    df_clean = df_clean.copy()
-    df_clean['symmetric_key'] = df_clean.apply(create_symmetric_key, axis=1)
+    # Normalizovan par (manji ID, veći ID) + tip interakcije, vektorizovano umjesto apply po redu
+    drug1 = df_clean['drug1_id'].to_numpy(dtype=object)
+    drug2 = df_clean['drug2_id'].to_numpy(dtype=object)
+    symmetric_key = pd.DataFrame({
+        'low': np.minimum(drug1, drug2),
+        'high': np.maximum(drug1, drug2),
+        'interaction_type': df_clean['interaction_type'].to_numpy(dtype=object)
+    })
     
     # Koliko ima simetričnih duplikata?
     before = len(df_clean)
-    df_clean = df_clean.drop_duplicates(subset=['symmetric_key'])
+    df_clean = df_clean[~symmetric_key.duplicated().to_numpy()]
     after = len(df_clean)
     
     print(f"Simetričnih duplikata pronađeno: {before - after}")
     print(f"Poslije uklanjanja simetričnih duplikata: {after} redova")
     
-    # Ukloni pomoćnu kolonu
-    df_clean = df_clean.drop(columns=['symmetric_key'])
-    
     return df_clean
 
-df_clean = clean_ddi_data(df)
-
 def standardize_drug_names(df):
     """
     Standardizuje nazive lijekova:
@@ -60,25 +91,17 @@ def standardize_drug_names(df):
     3. Kreiranje lookup tabele za konzistentnost
     """
     
-    # Funkcija za standardizaciju naziva
-    def standardize_name(name):
-        if pd.isna(name):
-            return name
-        # Prvo veliko slovo, ostala mala
-        name = name.strip()
-        if len(name) > 1:
-            return name[0].upper() + name[1:].lower()
-        return name.upper()
-    
     # Primijeni na oba naziva
-    df['drug1_name'] = df['drug1_name'].apply(standardize_name)
-    df['drug2_name'] = df['drug2_name'].apply(standardize_name)
+    df = df.copy()
+    df['drug1_name'] = standardize_name(df['drug1_name'])
+    df['drug2_name'] = standardize_name(df['drug2_name'])
     
-    # Kreiraj lookup tabelu lijekova
-    drugs = {}
-    for _, row in df.iterrows():
-        drugs[row['drug1_id']] = row['drug1_name']
-        drugs[row['drug2_id']] = row['drug2_name']
+    # Kreiraj lookup tabelu lijekova: ID-jevi redom pojavljivanja (drug1, drug2, ...),
+    # a naziv iz posljednjeg pojavljivanja - isto kao dodjela u petlji po redovima
+    ids, names = interleaved_drugs(df)
+    last = ~pd.Series(ids).duplicated(keep='last').to_numpy()
+    last_names = dict(zip(ids[last].tolist(), names[last].tolist()))
+    drugs = {drug_id: last_names[drug_id] for drug_id in pd.unique(ids).tolist()}
     
     # Provjeri konzistentnost (isti ID uvijek ima isti naziv)
     drug_consistency = {}
@@ -93,132 +116,301 @@ def standardize_drug_names(df):
     
     return df, drug_consistency
 
-df_clean, drug_lookup = standardize_drug_names(df_clean)
-
-# Dodajte ovo nakon čišćenja:
-
 def analyze_interaction_types(df):
     """Analiza tipova interakcija"""
+    # Broj različitih tipova interakcija
+    interaction_counts = df['interaction_type'].value_counts()
+    
+    # Računaj interakcije po lijeku
+    drug_interactions = count_drug_interactions(df)
+    
+    # Ime lijeka iz prvog reda u kojem se pojavljuje
+    ids, names = interleaved_drugs(df)
+    first = ~pd.Series(ids).duplicated(keep='first').to_numpy()
+    first_names = dict(zip(ids[first].tolist(), names[first].tolist()))
+    
+    report_interaction_types(len(df), interaction_counts, drug_interactions, first_names)
+    return interaction_counts, drug_interactions
+
+def report_interaction_types(total, interaction_counts, drug_interactions, first_names):
+    """Ispis analize tipova interakcija i lijekova sa najviše interakcija"""
     print("\n" + "="*60)
     print("ANALIZA TIPOVA INTERAKCIJA")
     print("="*60)
     
-    # Broj različitih tipova interakcija
-    interaction_counts = df['interaction_type'].value_counts()
     print(f"\nBroj različitih tipova interakcija: {len(interaction_counts)}")
     
     # Top 10 najčešćih interakcija
     print("\n🔝 TOP 10 NAJČEŠĆIH INTERAKCIJA:")
     for i, (interaction, count) in enumerate(interaction_counts.head(10).items(), 1):
-        percentage = (count / len(df)) * 100
+        percentage = (count / total) * 100
         print(f"{i:2}. {interaction:50} {count:6} ({percentage:.1f}%)")
     
     # Analiza po lijekovima
     print("\n🏆 TOP 5 LIJEKOVA SA NAJVIŠE INTERAKCIJA:")
-    
-    # Računaj interakcije po lijeku
-    drug_interactions = {}
-    for _, row in df.iterrows():
-        drug_interactions[row['drug1_id']] = drug_interactions.get(row['drug1_id'], 0) + 1
-        drug_interactions[row['drug2_id']] = drug_interactions.get(row['drug2_id'], 0) + 1
-    
-    # Sortiraj
-    top_drugs = sorted(drug_interactions.items(), key=lambda x: x[1], reverse=True)[:5]
-    
-    for i, (drug_id, count) in enumerate(top_drugs, 1):
-        # Pronađi ime lijeka
-        drug_rows = df[(df['drug1_id'] == drug_id) | (df['drug2_id'] == drug_id)]
-        if len(drug_rows) > 0:
-            drug_name = drug_rows.iloc[0]['drug1_name'] if drug_rows.iloc[0]['drug1_id'] == drug_id else drug_rows.iloc[0]['drug2_name']
-        else:
-            drug_name = "Unknown"
-        
+    for i, (drug_id, count) in enumerate(drug_interactions[:5], 1):
+        drug_name = first_names.get(drug_id, "Unknown")
         print(f"{i}. {drug_name:30} ({drug_id}): {count:5} interakcija")
-    
-    return interaction_counts
 
-# Pozovite funkciju
-interaction_counts = analyze_interaction_types(df_clean)
+def write_cleaning_outputs(total, drug_lookup, interaction_counts, drug_interactions, lookup_path, stats_path):
+    """Zapiši drug_lookup.json i ddi_stats.json i ispiši dodatnu analizu (isto za oba režima)"""
+    # Kreiraj i sačuvaj lookup tabelu lijekova
+    print("📋 KREIRAM LOOKUP TABELU LIJEKOVA...")
 
-# Sačuvaj očišćene podatke
-output_file = 'data/DDI_data_cleaned.csv'
-df_clean.to_csv(output_file, index=False)
-print(f"\n Očišćeni podaci sačuvani u: {output_file}")
+    # Već imate drug_lookup iz standardize_drug_names
+    print(f"Pronađeno {len(drug_lookup)} jedinstvenih lijekova")
 
-# Kreiraj i sačuvaj lookup tabelu lijekova
-print("📋 KREIRAM LOOKUP TABELU LIJEKOVA...")
+    # Sačuvaj kao JSON
+    with open(lookup_path, 'w', encoding='utf-8') as f:
+        json.dump(drug_lookup, f, ensure_ascii=False, indent=2)
+    print(f"💾 Lookup tabela sačuvana u: {lookup_path}")
 
-import json
+    # Kreiraj i sačuvaj statistiku
+    stats = {
+        'total_interactions': total,
+        'unique_drugs': len(drug_lookup),
+        'interaction_types': len(interaction_counts),
+        'top_interactions': interaction_counts.head(20).to_dict(),
+        'top_drugs': {}
+    }
+
+    # Dodaj top lijekove u statistiku (brojevi iz analyze_interaction_types)
+    top_10_drugs = drug_interactions[:10]
+    for drug_id, count in top_10_drugs:
+        stats['top_drugs'][drug_id] = {
+            'name': drug_lookup.get(drug_id, 'Unknown'),
+            'interaction_count': count
+        }
 
-# Već imate drug_lookup iz standardize_drug_names
-print(f"Pronađeno {len(drug_lookup)} jedinstvenih lijekova")
-
-# Sačuvaj kao JSON
-with open('data/drug_lookup.json', 'w', encoding='utf-8') as f:
-    json.dump(drug_lookup, f, ensure_ascii=False, indent=2)
-print(f"💾 Lookup tabela sačuvana u: data/drug_lookup.json")
-
-# Kreiraj i sačuvaj statistiku
-stats = {
-    'total_interactions': len(df_clean),
-    'unique_drugs': len(drug_lookup),
-    'interaction_types': len(interaction_counts),
-    'top_interactions': interaction_counts.head(20).to_dict(),
-    'top_drugs': {}
-}
-
-# Dodaj top lijekove u statistiku
-drug_interactions = {}
-for _, row in df_clean.iterrows():
-    drug_interactions[row['drug1_id']] = drug_interactions.get(row['drug1_id'], 0) + 1
-    drug_interactions[row['drug2_id']] = drug_interactions.get(row['drug2_id'], 0) + 1
-
-top_10_drugs = sorted(drug_interactions.items(), key=lambda x: x[1], reverse=True)[:10]
-for drug_id, count in top_10_drugs:
-    stats['top_drugs'][drug_id] = {
-        'name': drug_lookup.get(drug_id, 'Unknown'),
-        'interaction_count': count
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    print(f"💾 Statistika sačuvana u: {stats_path}")
+
+    # Dodaj još jednu korisnu analizu
+    print("\n📊 DODATNA ANALIZA:")
+
+    # Analiza rizika po tipovima interakcija
+    interaction_risk_groups = {
+        'HIGH_RISK': ['bleeding', 'cardiotoxic', 'nephrotoxic', 'hepatotoxic', 'qtc', 'arrhythmia'],
+        'MODERATE_RISK': ['serum concentration', 'metabolism', 'excretion'],
+        'THERAPEUTIC': ['therapeutic efficacy', 'hypotensive', 'antihypertensive'],
+        'OTHER': []
     }
 
-with open('data/ddi_stats.json', 'w', encoding='utf-8') as f:
-    json.dump(stats, f, ensure_ascii=False, indent=2)
-print(f"💾 Statistika sačuvana u: data/ddi_stats.json")
-
-# Dodaj još jednu korisnu analizu
-print("\n📊 DODATNA ANALIZA:")
-
-# Analiza rizika po tipovima interakcija
-interaction_risk_groups = {
-    'HIGH_RISK': ['bleeding', 'cardiotoxic', 'nephrotoxic', 'hepatotoxic', 'qtc', 'arrhythmia'],
-    'MODERATE_RISK': ['serum concentration', 'metabolism', 'excretion'],
-    'THERAPEUTIC': ['therapeutic efficacy', 'hypotensive', 'antihypertensive'],
-    'OTHER': []
-}
-
-high_risk_count = 0
-for interaction in df_clean['interaction_type'].unique():
-    interaction_lower = interaction.lower()
-    for risk_group, keywords in interaction_risk_groups.items():
-        if any(keyword in interaction_lower for keyword in keywords):
-            if risk_group == 'HIGH_RISK':
-                high_risk_count += df_clean[df_clean['interaction_type'] == interaction].shape[0]
-            break
-
-print(f"Visoko rizičnih interakcija: {high_risk_count} ({high_risk_count/len(df_clean)*100:.1f}%)")
-
-# Provjera za najopasnije kombinacije
-print("\n 5 NAJČEŠĆIH VISOKO RIZIČNIH INTERAKCIJA:")
-high_risk_interactions = []
-for interaction_type, count in interaction_counts.items():
-    interaction_lower = interaction_type.lower()
-    if any(keyword in interaction_lower for keyword in interaction_risk_groups['HIGH_RISK']):
-        high_risk_interactions.append((interaction_type, count))
-
-high_risk_interactions.sort(key=lambda x: x[1], reverse=True)
-for i, (interaction, count) in enumerate(high_risk_interactions[:5], 1):
-    print(f"{i}. {interaction}: {count}")
-
-print("\n" + "="*60)
-print("✅ ČIŠĆENJE I ANALIZA ZAVRŠENI!")
-print("="*60)
+    high_risk_count = 0
+    for interaction, count in interaction_counts.items():
+        interaction_lower = interaction.lower()
+        for risk_group, keywords in interaction_risk_groups.items():
+            if any(keyword in interaction_lower for keyword in keywords):
+                if risk_group == 'HIGH_RISK':
+                    high_risk_count += int(count)
+                break
+
+    print(f"Visoko rizičnih interakcija: {high_risk_count} ({high_risk_count/total*100:.1f}%)")
+
+    # Provjera za najopasnije kombinacije
+    print("\n 5 NAJČEŠĆIH VISOKO RIZIČNIH INTERAKCIJA:")
+    high_risk_interactions = []
+    for interaction_type, count in interaction_counts.items():
+        interaction_lower = interaction_type.lower()
+        if any(keyword in interaction_lower for keyword in interaction_risk_groups['HIGH_RISK']):
+            high_risk_interactions.append((interaction_type, count))
+
+    high_risk_interactions.sort(key=lambda x: x[1], reverse=True)
+    for i, (interaction, count) in enumerate(high_risk_interactions[:5], 1):
+        print(f"{i}. {interaction}: {count}")
+
+def run_cleaning(input_path=os.path.join(DATA_DIR, 'DDI_data.csv'),
+                 cleaned_path=os.path.join(DATA_DIR, 'DDI_data_cleaned.csv'),
+                 lookup_path=os.path.join(DATA_DIR, 'drug_lookup.json'),
+                 stats_path=os.path.join(DATA_DIR, 'ddi_stats.json')):
+    """Cijela 'clean' faza: DDI_data.csv -> očišćeni CSV, lookup lijekova i statistika"""
+    # Učitavanje podataka
+    start_time = time.perf_counter()
+    df = pd.read_csv(input_path)
+    print(f"⏱️ Učitavanje: {time.perf_counter() - start_time:.2f}s")
+    print(f"Ukupno redova: {len(df)}")
+    print(f"Kolone: {df.columns.tolist()}")
+    print("\nPrvih 5 redova:")
+    print(df.head())
+
+    # Provjera duplikata
+    print(f"\nBroj duplikata: {df.duplicated().sum()}")
+
+    # Provjera različitih interakcija
+    print(f"\nBroj jedinstvenih interakcija: {len(df[['drug1_id', 'drug2_id']].drop_duplicates())}")
+    print(f"Broj jedinstvenih lijekova: {len(set(df['drug1_id'].tolist() + df['drug2_id'].tolist()))}")
+
+    stage_time = time.perf_counter()
+    df_clean = clean_ddi_data(df)
+    print(f"⏱️ Deduplikacija: {time.perf_counter() - stage_time:.2f}s")
+
+    stage_time = time.perf_counter()
+    df_clean, drug_lookup = standardize_drug_names(df_clean)
+    print(f"⏱️ Standardizacija naziva i lookup: {time.perf_counter() - stage_time:.2f}s")
+
+    stage_time = time.perf_counter()
+    interaction_counts, drug_interactions = analyze_interaction_types(df_clean)
+    print(f"⏱️ Analiza: {time.perf_counter() - stage_time:.2f}s")
+
+    # Sačuvaj očišćene podatke
+    df_clean.to_csv(cleaned_path, index=False)
+    print(f"\n Očišćeni podaci sačuvani u: {cleaned_path}")
+
+    write_cleaning_outputs(len(df_clean), drug_lookup, interaction_counts, drug_interactions,
+                           lookup_path, stats_path)
+
+    print(f"\n⏱️ Ukupno: {time.perf_counter() - start_time:.2f}s")
+    print("\n" + "="*60)
+    print("✅ ČIŠĆENJE I ANALIZA ZAVRŠENI!")
+    print("="*60)
+
+
+def symmetric_key_frame(df):
+    """Normalizovan par (manji ID, veći ID) + tip interakcije za provjeru simetričnih duplikata"""
+    drug1 = df['drug1_id'].to_numpy(dtype=object)
+    drug2 = df['drug2_id'].to_numpy(dtype=object)
+    return pd.DataFrame({
+        'low': np.minimum(drug1, drug2),
+        'high': np.maximum(drug1, drug2),
+        'interaction_type': df['interaction_type'].to_numpy(dtype=object)
+    })
+
+def estimate_partitions(input_path, chunk_size):
+    """Broj particija tako da jedna particija ima otprilike chunk_size redova (procjena iz prvih redova)"""
+    with open(input_path, 'rb') as f:
+        sample = f.readlines(1 << 20)
+    line_bytes = max(1, sum(len(line) for line in sample[1:]) / max(1, len(sample) - 1))
+    estimated_rows = os.path.getsize(input_path) / line_bytes
+    return max(1, math.ceil(estimated_rows / chunk_size))
+
+def read_partition(path):
+    """Svi komadi jedne particije (pickle zapisi dodavani redom) kao jedan DataFrame"""
+    frames = []
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                frames.append(pickle.load(f))
+            except EOFError:
+                break
+    return pd.concat(frames) if frames else None
+
+def add_counts(totals, keys):
+    """Dodaj broj pojavljivanja ključeva u dict koji čuva redoslijed prvog pojavljivanja"""
+    counts = pd.Series(keys).value_counts().reindex(pd.unique(keys))
+    for key, count in zip(counts.index.tolist(), counts.tolist()):
+        totals[key] = totals.get(key, 0) + count
+
+def sorted_counts(totals):
+    """Brojevi sortirani opadajuće; jednaki brojevi ostaju redom prvog pojavljivanja"""
+    return pd.Series(totals, dtype='int64').sort_values(ascending=False, kind='stable')
+
+def run_cleaning_streaming(input_path=os.path.join(DATA_DIR, 'DDI_data.csv'),
+                           cleaned_path=os.path.join(DATA_DIR, 'DDI_data_cleaned.csv'),
+                           lookup_path=os.path.join(DATA_DIR, 'drug_lookup.json'),
+                           stats_path=os.path.join(DATA_DIR, 'ddi_stats.json'),
+                           chunk_size=DEFAULT_CHUNK_SIZE, partitions=None):
+    """
+    'clean' faza u komadima, sa istim izlazima kao run_cleaning:
+    1. Svaki red ide u particiju na disku po hash-u simetričnog ključa (duplikati završe zajedno)
+    2. Po particiji: prvi red svakog ključa se označi u bool nizu na disku (np.memmap, 1 bajt/red)
+    3. Izvor se ponovo čita u komadima; označeni redovi se standardizuju i dodaju u izlazni CSV,
+       a lookup i brojači se akumuliraju (veličina zavisi od broja lijekova/tipova, ne redova)
+    """
+    start_time = time.perf_counter()
+    partitions = partitions or estimate_partitions(input_path, chunk_size)
+    work_dir = tempfile.mkdtemp(prefix='ddi_clean_', dir=os.path.dirname(os.path.abspath(cleaned_path)))
+    print(f"🔄 Streaming čišćenje: komadi od {chunk_size} redova, {partitions} particija")
+
+    try:
+        # 1. Particionisanje po hash-u simetričnog ključa
+        partition_paths = [os.path.join(work_dir, f'part{p}.pkl') for p in range(partitions)]
+        total_rows = 0
+        for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+            if total_rows == 0:
+                print(f"Kolone: {chunk.columns.tolist()}")
+                print("\nPrvih 5 redova:")
+                print(chunk.head())
+            chunk = chunk.assign(_row=np.arange(total_rows, total_rows + len(chunk), dtype=np.int64))
+            total_rows += len(chunk)
+
+            key_hash = pd.util.hash_pandas_object(symmetric_key_frame(chunk), index=False).to_numpy()
+            partition_of = key_hash % np.uint64(partitions)
+            for p in np.unique(partition_of).tolist():
+                with open(partition_paths[p], 'ab') as f:
+                    pickle.dump(chunk[partition_of == p], f, protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"Ukupno redova: {total_rows}")
+        print(f"⏱️ Particionisanje: {time.perf_counter() - start_time:.2f}s")
+
+        # 2. Deduplikacija unutar particija -> oznake redova koji ostaju
+        stage_time = time.perf_counter()
+        keep = np.memmap(os.path.join(work_dir, 'keep.bin'), dtype=np.bool_, mode='w+', shape=(max(total_rows, 1),))
+        exact_duplicates = 0
+        for path in partition_paths:
+            if not os.path.exists(path):
+                continue
+            part = read_partition(path).sort_values('_row', kind='stable')
+            exact_duplicates += int(part.drop(columns=['_row']).duplicated().sum())
+            first = ~symmetric_key_frame(part).duplicated().to_numpy()
+            keep[part['_row'].to_numpy()[first]] = True
+            os.remove(path)
+        kept_rows = int(keep[:total_rows].sum())
+
+        print(f"\nBroj duplikata: {exact_duplicates}")
+        print(f"Početno: {total_rows} redova")
+        print(f"Poslije uklanjanja potpunih duplikata: {total_rows - exact_duplicates} redova")
+        print(f"Simetričnih duplikata pronađeno: {total_rows - exact_duplicates - kept_rows}")
+        print(f"Poslije uklanjanja simetričnih duplikata: {kept_rows} redova")
+        print(f"⏱️ Deduplikacija: {time.perf_counter() - stage_time:.2f}s")
+
+        # 3. Drugi prolaz: standardizacija i inkrementalni zapis + akumulacija lookup-a i brojača
+        stage_time = time.perf_counter()
+        drug_lookup, first_names, drug_counts, type_counts = {}, {}, {}, {}
+        offset = 0
+        header = True
+        for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+            selected = chunk[keep[offset:offset + len(chunk)]].copy()
+            offset += len(chunk)
+            if selected.empty:
+                continue
+
+            selected['drug1_name'] = standardize_name(selected['drug1_name'])
+            selected['drug2_name'] = standardize_name(selected['drug2_name'])
+            selected.to_csv(cleaned_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+
+            ids, names = interleaved_drugs(selected)
+            last = ~pd.Series(ids).duplicated(keep='last').to_numpy()
+            first = ~pd.Series(ids).duplicated(keep='first').to_numpy()
+            for drug_id, name in zip(ids[first].tolist(), names[first].tolist()):
+                first_names.setdefault(drug_id, name)
+                drug_lookup.setdefault(drug_id, name)
+            drug_lookup.update(zip(ids[last].tolist(), names[last].tolist()))
+            add_counts(drug_counts, ids)
+            add_counts(type_counts, selected['interaction_type'].to_numpy(dtype=object))
+
+        if header:
+            pd.read_csv(input_path, nrows=0).to_csv(cleaned_path, index=False)
+        print(f"Broj jedinstvenih lijekova: {len(drug_lookup)}")
+        print(f"⏱️ Zapis i akumulacija: {time.perf_counter() - stage_time:.2f}s")
+        del keep
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    interaction_counts = sorted_counts(type_counts)
+    drug_totals = sorted_counts(drug_counts)
+    drug_interactions = list(zip(drug_totals.index.tolist(), drug_totals.tolist()))
+    report_interaction_types(kept_rows, interaction_counts, drug_interactions, first_names)
+    print(f"\n Očišćeni podaci sačuvani u: {cleaned_path}")
+
+    write_cleaning_outputs(kept_rows, drug_lookup, interaction_counts, drug_interactions,
+                           lookup_path, stats_path)
+
+    print(f"\n⏱️ Ukupno: {time.perf_counter() - start_time:.2f}s")
+    print("\n" + "="*60)
+    print("✅ ČIŠĆENJE I ANALIZA ZAVRŠENI!")
+    print("="*60)
+
 
+if __name__ == "__main__":
+    run_cleaning()
@@ -0,0 +1,66 @@
+"""
+DDI PACK: Gradi binarni pack (DDI_with_scores.ddipack) iz DDI_with_scores.csv
+
+ScoringModel otvara pack preko np.memmap, pa je start procesa skoro trenutan, a stranice
+fajla dijele svi procesi kroz OS page cache. Pack se automatski ponovo gradi kada se
+promijeni hash CSV-a, a ova skripta služi za eksplicitnu izgradnju (npr. pri deploy-u).
+
+Pokretanje (iz root foldera projekta):
+    python scripts/ddi_pack.py
+    python scripts/ddi_pack.py --csv data/DDI_with_scores.csv --out data/DDI_with_scores.ddipack --force
+"""
+import argparse
+import os
+import sys
+import time
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from DDIAgent.ml.interaction_pack import (
+    FORMAT_VERSION, build_pack, default_pack_path, file_sha256, read_pack_header
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Izgradi binarni DDI pack")
+    parser.add_argument("--csv", default=os.path.join(root_dir, "data", "DDI_with_scores.csv"),
+                        help="Putanja do DDI_with_scores.csv")
+    parser.add_argument("--out", default=None, help="Putanja pack fajla (default: pored CSV-a)")
+    parser.add_argument("--force", action="store_true", help="Izgradi pack i ako je ažuran")
+    args = parser.parse_args()
+
+    pack_path = args.out or default_pack_path(args.csv)
+
+    print("=" * 60)
+    print("📦 DDI PACK")
+    print("=" * 60)
+    print(f"CSV:  {args.csv}")
+    print(f"Pack: {pack_path}")
+
+    if not os.path.exists(args.csv):
+        print(f"❌ CSV ne postoji: {args.csv}")
+        sys.exit(1)
+
+    source_sha256 = file_sha256(args.csv)
+    header = read_pack_header(pack_path)
+    if (not args.force and header is not None
+            and header.get('format_version') == FORMAT_VERSION
+            and header.get('source_sha256') == source_sha256):
+        print("✅ Pack je ažuran, nema potrebe za izgradnjom (koristi --force)")
+        return
+
+    start = time.perf_counter()
+    header = build_pack(args.csv, pack_path, source_sha256)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Pack izgrađen za {elapsed:.2f}s ({os.path.getsize(pack_path) / 1024 / 1024:.2f} MB)")
+    print(f"   Lijekova: {len(header['drug_ids'])}, tipova interakcija: {len(header['type_names'])}")
+    print(f"   SHA-256 izvora: {source_sha256}")
+
+
+if __name__ == "__main__":
+    main()
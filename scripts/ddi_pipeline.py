@@ -0,0 +1,216 @@
+"""
+DDI PIPELINE: clean -> score -> stats sa preskakanjem nepromijenjenih faza
+
+Svaka faza ima deklarisane ulaze i izlaze. Poslije uspješnog pokretanja u
+data/.pipeline_state.json se zapisuju SHA-256 ulaza, konfiguracije (kategorije iz scoring_config.json)
+i izlaza; faza se preskače ako su ulazi i konfiguracija isti, a izlazi postoje i nisu mijenjani.
+Izmjena jedne ključne riječi u scoring_config.json zato ponovo pokreće samo 'score' i 'stats'.
+scoring_config.json je politika bodovanja: pipeline ga samo čita (i zapisuje podrazumijevani ako
+ne postoji), a statistike idu u scoring_stats.json.
+
+Pokretanje (iz bilo kojeg foldera):
+    python scripts/ddi_pipeline.py
+    python scripts/ddi_pipeline.py --dry-run
+    python scripts/ddi_pipeline.py --force
+    python scripts/ddi_pipeline.py --stream --chunk-size 500000
+
+--stream pokreće clean/score/stats u komadima (izvor veći od memorije); izlazi su isti
+kao u običnom režimu, pa režim ne ulazi u hash faze.
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+from DDIAgent.ml.interaction_pack import file_sha256
+
+import ddi_cleaner
+import ddi_scoring
+
+STATE_FILE = ".pipeline_state.json"
+
+
+@dataclass
+class Stage:
+    """Faza pipeline-a: ulazi -> run() -> izlazi"""
+    name: str
+    inputs: List[str]
+    outputs: List[str]
+    run: Callable[[], None]
+    config: Optional[Any] = None
+
+
+def config_sha256(config: Any) -> Optional[str]:
+    """Hash konfiguracije nezavisan od redoslijeda ključeva"""
+    if config is None:
+        return None
+    canonical = json.dumps(config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def build_stages(data_dir: str, stream: bool = False,
+                 chunk_size: int = ddi_cleaner.DEFAULT_CHUNK_SIZE) -> List[Stage]:
+    """clean -> score -> stats nad fajlovima u data_dir (stream=True: čitanje u komadima)"""
+    def path(name):
+        return os.path.join(data_dir, name)
+
+    categories = ddi_scoring.load_scoring_categories(path('scoring_config.json'))
+
+    if stream:
+        clean = functools.partial(ddi_cleaner.run_cleaning_streaming, chunk_size=chunk_size)
+        score = functools.partial(ddi_scoring.run_scoring_streaming, chunk_size=chunk_size)
+        stats = functools.partial(ddi_scoring.run_stats_streaming, chunk_size=chunk_size)
+    else:
+        clean, score, stats = ddi_cleaner.run_cleaning, ddi_scoring.run_scoring, ddi_scoring.run_stats
+
+    return [
+        Stage(
+            'clean',
+            inputs=[path('DDI_data.csv')],
+            outputs=[path('DDI_data_cleaned.csv'), path('drug_lookup.json'), path('ddi_stats.json')],
+            run=lambda: clean(
+                path('DDI_data.csv'), path('DDI_data_cleaned.csv'),
+                path('drug_lookup.json'), path('ddi_stats.json')
+            )
+        ),
+        Stage(
+            'score',
+            inputs=[path('DDI_data_cleaned.csv')],
+            outputs=[path('DDI_with_scores.csv')],
+            run=lambda: score(path('DDI_data_cleaned.csv'), path('DDI_with_scores.csv'),
+                              path('scoring_config.json')),
+            config=categories
+        ),
+        Stage(
+            'stats',
+            inputs=[path('DDI_with_scores.csv'), path('drug_lookup.json')],
+            outputs=[path('scoring_stats.json')],
+            run=lambda: stats(
+                path('DDI_with_scores.csv'), path('drug_lookup.json'), path('scoring_stats.json'),
+                path('scoring_config.json')
+            ),
+            config=categories
+        ),
+    ]
+
+
+def read_state(state_path: str) -> Dict[str, Any]:
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(state: Dict[str, Any], state_path: str):
+    """Zapiši stanje (atomično: privremeni fajl + os.replace)"""
+    tmp_path = f"{state_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def hash_files(paths: List[str]) -> Dict[str, str]:
+    return {os.path.basename(path): file_sha256(path) for path in paths}
+
+
+def input_fingerprint(stage: Stage) -> Dict[str, Any]:
+    """Hash ulaza i konfiguracije faze (ulazi moraju postojati)"""
+    missing = [path for path in stage.inputs if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Faza '{stage.name}' nema ulaz: {', '.join(missing)}")
+    return {'inputs': hash_files(stage.inputs), 'config': config_sha256(stage.config)}
+
+
+def is_up_to_date(stage: Stage, fingerprint: Dict[str, Any], recorded: Optional[Dict[str, Any]]) -> bool:
+    """Ulazi i konfiguracija isti kao pri posljednjem pokretanju, a izlazi postoje i nisu mijenjani"""
+    if not recorded:
+        return False
+    if recorded.get('inputs') != fingerprint['inputs'] or recorded.get('config') != fingerprint['config']:
+        return False
+    if not all(os.path.exists(path) for path in stage.outputs):
+        return False
+    return recorded.get('outputs') == hash_files(stage.outputs)
+
+
+def run_pipeline(data_dir: str, force: bool = False, dry_run: bool = False, stream: bool = False,
+                 chunk_size: int = ddi_cleaner.DEFAULT_CHUNK_SIZE) -> Dict[str, str]:
+    """Pokreni faze redom; vraća {faza: 'run' | 'skipped' | 'pending'}"""
+    state_path = os.path.join(data_dir, STATE_FILE)
+    state = read_state(state_path)
+    results = {}
+
+    if not dry_run:
+        ddi_scoring.ensure_scoring_config(os.path.join(data_dir, 'scoring_config.json'))
+
+    for stage in build_stages(data_dir, stream=stream, chunk_size=chunk_size):
+        if dry_run and any(result != 'skipped' for result in results.values()):
+            # Izlazi prethodne faze bi se promijenili, pa se ova ne može provjeriti unaprijed
+            results[stage.name] = 'pending'
+            print(f"🔄 {stage.name}: pokrenulo bi se (zavisi od prethodne faze)")
+            continue
+
+        fingerprint = input_fingerprint(stage)
+        if not force and is_up_to_date(stage, fingerprint, state.get(stage.name)):
+            results[stage.name] = 'skipped'
+            print(f"✅ {stage.name}: nepromijenjeno, preskačem")
+            continue
+
+        if dry_run:
+            results[stage.name] = 'pending'
+            print(f"🔄 {stage.name}: pokrenulo bi se")
+            continue
+
+        print(f"🔄 {stage.name}: pokrećem")
+        start = time.perf_counter()
+        stage.run()
+        print(f"⏱️ {stage.name}: {time.perf_counter() - start:.2f}s")
+
+        state[stage.name] = dict(fingerprint, outputs=hash_files(stage.outputs))
+        write_state(state, state_path)
+        results[stage.name] = 'run'
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DDI pipeline: clean -> score -> stats")
+    parser.add_argument("--data-dir", default=os.path.join(root_dir, "data"), help="Folder sa podacima")
+    parser.add_argument("--force", action="store_true", help="Pokreni sve faze bez obzira na hash-eve")
+    parser.add_argument("--dry-run", action="store_true", help="Samo prikaži koje bi se faze pokrenule")
+    parser.add_argument("--stream", action="store_true", help="Čitaj izvor u komadima (fajlovi veći od memorije)")
+    parser.add_argument("--chunk-size", type=int, default=ddi_cleaner.DEFAULT_CHUNK_SIZE,
+                        help="Redova po komadu u streaming režimu")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔁 DDI PIPELINE")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    try:
+        results = run_pipeline(args.data_dir, force=args.force, dry_run=args.dry_run,
+                               stream=args.stream, chunk_size=args.chunk_size)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    summary = ", ".join(f"{name}: {result}" for name, result in results.items())
+    print(f"\n✅ Pipeline završen za {time.perf_counter() - start:.2f}s ({summary})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+DDI PROFILES: Gradi profile rizika po lijeku (DDI_with_scores.profiles.json)
+
+Za svaki lijek: broj interakcija, broj partnera, prosječni/najveći score, histogram kategorija
+i broj partnera sa kritičnom interakcijom. TherapyRepository ih postavlja u Drug.risk_profile.
+Profili se automatski ponovo grade kada se promijeni hash CSV-a, a ova skripta služi za
+eksplicitnu izgradnju (npr. pri deploy-u).
+
+Pokretanje (iz root foldera projekta):
+    python scripts/ddi_profiles.py
+    python scripts/ddi_profiles.py --csv data/DDI_with_scores.csv --top 10 --force
+"""
+import argparse
+import os
+import sys
+import time
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from DDIAgent.ml.drug_profiles import default_profiles_path, load_or_build_profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Izgradi profile rizika po lijeku")
+    parser.add_argument("--csv", default=os.path.join(root_dir, "data", "DDI_with_scores.csv"),
+                        help="Putanja do DDI_with_scores.csv")
+    parser.add_argument("--out", default=None, help="Putanja fajla profila (default: pored CSV-a)")
+    parser.add_argument("--force", action="store_true", help="Izgradi profile i ako su ažurni")
+    parser.add_argument("--top", type=int, default=10, help="Prikaži N lijekova sa najvećim prosječnim score-om")
+    args = parser.parse_args()
+
+    profiles_path = args.out or default_profiles_path(args.csv)
+
+    print("=" * 60)
+    print("🧬 DDI PROFILI LIJEKOVA")
+    print("=" * 60)
+    print(f"CSV:     {args.csv}")
+    print(f"Profili: {profiles_path}")
+
+    if args.force and os.path.exists(profiles_path):
+        os.remove(profiles_path)
+
+    start = time.perf_counter()
+    profiles = load_or_build_profiles(args.csv, profiles_path)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(profiles)} profila za {elapsed:.2f}s (verzija: {profiles.dataset_version})")
+
+    if args.top > 0:
+        print(f"\n⚠️ TOP {args.top} LIJEKOVA (prosječan score):")
+        ranked = sorted(profiles.profiles.items(), key=lambda item: item[1]['mean_score'], reverse=True)
+        for i, (drug_id, profile) in enumerate(ranked[:args.top], 1):
+            print(f"{i:2}. {drug_id:10} Prosjek: {profile['mean_score']:.2f}, "
+                  f"Interakcija: {profile['interaction_count']}, "
+                  f"Kritičnih partnera: {profile['critical_partner_count']}")
+
+
+if __name__ == "__main__":
+    main()
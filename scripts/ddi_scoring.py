@@ -1,33 +1,38 @@
-import pandas as pd
-import json
-from collections import Counter
+"""
+DDI SCORING: Dodjeljuje risk_score i risk_category svakoj interakciji (ključne riječi iz scoring_config.json)
 
-print("="*60)
-print("DDI SCORING SISTEM")
-print("="*60)
+Faze:
+    run_scoring - data/DDI_data_cleaned.csv + scoring_config.json -> data/DDI_with_scores.csv
+    run_stats   - DDI_with_scores.csv + drug_lookup.json -> data/scoring_stats.json
+data/scoring_config.json je politika bodovanja (ključ 'categories') i skripte ga samo čitaju;
+scoring_categories ispod su podrazumijevane kategorije kada fajl još ne postoji.
+Koristi se samostalno ili kao 'score' i 'stats' faze u scripts/ddi_pipeline.py.
+run_scoring_streaming / run_stats_streaming čitaju CSV u komadima (ddi_pipeline.py --stream).
 
-# Učitaj očišćene podatke
-df = pd.read_csv('data/DDI_data_cleaned.csv')
-print(f"✅ Učitano {len(df)} interakcija")
+Pokretanje (iz bilo kojeg foldera):
+    python scripts/ddi_scoring.py
+"""
+import json
+import os
+import sys
 
-# Učitaj lookup tabelu lijekova
-with open('data/drug_lookup.json', 'r', encoding='utf-8') as f:
-    drug_lookup = json.load(f)
-print(f"✅ Učitano {len(drug_lookup)} lijekova")
+import pandas as pd
+import numpy as np
 
-# Analiza tipova interakcija
-print("\n📊 ANALIZA TIPOVA INTERAKCIJA:")
-interaction_counts = df['interaction_type'].value_counts()
-print(f"Broj različitih tipova: {len(interaction_counts)}")
+# Podrazumijevane putanje su relativne na root folder projekta, ne na trenutni folder
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+DATA_DIR = os.path.join(root_dir, 'data')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
 
-print("\n🔝 TOP 15 NAJČEŠĆIH INTERAKCIJA:")
-for i, (interaction, count) in enumerate(interaction_counts.head(15).items(), 1):
-    percentage = (count / len(df)) * 100
-    print(f"{i:2}. {interaction:45} {count:6} ({percentage:.1f}%)")
+# Ista pravila primjenjuje ScoringModel pri bodovanju u runtime-u (scoring_config.json)
+from DDIAgent.ml.risk_categorizer import RiskCategorizer, validate_categories
 
-# Definišimo DETAILAN scoring sistem
-print("\n⚖️ KREIRAM SCORING SISTEM...")
+# Streaming režim: redova po komadu
+DEFAULT_CHUNK_SIZE = 500_000
 
+# Definišimo DETAILAN scoring sistem
 scoring_categories = {
     # KRITIČNE interakcije (score 5)
     'CRITICAL_BLEEDING': {
@@ -103,121 +108,291 @@ scoring_categories = {
     }
 }
 
-def assign_score_and_category(interaction_type):
-    """Dodijeli score i kategoriju za interakciju"""
-    interaction_lower = interaction_type.lower()
-    
-    for category_name, category_info in scoring_categories.items():
-        for keyword in category_info['keywords']:
-            if keyword.lower() in interaction_lower:
-                return category_info['score'], category_name
-    
-    # Ako nije pronađeno, vrati OTHER
-    return scoring_categories['OTHER']['score'], 'OTHER'
-
-# Testiraj scoring
-print("\n🧪 TEST SCORINGA:")
-test_cases = [
-    "risk or severity of bleeding",
-    "anticoagulant activities", 
-    "QTc-prolonging activities",
-    "serum concentration",
-    "nephrotoxic activities",
-    "therapeutic efficacy",
-    "metabolism",
-    "risk or severity of adverse effects"
-]
-
-for test in test_cases:
-    score, category = assign_score_and_category(test)
-    print(f"  {test:45} → Score: {score}, Kategorija: {category}")
-
-# Primijeni scoring na sve podatke
-print("\n📝 PRIMJENA SCORINGA NA SVE INTERAKCIJE...")
-df[['risk_score', 'risk_category']] = df['interaction_type'].apply(
-    lambda x: pd.Series(assign_score_and_category(x))
-)
-
-# Sačuvaj podatke sa score-ovima
-output_file = 'DDI_with_scores.csv'
-df.to_csv(output_file, index=False)
-print(f"💾 Podaci sa score-ovima sačuvani u: {output_file}")
-
-# Prikaži distribuciju
-print("\n📈 DISTRIBUCIJA SCORE-OVA:")
-score_dist = df['risk_score'].value_counts().sort_index()
-for score, count in score_dist.items():
-    percentage = (count / len(df)) * 100
-    print(f"  Score {score}: {count:8} interakcija ({percentage:5.1f}%)")
-
-# Analiza po kategorijama
-print("\n🏷️ DISTRIBUCIJA PO KATEGORIJAMA:")
-category_dist = df['risk_category'].value_counts()
-for category, count in category_dist.items():
-    for cat_name, cat_info in scoring_categories.items():
-        if cat_name == category:
-            description = cat_info['description']
-            break
-    else:
-        description = "Nepoznato"
-    
-    percentage = (count / len(df)) * 100
-    print(f"  {category:20} ({description[:30]}...): {count:6} ({percentage:5.1f}%)")
-
-# Analiza najopasnijih lijekova
-print("\n⚠️ TOP 10 NAJOPASNIJIH LIJEKOVA (prosječan score):")
-drug_scores = {}
-
-for _, row in df.iterrows():
-    # Dodaj score za prvi lijek
-    drug_scores[row['drug1_id']] = drug_scores.get(row['drug1_id'], {'total': 0, 'count': 0})
-    drug_scores[row['drug1_id']]['total'] += row['risk_score']
-    drug_scores[row['drug1_id']]['count'] += 1
-    
-    # Dodaj score za drugi lijek
-    drug_scores[row['drug2_id']] = drug_scores.get(row['drug2_id'], {'total': 0, 'count': 0})
-    drug_scores[row['drug2_id']]['total'] += row['risk_score']
-    drug_scores[row['drug2_id']]['count'] += 1
-
-# Izračunaj prosječne score-ove
-drug_avg_scores = []
-for drug_id, scores in drug_scores.items():
-    if scores['count'] > 0:
-        avg_score = scores['total'] / scores['count']
-        drug_name = drug_lookup.get(drug_id, "Unknown")
-        drug_avg_scores.append((drug_id, drug_name, avg_score, scores['count']))
-
-# Sortiraj po prosječnom score-u
-drug_avg_scores.sort(key=lambda x: x[2], reverse=True)
-
-# Prikaži top 10
-for i, (drug_id, drug_name, avg_score, count) in enumerate(drug_avg_scores[:10], 1):
-    print(f"{i:2}. {drug_name:30} ({drug_id}): Prosjek: {avg_score:.2f}, Interakcija: {count}")
-
-# Kreiraj i sačuvaj scoring konfiguraciju
-scoring_config = {
-    'categories': scoring_categories,
-    'statistics': {
-        'total_interactions': len(df),
-        'average_score': df['risk_score'].mean(),
-        'high_risk_count': len(df[df['risk_score'] >= 4]),
-        'critical_risk_count': len(df[df['risk_score'] == 5])
-    },
-    'top_risky_drugs': [
-        {
-            'drug_id': drug_id,
-            'drug_name': drug_name,
-            'avg_score': float(avg_score),
-            'interaction_count': count
-        }
-        for drug_id, drug_name, avg_score, count in drug_avg_scores[:20]
+default_categorizer = RiskCategorizer(scoring_categories)
+
+def load_scoring_categories(config_path=os.path.join(DATA_DIR, 'scoring_config.json')):
+    """Kategorije iz politike bodovanja (provjerene); podrazumijevane ako fajl ne postoji"""
+    if not os.path.exists(config_path):
+        return scoring_categories
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"Nevalidan scoring config: {config_path}")
+    return validate_categories(config.get('categories'))
+
+def ensure_scoring_config(config_path=os.path.join(DATA_DIR, 'scoring_config.json')):
+    """Zapiši podrazumijevanu politiku bodovanja ako fajl ne postoji (postojeći se nikad ne mijenja)"""
+    if os.path.exists(config_path):
+        return False
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump({'categories': scoring_categories}, f, ensure_ascii=False, indent=2)
+    print(f"💾 Podrazumijevana politika bodovanja zapisana u: {config_path}")
+    return True
+
+def assign_score_and_category(interaction_type, categorizer=None):
+    """Dodijeli score i kategoriju za interakciju (OTHER ako nijedna ključna riječ ne odgovara)"""
+    return (categorizer or default_categorizer).categorize(interaction_type)
+
+def score_interactions(df, type_map=None, categorizer=None):
+    """
+    Dodaj kolone risk_score i risk_category. Različitih tipova je malo (~100 na ~220k redova):
+    svaki tip se kategorizuje jednom, pa se rezultat proširi na redove preko kodova kategoričke kolone.
+    `type_map` (tip -> (score, kategorija)) se dijeli između komada u streaming režimu.
+    """
+    type_map = {} if type_map is None else type_map
+    interaction_types = df['interaction_type'].astype('category')
+    for interaction_type in interaction_types.cat.categories:
+        if interaction_type not in type_map:
+            type_map[interaction_type] = assign_score_and_category(interaction_type, categorizer)
+    type_scores, type_categories = zip(*(type_map[t] for t in interaction_types.cat.categories))
+    type_codes = interaction_types.cat.codes.to_numpy()
+    df['risk_score'] = np.array(type_scores, dtype=float)[type_codes]
+    df['risk_category'] = np.array(type_categories, dtype=object)[type_codes]
+    return df
+
+def run_scoring(cleaned_path=os.path.join(DATA_DIR, 'DDI_data_cleaned.csv'),
+                scores_path=os.path.join(DATA_DIR, 'DDI_with_scores.csv'),
+                config_path=os.path.join(DATA_DIR, 'scoring_config.json')):
+    """'score' faza: očišćeni CSV -> DDI_with_scores.csv po kategorijama iz scoring_config.json"""
+    print("="*60)
+    print("DDI SCORING SISTEM")
+    print("="*60)
+
+    categorizer = RiskCategorizer(load_scoring_categories(config_path))
+
+    # Učitaj očišćene podatke
+    df = pd.read_csv(cleaned_path)
+    print(f"✅ Učitano {len(df)} interakcija")
+
+    # Analiza tipova interakcija
+    print("\n📊 ANALIZA TIPOVA INTERAKCIJA:")
+    interaction_counts = df['interaction_type'].value_counts()
+    print(f"Broj različitih tipova: {len(interaction_counts)}")
+
+    print("\n🔝 TOP 15 NAJČEŠĆIH INTERAKCIJA:")
+    for i, (interaction, count) in enumerate(interaction_counts.head(15).items(), 1):
+        percentage = (count / len(df)) * 100
+        print(f"{i:2}. {interaction:45} {count:6} ({percentage:.1f}%)")
+
+    print("\n⚖️ KREIRAM SCORING SISTEM...")
+
+    # Testiraj scoring
+    print("\n🧪 TEST SCORINGA:")
+    test_cases = [
+        "risk or severity of bleeding",
+        "anticoagulant activities", 
+        "QTc-prolonging activities",
+        "serum concentration",
+        "nephrotoxic activities",
+        "therapeutic efficacy",
+        "metabolism",
+        "risk or severity of adverse effects"
     ]
-}
 
-with open('scoring_config.json', 'w', encoding='utf-8') as f:
-    json.dump(scoring_config, f, ensure_ascii=False, indent=2)
-print(f"\n💾 Scoring konfiguracija sačuvana u: scoring_config.json")
+    for test in test_cases:
+        score, category = assign_score_and_category(test, categorizer)
+        print(f"  {test:45} → Score: {score}, Kategorija: {category}")
+
+    # Primijeni scoring na sve podatke
+    print("\n📝 PRIMJENA SCORINGA NA SVE INTERAKCIJE...")
+    score_interactions(df, categorizer=categorizer)
+
+    # Sačuvaj podatke sa score-ovima
+    df.to_csv(scores_path, index=False)
+    print(f"💾 Podaci sa score-ovima sačuvani u: {scores_path}")
+
+def run_stats(scores_path=os.path.join(DATA_DIR, 'DDI_with_scores.csv'),
+              lookup_path=os.path.join(DATA_DIR, 'drug_lookup.json'),
+              stats_path=os.path.join(DATA_DIR, 'scoring_stats.json'),
+              config_path=os.path.join(DATA_DIR, 'scoring_config.json')):
+    """'stats' faza: distribucije score-ova i najopasniji lijekovi -> scoring_stats.json"""
+    # Učitaj podatke sa score-ovima
+    df = pd.read_csv(scores_path)
+
+    # Vektorizovano: oba lijeka svake interakcije, redom pojavljivanja kao u CSV-u (drug1, drug2, ...)
+    drug_ids = np.column_stack([df['drug1_id'].to_numpy(), df['drug2_id'].to_numpy()]).ravel()
+    drug_scores = (
+        pd.DataFrame({'drug_id': drug_ids, 'score': np.repeat(df['risk_score'].to_numpy(dtype=float), 2)})
+        .groupby('drug_id', sort=False)['score']
+        .agg(['sum', 'count'])
+    )
+
+    write_stats(
+        total=len(df),
+        score_dist=df['risk_score'].value_counts().sort_index(),
+        category_dist=df['risk_category'].value_counts(),
+        drug_scores=drug_scores,
+        average_score=df['risk_score'].mean(),
+        high_risk_count=len(df[df['risk_score'] >= 4]),
+        critical_risk_count=len(df[df['risk_score'] == 5]),
+        lookup_path=lookup_path,
+        stats_path=stats_path,
+        categories=load_scoring_categories(config_path)
+    )
+
+def write_stats(total, score_dist, category_dist, drug_scores, average_score, high_risk_count,
+                critical_risk_count, lookup_path, stats_path, categories):
+    """
+    Ispis distribucija i zapis scoring_stats.json (isto za oba režima).
+    drug_scores: DataFrame sa kolonama sum/count po lijeku, redom prvog pojavljivanja lijeka.
+    categories: politika bodovanja (samo za opise kategorija u ispisu).
+    """
+    # Učitaj lookup tabelu lijekova
+    with open(lookup_path, 'r', encoding='utf-8') as f:
+        drug_lookup = json.load(f)
+    print(f"✅ Učitano {len(drug_lookup)} lijekova")
+
+    # Prikaži distribuciju
+    print("\n📈 DISTRIBUCIJA SCORE-OVA:")
+    for score, count in score_dist.items():
+        percentage = (count / total) * 100
+        print(f"  Score {score}: {count:8} interakcija ({percentage:5.1f}%)")
+
+    # Analiza po kategorijama
+    print("\n🏷️ DISTRIBUCIJA PO KATEGORIJAMA:")
+    for category, count in category_dist.items():
+        description = categories.get(category, {}).get('description', "Nepoznato")
+
+        percentage = (count / total) * 100
+        print(f"  {category:20} ({description[:30]}...): {count:6} ({percentage:5.1f}%)")
+
+    # Analiza najopasnijih lijekova
+    print("\n⚠️ TOP 10 NAJOPASNIJIH LIJEKOVA (prosječan score):")
+
+    # Izračunaj prosječne score-ove
+    drug_avg_scores = [
+        (drug_id, drug_lookup.get(drug_id, "Unknown"), total_score / count, count)
+        for drug_id, total_score, count in zip(
+            drug_scores.index.tolist(), drug_scores['sum'].tolist(), drug_scores['count'].tolist()
+        )
+    ]
+
+    # Sortiraj po prosječnom score-u
+    drug_avg_scores.sort(key=lambda x: x[2], reverse=True)
+
+    # Prikaži top 10
+    for i, (drug_id, drug_name, avg_score, count) in enumerate(drug_avg_scores[:10], 1):
+        print(f"{i:2}. {drug_name:30} ({drug_id}): Prosjek: {avg_score:.2f}, Interakcija: {count}")
+
+    # Statistike idu u poseban fajl: scoring_config.json je politika bodovanja i ovdje se ne mijenja
+    scoring_stats = {
+        'statistics': {
+            'total_interactions': total,
+            'average_score': average_score,
+            'high_risk_count': high_risk_count,
+            'critical_risk_count': critical_risk_count
+        },
+        'top_risky_drugs': [
+            {
+                'drug_id': drug_id,
+                'drug_name': drug_name,
+                'avg_score': float(avg_score),
+                'interaction_count': count
+            }
+            for drug_id, drug_name, avg_score, count in drug_avg_scores[:20]
+        ]
+    }
+
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        json.dump(scoring_stats, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Statistike bodovanja sačuvane u: {stats_path}")
+
+def add_counts(totals, keys):
+    """Dodaj broj pojavljivanja ključeva u dict koji čuva redoslijed prvog pojavljivanja"""
+    counts = pd.Series(keys).value_counts().reindex(pd.unique(keys))
+    for key, count in zip(counts.index.tolist(), counts.tolist()):
+        totals[key] = totals.get(key, 0) + count
+
+def sorted_counts(totals):
+    """Brojevi sortirani opadajuće; jednaki brojevi ostaju redom prvog pojavljivanja"""
+    return pd.Series(totals, dtype='int64').sort_values(ascending=False, kind='stable')
+
+def run_scoring_streaming(cleaned_path=os.path.join(DATA_DIR, 'DDI_data_cleaned.csv'),
+                          scores_path=os.path.join(DATA_DIR, 'DDI_with_scores.csv'),
+                          config_path=os.path.join(DATA_DIR, 'scoring_config.json'),
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    'score' faza u komadima: svaki komad se kategorizuje kroz mapu jedinstvenih tipova
+    (tip se kategorizuje jednom za cijeli fajl) i odmah dodaje u izlazni CSV.
+    """
+    print("="*60)
+    print("DDI SCORING SISTEM (streaming)")
+    print("="*60)
+
+    categorizer = RiskCategorizer(load_scoring_categories(config_path))
+    type_map = {}
+    type_counts = {}
+    total = 0
+    header = True
+    for chunk in pd.read_csv(cleaned_path, chunksize=chunk_size):
+        add_counts(type_counts, chunk['interaction_type'].to_numpy(dtype=object))
+        score_interactions(chunk, type_map, categorizer)
+        chunk.to_csv(scores_path, mode='w' if header else 'a', header=header, index=False)
+        header = False
+        total += len(chunk)
+
+    if header:
+        pd.read_csv(cleaned_path, nrows=0).assign(risk_score=[], risk_category=[]).to_csv(scores_path, index=False)
+
+    print(f"✅ Obrađeno {total} interakcija, {len(type_map)} različitih tipova")
+    print("\n🔝 TOP 15 NAJČEŠĆIH INTERAKCIJA:")
+    for i, (interaction, count) in enumerate(sorted_counts(type_counts).head(15).items(), 1):
+        percentage = (count / total) * 100
+        print(f"{i:2}. {interaction:45} {count:6} ({percentage:.1f}%)")
+    print(f"💾 Podaci sa score-ovima sačuvani u: {scores_path}")
+
+def run_stats_streaming(scores_path=os.path.join(DATA_DIR, 'DDI_with_scores.csv'),
+                        lookup_path=os.path.join(DATA_DIR, 'drug_lookup.json'),
+                        stats_path=os.path.join(DATA_DIR, 'scoring_stats.json'),
+                        config_path=os.path.join(DATA_DIR, 'scoring_config.json'),
+                        chunk_size=DEFAULT_CHUNK_SIZE):
+    """'stats' faza u komadima: brojači i sume po lijeku se akumuliraju, memorija zavisi od broja lijekova"""
+    score_counts, category_counts = {}, {}
+    drug_sums, drug_counts = {}, {}
+    total = 0
+    score_sum = 0.0
+    high_risk_count = 0
+    critical_risk_count = 0
+
+    for chunk in pd.read_csv(scores_path, chunksize=chunk_size):
+        scores = chunk['risk_score'].to_numpy(dtype=float)
+        total += len(chunk)
+        score_sum += float(scores.sum())
+        high_risk_count += int((scores >= 4).sum())
+        critical_risk_count += int((scores == 5).sum())
+        add_counts(score_counts, scores)
+        add_counts(category_counts, chunk['risk_category'].to_numpy(dtype=object))
+
+        drug_ids = np.column_stack([chunk['drug1_id'].to_numpy(), chunk['drug2_id'].to_numpy()]).ravel()
+        chunk_scores = (
+            pd.DataFrame({'drug_id': drug_ids, 'score': np.repeat(scores, 2)})
+            .groupby('drug_id', sort=False)['score']
+            .agg(['sum', 'count'])
+        )
+        for drug_id, score, count in zip(chunk_scores.index.tolist(), chunk_scores['sum'].tolist(),
+                                         chunk_scores['count'].tolist()):
+            drug_sums[drug_id] = drug_sums.get(drug_id, 0.0) + score
+            drug_counts[drug_id] = drug_counts.get(drug_id, 0) + count
+
+    write_stats(
+        total=total,
+        score_dist=pd.Series(score_counts, dtype='int64').sort_index(),
+        category_dist=sorted_counts(category_counts),
+        drug_scores=pd.DataFrame({'sum': list(drug_sums.values()), 'count': list(drug_counts.values())},
+                                 index=list(drug_sums)),
+        average_score=score_sum / total if total else float('nan'),
+        high_risk_count=high_risk_count,
+        critical_risk_count=critical_risk_count,
+        lookup_path=lookup_path,
+        stats_path=stats_path,
+        categories=load_scoring_categories(config_path)
+    )
+
+if __name__ == "__main__":
+    ensure_scoring_config()
+    run_scoring()
+    run_stats()
 
-print("\n" + "="*60)
-print("✅ SCORING SISTEM ZAVRŠEN!")
-print("="*60)
+    print("\n" + "="*60)
+    print("✅ SCORING SISTEM ZAVRŠEN!")
+    print("="*60)
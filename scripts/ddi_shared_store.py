@@ -0,0 +1,66 @@
+"""
+DDI SHARED STORE: Objavljuje InteractionStore u multiprocessing.shared_memory
+
+Loader proces učita store (iz pack-a ili CSV-a), objavi ga u imenovani segment i ostaje živ
+dok ga ne zaustavite (Ctrl+C / SIGTERM), a zatim segment briše. Web worker procesi pokrenuti sa
+DDI_SHARED_STORE=<ime> priključuju se na segment read-only, umjesto da svaki učitava svoju kopiju.
+
+Pokretanje (iz root foldera projekta):
+    python scripts/ddi_shared_store.py
+    python scripts/ddi_shared_store.py --csv data/DDI_with_scores.csv --name ddi_interactions
+    python scripts/ddi_shared_store.py --unlink
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from DDIAgent.ml.interaction_pack import load_or_build
+from DDIAgent.ml.shared_store import DEFAULT_SHARED_NAME, publish_store, unlink_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Objavi DDI store u shared memory")
+    parser.add_argument("--csv", default=os.path.join(root_dir, "data", "DDI_with_scores.csv"),
+                        help="Putanja do DDI_with_scores.csv")
+    parser.add_argument("--name", default=DEFAULT_SHARED_NAME, help="Ime shared memory segmenta")
+    parser.add_argument("--unlink", action="store_true", help="Samo obriši postojeći segment")
+    args = parser.parse_args()
+
+    if args.unlink:
+        removed = unlink_store(args.name)
+        print(f"{'✅ Segment obrisan' if removed else '⚠️ Segment ne postoji'}: {args.name}")
+        return
+
+    print("=" * 60)
+    print("🧠 DDI SHARED STORE")
+    print("=" * 60)
+
+    store, source_sha256, _ = load_or_build(args.csv)
+    segment = publish_store(store, source_sha256, name=args.name, source_path=args.csv)
+    print(f"✅ Objavljeno {store.interaction_count} interakcija u '{args.name}' "
+          f"({segment.size / 1024 / 1024:.2f} MB, verzija: {source_sha256[:16]})")
+    print(f"   Workeri: DDI_SHARED_STORE={args.name}")
+    print("   Zaustavljanje: Ctrl+C")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.wait(1.0):
+            pass
+    finally:
+        segment.close()
+        segment.unlink()
+        print(f"🧹 Segment obrisan: {args.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+TEST: DeferredRiskAssessment ne računa puni izvještaj dok se ne zatraži
+
+Pokretanje (iz root foldera projekta):
+    python -m pytest tests
+"""
+import os
+import sys
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from DDIAgent.application.runners.risk_assessment_runner import TickResult
+from DDIAgent.domain.entities import DeferredRiskAssessment, Drug, RiskAssessment, Therapy
+from DDIAgent.domain.enums import ActionType, RiskLevel
+
+CRITICAL_PAIR = {'drug1_id': 'DB00001', 'drug2_id': 'DB00002', 'risk_score': 5.0}
+
+
+def make_therapy():
+    return Therapy(patient_id='P_TEST', drugs=[Drug('DB00001', 'A'), Drug('DB00002', 'B')], id=1)
+
+
+def make_deferred(therapy=None):
+    """Odložena procjena čiji loader broji pozive"""
+    therapy = therapy or make_therapy()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return RiskAssessment(therapy=therapy, total_score=5.0, risk_level=RiskLevel.CRITICAL,
+                              interactions_found=[], dataset_version='v1')
+
+    return DeferredRiskAssessment(therapy, CRITICAL_PAIR, loader, dataset_version='v1'), calls
+
+
+def test_summary_does_not_build_report():
+    assessment, calls = make_deferred()
+
+    data = assessment.to_dict()
+    tick = TickResult(has_work=True, therapy_id=1, patient_id='P_TEST', drug_count=2,
+                      assessment=assessment, action_taken=ActionType.ESCALATE).to_dict()
+
+    assert calls == []
+    assert data['report_ready'] is False
+    assert data['critical_interaction'] == CRITICAL_PAIR
+    assert tick['assessment']['risk_level'] == RiskLevel.CRITICAL.value
+    assert assessment.has_critical_interactions
+
+
+def test_repr_and_eq_do_not_build_report():
+    assessment, calls = make_deferred()
+    other, other_calls = make_deferred(assessment.therapy)
+    other.timestamp = assessment.timestamp
+
+    assert 'report_ready=False' in repr(assessment)
+    assert assessment == other
+    assert assessment != other.__class__(other.therapy, {}, lambda: None)
+    assert calls == [] and other_calls == []
+
+
+def test_report_is_built_once_on_request():
+    assessment, calls = make_deferred()
+
+    assert assessment.total_score == 5.0
+    assert assessment.to_dict()['report_ready'] is True
+    assert assessment.interaction_count == 0
+    assert calls == [1]
@@ -0,0 +1,59 @@
+"""
+TEST: RiskCategorizer - podrazumijevani score bez ključnih riječi i provjera scoring_config.json
+
+Pokretanje (iz root foldera projekta):
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# Dodaj root folder u Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..')
+if root_dir not in sys.path:
+    sys.path.append(root_dir)
+
+from DDIAgent.ml.risk_categorizer import DEFAULT_CATEGORY, RiskCategorizer, build_category_matcher
+
+
+def test_no_keywords_falls_back_to_default():
+    categorizer = RiskCategorizer({DEFAULT_CATEGORY: {'score': 1.5, 'keywords': []}})
+
+    assert build_category_matcher(categorizer.categories) == (None, [])
+    assert categorizer.categorize('risk of bleeding') == (1.5, DEFAULT_CATEGORY)
+
+
+def test_first_matching_category_wins():
+    categorizer = RiskCategorizer({
+        'CRITICAL_BLEEDING': {'score': 5.0, 'keywords': ['bleeding']},
+        'SERUM_LEVEL': {'score': 3.0, 'keywords': ['serum']},
+        DEFAULT_CATEGORY: {'score': 1.0},
+    })
+
+    assert categorizer.categorize('Serum level and BLEEDING') == (5.0, 'CRITICAL_BLEEDING')
+    assert categorizer.categorize('serum concentration') == (3.0, 'SERUM_LEVEL')
+    assert categorizer.categorize('therapeutic efficacy') == (1.0, DEFAULT_CATEGORY)
+
+
+def test_from_config_rejects_invalid_categories(tmp_path):
+    invalid = [
+        {},
+        {'categories': {}},
+        {'categories': {DEFAULT_CATEGORY: {'score': 1.0, 'keywords': []}}},
+        {'categories': {'SERUM_LEVEL': {'keywords': ['serum']}}},
+        {'categories': {'SERUM_LEVEL': {'score': 3.0, 'keywords': 'serum'}}},
+    ]
+    for config in invalid:
+        path = tmp_path / "scoring_config.json"
+        path.write_text(json.dumps(config), encoding='utf-8')
+        with pytest.raises(ValueError):
+            RiskCategorizer.from_config(str(path))
+
+
+def test_from_config_loads_repo_config():
+    categorizer = RiskCategorizer.from_config(os.path.join(root_dir, 'data', 'scoring_config.json'))
+
+    assert categorizer.categorize('risk or severity of bleeding')[1] == 'CRITICAL_BLEEDING'